@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# Розширення відеофайлів, які відкривають open_file та open_folder
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov")
+
+
+def video_file_filter():
+    """Фільтр QFileDialog для VIDEO_EXTENSIONS."""
+    patterns = " ".join(f"*{extension}" for extension in VIDEO_EXTENSIONS)
+    return f"Video Files ({patterns});;All Files (*.*)"
+
+
+class FolderScanner(QThread):
+    """
+    Рекурсивно обходить теки у фоновому потоці через os.scandir і
+    порціями передає знайдені відеофайли в інтерфейс.
+    З MediaLibrary теки, чий mtime не змінився, беруться з індексу без читання диска.
+    """
+    files_found = pyqtSignal(list)
+
+    def __init__(self, roots, extensions=VIDEO_EXTENSIONS, library=None, batch_size=500,
+                 batch_interval=0.1, parent=None):
+        """
+        Args:
+            roots: Тека або список тек для сканування
+            extensions: Розширення файлів (в нижньому регістрі)
+            library: MediaLibrary для інкрементального сканування (None - без індексу)
+            batch_size: Максимальна кількість файлів в одній порції
+            batch_interval: Максимальний час у секундах між порціями
+        """
+        super().__init__(parent)
+        self.roots = [roots] if isinstance(roots, str) else list(roots)
+        self.extensions = tuple(extensions)
+        self.library = library
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.count = 0
+        self.scanned_directories = 0
+        self.cached_directories = 0
+
+    def cancel(self):
+        """Просить потік зупинитися; сканування завершиться після поточної теки."""
+        self.requestInterruption()
+
+    def run(self):
+        batch = []
+        last_emit = time.monotonic()
+        directories = [(root, None) for root in reversed(self.roots)]
+        for root in self.roots:
+            if self.library is not None:
+                self.library.add_media_root(root)
+        while directories and not self.isInterruptionRequested():
+            directory, parent = directories.pop()
+            files, subdirectories = self.list_directory(directory, parent)
+            # Зворотний порядок у стеку дає обхід підтек за алфавітом
+            directories.extend((subdirectory, directory) for subdirectory in reversed(subdirectories))
+            for path in files:
+                batch.append(path)
+                # Перший файл віддається одразу, щоб відтворення почалося без очікування
+                if self.count == 0 or len(batch) >= self.batch_size or \
+                        time.monotonic() - last_emit >= self.batch_interval:
+                    self._emit(batch)
+                    batch = []
+                    last_emit = time.monotonic()
+        if batch and not self.isInterruptionRequested():
+            self._emit(batch)
+        if self.library is not None:
+            # Індекс записується тут, у фоновому потоці, щоб після finished його вже можна було читати
+            self.library.flush()
+        logging.info(f"Scanned {self.scanned_directories} directories, "
+                     f"{self.cached_directories} unchanged, {self.count} files")
+
+    def list_directory(self, directory, parent):
+        """
+        Повертає відсортовані (файли, підтеки) теки: з індексу, якщо тека не змінилась,
+        інакше через os.scandir з оновленням індексу
+        """
+        mtime = None
+        if self.library is not None:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError as e:
+                logging.error(f"Error scanning {directory}: {str(e)}")
+                return [], []
+            cached = self.library.cached_directory(directory)
+            if cached is not None and cached[0] == mtime:
+                self.cached_directories += 1
+                return cached[2], cached[1]
+        files, subdirectories = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.path)
+                        elif entry.name.lower().endswith(self.extensions):
+                            stat = entry.stat() if self.library is not None else None
+                            files.append((entry.path, entry.name, stat))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.error(f"Error scanning {directory}: {str(e)}")
+            return [], []
+        self.scanned_directories += 1
+        files.sort()
+        subdirectories.sort()
+        if self.library is not None:
+            self.library.update_directory(
+                directory, parent, mtime,
+                [(path, name, stat.st_size, stat.st_mtime) for path, name, stat in files], subdirectories)
+        return [path for path, name, stat in files], subdirectories
+
+    def _emit(self, batch):
+        self.count += len(batch)
+        self.files_found.emit(batch)
+
+
+class LibraryWatcher(QThread):
+    """
+    Стежить за проіндексованими теками через inotify (лише Linux,
+    потрібен необов'язковий пакет inotify_simple).
+    """
+    directory_changed = pyqtSignal(str)
+
+    def __init__(self, directories, parent=None):
+        super().__init__(parent)
+        self.directories = list(directories)
+
+    @staticmethod
+    def available():
+        return INotify is not None and sys.platform.startswith("linux")
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        mask = (inotify_flags.CREATE | inotify_flags.DELETE | inotify_flags.MOVED_FROM |
+                inotify_flags.MOVED_TO | inotify_flags.CLOSE_WRITE | inotify_flags.DELETE_SELF)
+        try:
+            inotify = INotify()
+        except OSError as e:
+            logging.error(f"Error starting inotify: {str(e)}")
+            return
+        watches = {}
+        for directory in self.directories:
+            try:
+                watches[inotify.add_watch(directory, mask)] = directory
+            except OSError:
+                continue
+        try:
+            while not self.isInterruptionRequested():
+                changed = {watches.get(event.wd) for event in inotify.read(timeout=500)}
+                for directory in changed - {None}:
+                    self.directory_changed.emit(directory)
+        finally:
+            inotify.close()
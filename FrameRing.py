@@ -0,0 +1,277 @@
+import os
+import sys
+import time
+import ctypes
+import struct
+import logging
+import threading
+from collections import OrderedDict, deque
+from multiprocessing import shared_memory
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Скільки кадрів у кільці: більше, ніж libVLC тримає заблокованими одночасно, плюс запас для відставання споживача
+DEFAULT_SLOTS = 8
+MAGIC = b"VPFR"
+# 2: кадр публікується в слоті, який libVLC отримав у lock, а не в слоті (номер - 1) % slots
+VERSION = 2
+# Заголовок: мітка, версія, ширина, висота, крок рядка, кількість слотів, номер останнього кадру
+HEADER = struct.Struct("<4sIIIIIQ")
+SEQUENCE_OFFSET = 24
+# Запис слота: номер кадру (0 - пишеться або порожній), час публікації time.monotonic_ns()
+SLOT = struct.Struct("<QQ")
+TABLE_OFFSET = 64
+# Вирівнювання даних кадрів (рядки кеш-ліній для numpy і SIMD)
+ALIGNMENT = 64
+
+
+def _align(value):
+    return (value + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class _FrameLayout:
+    """Розмітка кільця в пам'яті і читання кадрів без копіювання (спільне для FrameRing і FrameReader)."""
+
+    def _map(self, buffer, width, height, slots):
+        self.width = width
+        self.height = height
+        self.pitch = width * 4
+        self.slots = slots
+        self.frame_size = self.pitch * height
+        self._data_offset = _align(TABLE_OFFSET + SLOT.size * slots)
+        self._slot_size = _align(self.frame_size)
+        self._view = memoryview(buffer)
+        # Подання слотів створюються один раз - читання кадру нічого не виділяє
+        self._frames = [self._view[offset:offset + self.frame_size] for offset in self._offsets()]
+        self._arrays = None
+
+    def _offsets(self):
+        return [self._data_offset + slot * self._slot_size for slot in range(self.slots)]
+
+    @classmethod
+    def required_size(cls, width, height, slots):
+        return _align(TABLE_OFFSET + SLOT.size * slots) + _align(width * 4 * height) * slots
+
+    @property
+    def sequence(self):
+        """Номер останнього опублікованого кадру (0 - кадрів ще не було)."""
+        return struct.unpack_from("<Q", self._view, SEQUENCE_OFFSET)[0]
+
+    def latest(self):
+        """
+        Останній опублікований кадр
+        Returns:
+            tuple: (номер кадру, слот) або None
+        """
+        sequence = self.sequence
+        if sequence == 0:
+            return None
+        # Запис слота оновлюється раніше за лічильник. Якщо слот останнього кадру вже заблоковано
+        # для нового (номер 0), береться найновіший з решти слотів - один прохід, без очікування
+        latest = None
+        for slot in range(self.slots):
+            slot_sequence = SLOT.unpack_from(self._view, TABLE_OFFSET + slot * SLOT.size)[0]
+            if slot_sequence == sequence:
+                return sequence, slot
+            if slot_sequence and (latest is None or slot_sequence > latest[0]):
+                latest = slot_sequence, slot
+        return latest
+
+    def _newer(self, after):
+        """Останній кадр, якщо він новіший за after, інакше None."""
+        if self.sequence <= after:
+            return None
+        latest = self.latest()
+        return latest if latest is not None and latest[0] > after else None
+
+    def is_valid(self, sequence, slot):
+        """Чи кадр ще в своєму слоті - перевіряється після обробки, щоб відкинути перезаписаний кадр."""
+        return SLOT.unpack_from(self._view, TABLE_OFFSET + slot * SLOT.size)[0] == sequence
+
+    def timestamp(self, slot):
+        """Час публікації кадру в слоті, time.monotonic_ns()."""
+        return SLOT.unpack_from(self._view, TABLE_OFFSET + slot * SLOT.size)[1]
+
+    def frame(self, slot):
+        """Кадр як memoryview байтів BGRX (RV32), рядки по pitch байт - без копіювання."""
+        return self._frames[slot]
+
+    def array(self, slot):
+        """
+        Кадр як numpy.ndarray форми (height, width, 4), порядок каналів B, G, R, X - без копіювання
+        Raises:
+            RuntimeError: numpy не встановлено
+        """
+        if numpy is None:
+            raise RuntimeError("numpy is required for FrameRing.array(); use frame() for a memoryview")
+        if self._arrays is None:
+            self._arrays = [numpy.ndarray((self.height, self.width, 4), dtype=numpy.uint8, buffer=self._view,
+                                          offset=offset, strides=(self.pitch, 4, 1)) for offset in self._offsets()]
+        return self._arrays[slot]
+
+    def _release_views(self):
+        self._arrays = None
+        for frame in self._frames:
+            frame.release()
+        self._frames = []
+        self._view.release()
+
+
+class FrameRing(_FrameLayout):
+    """
+    Пул попередньо виділених буферів, у які libVLC декодує кадри через video callbacks (RV32 заданого розміру).
+    libVLC блокує кілька кадрів наперед: кожен lock отримує вільний слот, display публікує саме його.
+    Читач бере останній кадр без копіювання і після обробки перевіряє is_valid().
+    З shared=True кільце лежить у multiprocessing.shared_memory і доступне іншому процесу через FrameReader.
+    """
+
+    def __init__(self, width, height, slots=DEFAULT_SLOTS, shared=False, name=None, on_frame=None):
+        """
+        Args:
+            width: Ширина кадру (libVLC масштабує відео до цього розміру)
+            height: Висота кадру
+            slots: Кількість буферів у кільці
+            shared: Розмістити кільце в спільній пам'яті для інших процесів
+            name: Ім'я блоку спільної пам'яті (None - згенерувати)
+            on_frame: Функція (номер кадру, слот), викликається в потоці декодера libVLC для кожного кадру -
+                      має бути швидкою, інакше гальмує відтворення
+        """
+        size = self.required_size(width, height, slots)
+        self._memory = shared_memory.SharedMemory(name=name, create=True, size=size) if shared else None
+        buffer = self._memory.buf if shared else bytearray(size)
+        self._map(buffer, width, height, slots)
+        HEADER.pack_into(self._view, 0, MAGIC, VERSION, width, height, self.pitch, slots, 0)
+        # Адреси обчислюються заздалегідь; тимчасовий ctypes-об'єкт не тримає експорт буфера
+        self._addresses = [ctypes.addressof(ctypes.c_char.from_buffer(self._view, offset))
+                           for offset in self._offsets()]
+        self.on_frame = on_frame
+        # Вільні слоти від найдавніше опублікованого; заблоковані - в порядку lock (декодер і вивід - різні потоки)
+        self._free = deque(range(slots))
+        self._locked = OrderedDict()
+        self._slots_lock = threading.Lock()
+        self._condition = threading.Condition()
+        # Посилання на ctypes-колбеки мають жити, поки програвач пише в кільце
+        self._callbacks = None
+
+    @property
+    def name(self):
+        """Ім'я блоку спільної пам'яті для FrameReader або None."""
+        return self._memory.name if self._memory is not None else None
+
+    def attach(self, player):
+        """
+        Перемикає вивід vlc.MediaPlayer у кільце (замість вікна); діє з наступного запуску відтворення
+        """
+        import vlc
+        self._callbacks = (vlc.CallbackDecorators.VideoLockCb(self._lock),
+                           vlc.CallbackDecorators.VideoUnlockCb(lambda opaque, picture, planes: None),
+                           vlc.CallbackDecorators.VideoDisplayCb(self._display))
+        player.video_set_callbacks(*self._callbacks, None)
+        player.video_set_format("RV32", self.width, self.height, self.pitch)
+
+    def _lock(self, opaque, planes):
+        """Видає декодеру слот, який найдовше не публікувався; повертає slot + 1 як picture для display."""
+        with self._slots_lock:
+            if self._free:
+                slot = self._free.popleft()
+            else:
+                # Вільних немає лише тоді, коли libVLC відкинув кадри без display - забираємо найдавніший
+                slot, _ = self._locked.popitem(last=False)
+            self._locked[slot] = None
+        # Поки кадр пишеться, номер слота 0 - читачі бачать, що кадр недійсний
+        SLOT.pack_into(self._view, TABLE_OFFSET + slot * SLOT.size, 0, 0)
+        planes[0] = self._addresses[slot]
+        return slot + 1
+
+    def _display(self, opaque, picture):
+        slot = picture - 1
+        with self._slots_lock:
+            if self._locked.pop(slot, False) is False:
+                return  # Слот уже забрано для іншого кадру
+            sequence = self.sequence + 1
+            SLOT.pack_into(self._view, TABLE_OFFSET + slot * SLOT.size, sequence, time.monotonic_ns())
+            struct.pack_into("<Q", self._view, SEQUENCE_OFFSET, sequence)
+            self._free.append(slot)
+        with self._condition:
+            self._condition.notify_all()
+        if self.on_frame is not None:
+            try:
+                self.on_frame(sequence, slot)
+            except Exception as e:
+                logging.error(f"Error in frame callback: {str(e)}")
+
+    def wait(self, after=0, timeout=None):
+        """
+        Чекає кадр новіший за after (для споживача в тому ж процесі)
+        Returns:
+            tuple: (номер кадру, слот) або None, якщо час вийшов
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._newer(after), timeout)
+
+    def close(self):
+        """Звільняє буфери; викликати після release() програвача, який у них пише."""
+        if self._view is None:
+            return
+        try:
+            self._release_views()
+            if self._memory is not None:
+                self._memory.close()
+        except BufferError:
+            logging.error("Error closing frame ring: frames are still referenced (numpy arrays or memoryviews)")
+        self._view = None
+        if self._memory is not None:
+            try:
+                self._memory.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class FrameReader(_FrameLayout):
+    """Читач кільця FrameRing з іншого процесу: під'єднується до спільної пам'яті за іменем."""
+
+    def __init__(self, name):
+        # Інакше resource_tracker цього процесу знищить чужий блок, коли процес завершиться
+        if sys.version_info >= (3, 13):
+            self._memory = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            if os.name == "posix":
+                try:
+                    from multiprocessing import resource_tracker
+                    resource_tracker.unregister(self._memory._name, "shared_memory")
+                except Exception as e:
+                    logging.error(f"Error detaching shared memory from resource tracker: {str(e)}")
+        magic, version, width, height, pitch, slots, _ = HEADER.unpack_from(self._memory.buf, 0)
+        if magic != MAGIC or version != VERSION or pitch != width * 4:
+            self._memory.close()
+            raise ValueError(f"Not a frame ring: {name}")
+        self._map(self._memory.buf, width, height, slots)
+
+    def read(self, after=0, timeout=None, poll_interval=0.001):
+        """
+        Чекає кадр новіший за after (опитуванням спільного лічильника)
+        Returns:
+            tuple: (номер кадру, слот) або None, якщо час вийшов
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            latest = self._newer(after)
+            if latest is not None:
+                return latest
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def close(self):
+        if self._view is None:
+            return
+        try:
+            self._release_views()
+            self._memory.close()
+        except BufferError:
+            logging.error("Error closing frame reader: frames are still referenced (numpy arrays or memoryviews)")
+        self._view = None
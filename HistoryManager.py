@@ -1,47 +1,137 @@
-import os
-import json
+import time
 import logging
-from datetime import datetime
+from array import array
+from collections import OrderedDict
+from MediaLibrary import MediaLibrary
+
+# Розмір сторінки записів історії, що читається з бази для списку
+PAGE_SIZE = 500
+# Скільки прочитаних сторінок тримається в пам'яті
+CACHED_PAGES = 8
 
 class HistoryManager:
-    def __init__(self, history_filename="history.json", favorites_filename="favorites.json"):
-        self.history_filename = history_filename
-        self.favorites_filename = favorites_filename
-        self.history = self.load_data(self.history_filename)
-        self.favorites = self.load_data(self.favorites_filename)
-
-    def load_data(self, filename):
-        """Завантажує дані з файлу."""
-        try:
-            if os.path.exists(filename):
-                with open(filename, "r", encoding='utf-8') as file:
-                    return json.load(file)
-            return []
-        except Exception as e:
-            print(f"Error loading {filename}: {e}")
-            return []
-
-    def save_data(self, filename, data):
-        """Зберігає дані в файл."""
-        try:
-            with open(filename, "w", encoding='utf-8') as file:
-                json.dump(data, file, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print(f"Error saving {filename}: {e}")
+    def __init__(self, library=None):
+        """
+        Ініціалізація менеджера історії
+        Args:
+            library: Сховище MediaLibrary (за замовчуванням library.db з міграцією старих JSON)
+        """
+        self.library = library or MediaLibrary()
+        # У пам'яті лише індекс: рядок -> ім'я файлу і id запису, ім'я файлу -> рядок.
+        # Самі записи читаються з бази сторінками, коли їх показує список історії
+        self._filenames = []
+        self._ids = array('q')
+        self._index = {}
+        after_id = 0
+        while True:
+            page = self.library.history_filenames_page(after_id, PAGE_SIZE * 4)
+            if not page:
+                break
+            for entry_id, filename in page:
+                self._index[filename] = len(self._filenames)
+                self._filenames.append(filename)
+                self._ids.append(entry_id)
+            after_id = page[-1][0]
+        # Записи, змінені за цей сеанс (у базу вони потрапляють із затримкою фонового запису)
+        self._changed = {}
+        self._pages = OrderedDict()
+        # Впорядкована множина улюблених (dict зберігає порядок вставки)
+        self.favorites = dict.fromkeys(self.library.load_favorites())
+
+    def __len__(self):
+        return len(self._filenames)
+
+    def contains(self, filename):
+        """Перевіряє за O(1), чи є файл в історії."""
+        return filename in self._index
+
+    def get_entry(self, filename):
+        """Повертає запис історії для файлу або None."""
+        row = self._index.get(filename)
+        return self.entry_at(row) if row is not None else None
+
+    def entry_at(self, row):
+        """
+        Запис історії за позицією (порядок додавання)
+        Returns:
+            dict: Поля filename, time_code, position_ms, timestamp, play_count
+        """
+        filename = self._filenames[row]
+        entry = self._changed.get(filename)
+        if entry is not None:
+            return entry
+        page = self._page(row // PAGE_SIZE)
+        return page.get(self._ids[row]) or {"filename": filename, "time_code": None, "position_ms": 0,
+                                             "timestamp": 0, "play_count": 1}
+
+    def _page(self, number):
+        """Сторінка записів з бази; в пам'яті тримається лише кілька останніх сторінок."""
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+        ids = [entry_id for entry_id in self._ids[number * PAGE_SIZE:(number + 1) * PAGE_SIZE] if entry_id]
+        page = self.library.history_range(ids[0], ids[-1]) if ids else {}
+        self._pages[number] = page
+        if len(self._pages) > CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+    def iter_entries(self):
+        """Ітерує всю історію посторінково."""
+        for row in range(len(self._filenames)):
+            yield self.entry_at(row)
 
     def add_to_history(self, filename, time_code):
-        """Додає файл до історії."""
-        self.history.append({"filename": filename, "time_code": time_code})
-        self.save_data(self.history_filename, self.history)
+        """
+        Додає файл до історії (повторне відкриття оновлює існуючий запис)
+        Returns:
+            int: Позиція запису в історії
+        """
+        entry = self.get_entry(filename)
+        if entry is None:
+            entry = {"filename": filename, "time_code": time_code, "position_ms": 0,
+                     "timestamp": time.time(), "play_count": 1}
+            self._index[filename] = len(self._filenames)
+            self._filenames.append(filename)
+            self._ids.append(0)  # id з'явиться лише після запису в базу; запис береться з _changed
+        else:
+            entry = dict(entry, time_code=time_code, timestamp=time.time(), play_count=entry["play_count"] + 1)
+        self._changed[filename] = entry
+        self.library.record_history([dict(entry)])
+        return self._index[filename]
+
+    def update_position(self, filename, position_ms, time_code):
+        """
+        Запам'ятовує позицію відтворення файлу для продовження перегляду
+        Args:
+            filename: Файл з історії
+            position_ms: Позиція в мс
+            time_code: Та сама позиція у вигляді тексту для бокової панелі
+        Returns:
+            int: Позиція запису в історії або None, якщо файлу немає в історії
+        """
+        row = self._index.get(filename)
+        if row is None:
+            return None
+        entry = self.entry_at(row)
+        if entry["position_ms"] != position_ms:
+            self._changed[filename] = dict(entry, position_ms=position_ms, time_code=time_code)
+            self.library.record_position(filename, position_ms, time_code)
+        return row
+
+    def is_favorite(self, filename):
+        """Перевіряє за O(1), чи є файл в улюблених."""
+        return filename in self.favorites
 
     def add_to_favorites(self, filename):
         """Додає файл в улюблені."""
         if filename not in self.favorites:
-            self.favorites.append(filename)
-            self.save_data(self.favorites_filename, self.favorites)
+            self.favorites[filename] = None
+            self.library.add_favorites([filename])
 
     def remove_from_favorites(self, filename):
         """Видаляє файл з улюблених."""
         if filename in self.favorites:
-            self.favorites.remove(filename)
-            self.save_data(self.favorites_filename, self.favorites)
\ No newline at end of file
+            del self.favorites[filename]
+            self.library.remove_favorites([filename])
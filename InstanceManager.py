@@ -0,0 +1,109 @@
+import logging
+import threading
+
+# Параметри libVLC за замовчуванням (ключі - імена в Settings, значення - як у командному рядку VLC)
+DEFAULT_OPTIONS = {
+    "file_caching": 300,         # Буфер локальних файлів, мс
+    "network_caching": 1000,     # Буфер мережевих джерел (SMB, HTTP), мс
+    "avcodec_threads": 0,        # Потоки декодера (0 - автоматично)
+    "avcodec_hw": "any",         # Апаратне декодування: any, none, vaapi, dxva2, vdpau ...
+    "avcodec_skip_frame": 0,     # Пропуск кадрів декодером: 0 - жодних ... 4 - усі
+}
+
+# Параметри, які завжди передаються libVLC
+BASE_ARGUMENTS = ("--no-xlib",)
+# Режим без дисплея і звукової карти: кадри й звук декодуються і відкидаються
+# (video callbacks окремих програвачів, як у ThumbnailExtractor, працюють і далі)
+HEADLESS_ARGUMENTS = ("--vout=dummy", "--aout=dummy", "--no-video-title-show", "--no-snapshot-preview")
+
+
+def build_arguments(options, headless=False):
+    """
+    Перетворює параметри на аргументи vlc.Instance
+    Args:
+        options: dict з ключами DEFAULT_OPTIONS (відсутні беруться за замовчуванням)
+        headless: Додати HEADLESS_ARGUMENTS
+    Returns:
+        list: Наприклад ['--no-xlib', '--file-caching=300', ...]
+    """
+    arguments = list(BASE_ARGUMENTS)
+    if headless:
+        arguments.extend(HEADLESS_ARGUMENTS)
+    for key, default in DEFAULT_OPTIONS.items():
+        value = options.get(key, default)
+        arguments.append(f"--{key.replace('_', '-')}={value}")
+    return arguments
+
+
+class InstanceManager:
+    """
+    Спільний на весь процес екземпляр libVLC з лічильником посилань.
+    Програвачі, генератор мініатюр і аналізатор файлів працюють на одному Instance,
+    тож плагіни завантажуються один раз, а параметри кешування задаються в одному місці.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, options=None, headless=False):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update(options or {})
+        self.headless = headless
+        self._instance = None
+        self._references = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """Повертає менеджер процесу (створюється при першому зверненні)."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def configure(self, options):
+        """
+        Задає параметри libVLC (наприклад, з Settings.load_vlc_options)
+        Якщо екземпляр вже створено, нові параметри діють після звільнення всіх посилань.
+        """
+        with self._lock:
+            self.options = dict(DEFAULT_OPTIONS)
+            self.options.update(options)
+            if self._instance is not None:
+                logging.info("libVLC options changed; they apply once the current instance is released")
+
+    def set_headless(self, headless):
+        """Вмикає вивід без дисплея (--vout=dummy, --aout=dummy); діє для екземпляра, створеного після цього."""
+        with self._lock:
+            self.headless = headless
+            if self._instance is not None:
+                logging.info("Headless mode changed; it applies once the current instance is released")
+
+    def arguments(self):
+        with self._lock:
+            return build_arguments(self.options, self.headless)
+
+    def acquire(self):
+        """
+        Повертає спільний vlc.Instance, створюючи його при першому запиті
+        Кожен acquire() має бути врівноважений release().
+        """
+        with self._lock:
+            if self._instance is None:
+                import vlc  # python-vlc завантажує libVLC лише тоді, коли він справді потрібен
+                arguments = build_arguments(self.options, self.headless)
+                self._instance = vlc.Instance(*arguments)
+                if self._instance is None:
+                    raise RuntimeError(f"libVLC rejected options: {' '.join(arguments)}")
+                logging.info(f"libVLC instance created: {' '.join(arguments)}")
+            self._references += 1
+            return self._instance
+
+    def release(self):
+        """Звільняє посилання; екземпляр знищується, коли користувачів не лишилось."""
+        with self._lock:
+            if self._references == 0:
+                return
+            self._references -= 1
+            if self._references == 0 and self._instance is not None:
+                self._instance.release()
+                self._instance = None
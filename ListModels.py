@@ -0,0 +1,147 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+
+class HistoryListModel(QAbstractListModel):
+    """
+    Модель історії поверх HistoryManager (записи читаються з бази сторінками).
+    Рядки віддаються представленню порціями через fetchMore, тож QListView
+    не створює нічого для записів, які ще не прокручені.
+    """
+    BATCH_SIZE = 500
+
+    def __init__(self, history_manager, parent=None):
+        super().__init__(parent)
+        self.history_manager = history_manager
+        self._loaded = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self.history_manager)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.BATCH_SIZE, len(self.history_manager) - self._loaded)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        entry = self.history_manager.entry_at(index.row())
+        if role == Qt.DisplayRole:
+            return f"{entry['filename']} - {entry['time_code']}"
+        if role in (Qt.ToolTipRole, Qt.UserRole):
+            return entry["filename"]
+        return None
+
+    def row_updated(self, row):
+        """
+        Повідомляє представлення про доданий або змінений запис історії
+        Args:
+            row: Позиція запису в історії HistoryManager
+        """
+        if row < self._loaded:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+        elif row == self._loaded:
+            # Всі попередні рядки вже показані - додаємо один рядок без повного оновлення
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._loaded += 1
+            self.endInsertRows()
+
+
+class FavoritesListModel(QAbstractListModel):
+    """Модель улюблених: власний список рядків, що змінюється інкрементально."""
+
+    def __init__(self, favorites, parent=None):
+        super().__init__(parent)
+        self._rows = list(favorites)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole, Qt.UserRole):
+            return self._rows[index.row()]
+        return None
+
+    def filename(self, row):
+        return self._rows[row]
+
+    def append(self, filename):
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append(filename)
+        self.endInsertRows()
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+
+
+class LibraryListModel(QAbstractListModel):
+    """
+    Результати пошуку в індексі медіатеки.
+    Сторінки запитуються з MediaLibrary.search_media лише під час прокрутки.
+    """
+    PAGE_SIZE = 200
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self._rows = []
+        self._text = ""
+        self._order_by = "name"
+        self._exhausted = False
+
+    def set_query(self, text, order_by="name"):
+        """Задає рядок пошуку і поле сортування; результати підвантажуються з першої сторінки."""
+        self.beginResetModel()
+        self._text = text
+        self._order_by = order_by
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+
+    def refresh(self):
+        self.set_query(self._text, self._order_by)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        page = self.library.search_media(self._text, self._order_by, limit=self.PAGE_SIZE, offset=len(self._rows))
+        self._exhausted = len(page) < self.PAGE_SIZE
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        path, name, size, mtime, duration, codec = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.ToolTipRole:
+            details = [path, f"{size / (1024 * 1024):.1f} MB"]
+            if duration:
+                details.append(f"{duration // 60000}:{duration // 1000 % 60:02d}")
+            if codec:
+                details.append(codec)
+            return "\n".join(details)
+        if role == Qt.UserRole:
+            return path
+        return None
@@ -1,22 +1,160 @@
 import sys
 import os
+import time
+import inspect
 import vlc
 import logging
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from MediaPool import MediaPool
+from InstanceManager import InstanceManager
+from NetworkStream import is_stream_url
+from FrameRing import FrameRing, DEFAULT_SLOTS
+
+# Скільки елементів може накопичитись у списку безшовного відтворення до його перезапуску
+MAX_QUEUE_LENGTH = 256
+
+# Лічильники libVLC_media_stats_t, що повертає get_stats()
+STAT_FIELDS = ("read_bytes", "input_bitrate", "demux_read_bytes", "demux_bitrate", "demux_corrupted",
+               "demux_discontinuity", "decoded_video", "decoded_audio", "displayed_pictures",
+               "lost_pictures", "played_abuffers", "lost_abuffers")
+
+
+def create_instance():
+    """
+    Бере посилання на спільний екземпляр libVLC (при першому виклику - найповільніший крок
+    запуску, завантаження плагінів), тому його можна викликати у фоновому потоці
+    """
+    return InstanceManager.shared().acquire()
+
+
+def describe_media(media):
+    """
+    Відомості про розібране медіа (після MediaParsedChanged зі статусом done)
+    Returns:
+        dict: duration (мс), codec, audio_codec, resolution (ширина, висота), bitrate, tracks
+    """
+    info = {"duration": media.get_duration(), "codec": None, "audio_codec": None,
+            "resolution": None, "bitrate": 0, "tracks": []}
+    for track in media.tracks_get() or ():
+        codec = vlc.libvlc_media_get_codec_description(track.type, track.codec)
+        codec = codec.decode("utf-8", "replace") if codec else None
+        info["tracks"].append({"id": track.id, "type": track.type._enum_names_.get(track.type, "unknown"), "codec": codec,
+                               "bitrate": track.bitrate})
+        info["bitrate"] += track.bitrate
+        if track.type == vlc.TrackType.video and info["codec"] is None:
+            info["codec"] = codec
+            info["resolution"] = (track.video.contents.width, track.video.contents.height)
+        elif track.type == vlc.TrackType.audio and info["audio_codec"] is None:
+            info["audio_codec"] = codec
+    return info
+
+
+class MediaSignals(QObject):
+    """
+    Qt-сигнали подій VLC.
+    Події надходять з потоку libVLC; сигнали доставляються отримувачам
+    у їхньому потоці (queued connection), тож слоти інтерфейсу безпечні.
+    """
+    time_changed = pyqtSignal(int)
+    length_changed = pyqtSignal(int)
+    playing = pyqtSignal()
+    paused = pyqtSignal()
+    end_reached = pyqtSignal()
+    media_parsed = pyqtSignal()
+    media_info_ready = pyqtSignal(dict)
+    next_item_set = pyqtSignal()
+    seek_requested = pyqtSignal(int)
+    media_changed = pyqtSignal(str)
+    media_set = pyqtSignal(str)  # set_media відкрив нове медіа (не перехід черги)
+    queue_finished = pyqtSignal()
+    buffering = pyqtSignal(float)
+    error = pyqtSignal()
+    stopped = pyqtSignal()
+
+
+class SeekScheduler:
+    """
+    Згортає серію запитів перемотування до останньої цілі:
+    під час перетягування повзунка - не частіше за interval мс (швидкий пошук по ключових кадрах),
+    повторні натискання стрілок накопичуються і виконуються одним точним переходом.
+    """
+
+    def __init__(self, controller, interval=100, settle_delay=250):
+        """
+        Args:
+            controller: MediaController, що виконує перехід
+            interval: Мінімальний проміжок між швидкими переходами під час перетягування, мс
+            settle_delay: Пауза після останнього натискання клавіші перед точним переходом, мс
+        """
+        self.controller = controller
+        self.interval = interval
+        self.settle_delay = settle_delay
+        self.target = None
+        self._fast = False
+        self._last_applied = 0.0
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.apply)
+
+    def request(self, target, fast):
+        """
+        Запам'ятовує нову ціль (мс); попередня невиконана ціль відкидається
+        Args:
+            target: Час у мс
+            fast: True - швидкий перехід з обмеженням частоти (перетягування),
+                  False - точний перехід після паузи в натисканнях
+        """
+        self.target = target
+        self._fast = fast
+        if fast:
+            if not self._timer.isActive():
+                elapsed = (time.monotonic() - self._last_applied) * 1000
+                self._timer.start(int(max(0, self.interval - elapsed)))
+        else:
+            self._timer.start(self.settle_delay)
+
+    def finish(self, target):
+        """Одразу виконує точний перехід до остаточної цілі (відпускання повзунка)."""
+        self._timer.stop()
+        self.target = target
+        self._fast = False
+        self.apply()
+
+    def apply(self):
+        if self.target is None:
+            return
+        target, self.target = self.target, None
+        self._last_applied = time.monotonic()
+        self.controller.set_time(target, fast=self._fast)
+
 
 class MediaController:
-    def __init__(self, video_frame):
+    def __init__(self, video_frame, instance=None, media_options=(), stream_profiles=None):
         """
         Ініціалізація медіа контролера
         Args:
-            video_frame: QFrame для відображення відео
+            video_frame: QFrame для відображення відео; None - без вікна (екземпляр має бути headless,
+                         див. InstanceManager.set_headless, інакше libVLC відкриє власне вікно)
+            instance: Посилання на спільний vlc.Instance з create_instance() (контролер звільняє його в cleanup)
+            media_options: Параметри декодування для медіа цього програвача (див. set_media_options)
+            stream_profiles: Параметри мережевих потоків за схемою URL (None - NetworkStream.STREAM_PROFILES)
         """
         try:
-            self.instance = vlc.Instance('--no-xlib')  # Покращена ініціалізація VLC
+            self.instance = instance if instance is not None else create_instance()
             self.player = self.instance.media_player_new()
             self.event_manager = self.player.event_manager()
+            # Список відтворення всередині libVLC: перехід на наступний елемент без участі інтерфейсу
+            self.list_player = self.instance.media_list_player_new()
+            self.list_player.set_media_player(self.player)
+            self.media_list = None
+            self._queue_paths = []
+            self._queue_position = -1
+            self._queue_started = False
             
             # Налаштування відображення відео в залежності від операційної системи
-            if sys.platform.startswith('linux'):
+            if video_frame is None:
+                pass
+            elif sys.platform.startswith('linux'):
                 self.player.set_xwindow(video_frame.winId())
             elif sys.platform == "win32":
                 self.player.set_hwnd(video_frame.winId())
@@ -26,22 +164,75 @@ class MediaController:
             # Початкові налаштування
             self.player.audio_set_volume(50)
             self._current_media = None
+            self._current_path = None
+            self._media_info = {}
+            self._last_time = 0
+            self._start_time = 0
+            self.frame_ring = None
+            # Прапорець швидкого переходу є лише в прив'язках libVLC 4 (set_time(i_time, b_fast))
+            self._fast_seek_supported = len(inspect.signature(self.player.set_time).parameters) > 1
             self.video_frame = video_frame
+
+            # Події програвача пересилаються в інтерфейс замість опитування таймером
+            self.signals = MediaSignals()
+            self.add_event_listener(vlc.EventType.MediaPlayerTimeChanged,
+                                    lambda event: self.signals.time_changed.emit(event.u.new_time))
+            self.add_event_listener(vlc.EventType.MediaPlayerLengthChanged,
+                                    lambda event: self.signals.length_changed.emit(event.u.new_length))
+            self.add_event_listener(vlc.EventType.MediaPlayerPlaying, lambda event: self.signals.playing.emit())
+            self.add_event_listener(vlc.EventType.MediaPlayerPaused, lambda event: self.signals.paused.emit())
+            self.add_event_listener(vlc.EventType.MediaPlayerEndReached, lambda event: self.signals.end_reached.emit())
+            self.add_event_listener(vlc.EventType.MediaPlayerBuffering,
+                                    lambda event: self.signals.buffering.emit(event.u.new_cache))
+            self.add_event_listener(vlc.EventType.MediaPlayerEncounteredError, lambda event: self.signals.error.emit())
+            self.signals.media_parsed.connect(self._read_media_info)
+            self.signals.length_changed.connect(self._cache_length)
+            self.signals.time_changed.connect(self._cache_time)
+            self.signals.playing.connect(self._apply_start_time)
+            self.seek_scheduler = SeekScheduler(self)
+            # Розбір наперед завантажених файлів не повинен перезаписувати кеш поточного
+            self.media_pool = MediaPool(self.instance, on_parsed=lambda media: media is self._current_media
+                                        and self.signals.media_parsed.emit(), options=media_options,
+                                        stream_profiles=stream_profiles)
+            list_events = self.list_player.event_manager()
+            list_events.event_attach(vlc.EventType.MediaListPlayerNextItemSet,
+                                     lambda event: self.signals.next_item_set.emit())
+            list_events.event_attach(vlc.EventType.MediaListPlayerPlayed,
+                                     lambda event: self.signals.queue_finished.emit())
+            self.signals.next_item_set.connect(self._advance_queue)
             
         except Exception as e:
             logging.error(f"Error initializing MediaController: {str(e)}")
             raise
 
-    def set_media(self, media_path):
+    def set_media(self, media_path, start_time=0):
         """
-        Встановлення медіа файлу для відтворення
+        Встановлення медіа файлу або мережевого потоку для відтворення
         Args:
-            media_path: Шлях до медіа файлу
+            media_path: Шлях до медіа файлу або URL (http, rtsp, udp ...)
+            start_time: Позиція в мс, з якої продовжити перегляд (один перехід після старту)
         """
         try:
-            if os.path.exists(media_path):
-                self._current_media = self.instance.media_new(media_path)
-                self.player.set_media(self._current_media)
+            if is_stream_url(media_path) or os.path.exists(media_path):
+                self._media_info = {}
+                self._start_time = start_time
+                self._last_time = 0
+                # Попередньо завантажене медіа береться з пулу вже розібраним
+                self._current_media = self.media_pool.preload(media_path)
+                self._current_path = media_path
+                if self.media_pool.is_parsed(self._current_media):
+                    self._read_media_info()
+                previous_list = self.media_list
+                self.media_list = self.instance.media_list_new()
+                self.media_list.add_media(self._current_media)
+                self.list_player.set_media_list(self.media_list)
+                # Старий список тримає посилання на всі свої медіа - без release вони не звільняються
+                if previous_list is not None:
+                    previous_list.release()
+                self._queue_paths = [media_path]
+                self._queue_position = -1
+                self._queue_started = False
+                self.signals.media_set.emit(media_path)
                 return True
             else:
                 logging.error(f"Media file not found: {media_path}")
@@ -53,7 +244,12 @@ class MediaController:
     def play(self):
         """Відтворення медіа"""
         try:
-            return self.player.play()
+            if not self._queue_started and self._queue_paths:
+                # Перший запуск нового списку; далі play() продовжує поточний елемент
+                self._queue_started = True
+                return self.list_player.play_item_at_index(0)
+            self.list_player.play()
+            return 0
         except Exception as e:
             logging.error(f"Error playing media: {str(e)}")
             return -1
@@ -65,10 +261,18 @@ class MediaController:
         except Exception as e:
             logging.error(f"Error pausing media: {str(e)}")
 
+    def set_paused(self, paused):
+        """Ставить на паузу або знімає з неї (на відміну від pause() - не перемикає)."""
+        try:
+            self.player.set_pause(1 if paused else 0)
+        except Exception as e:
+            logging.error(f"Error pausing media: {str(e)}")
+
     def stop(self):
         """Зупинка відтворення"""
         try:
-            self.player.stop()
+            self.list_player.stop()
+            self.signals.stopped.emit()
         except Exception as e:
             logging.error(f"Error stopping media: {str(e)}")
 
@@ -84,6 +288,53 @@ class MediaController:
         except Exception as e:
             logging.error(f"Error setting position: {str(e)}")
 
+    def set_time(self, time_ms, fast=False):
+        """
+        Перехід до часу відтворення
+        Args:
+            time_ms: Час у мс
+            fast: Перехід до найближчого ключового кадру (якщо підтримується libVLC)
+        """
+        try:
+            if fast and self._fast_seek_supported:
+                self.player.set_time(int(time_ms), True)
+            else:
+                self.player.set_time(int(time_ms))
+            self._last_time = int(time_ms)
+        except Exception as e:
+            logging.error(f"Error setting time: {str(e)}")
+
+    def seek_to_position(self, position, dragging=True):
+        """
+        Запит перемотування на частку тривалості через SeekScheduler
+        Args:
+            position: Позиція від 0 до 1
+            dragging: True під час перетягування, False для остаточної позиції
+        """
+        length = self.get_length()
+        if not 0 <= position <= 1 or length <= 0:
+            return
+        target = int(position * length)
+        self.signals.seek_requested.emit(target)
+        if dragging:
+            self.seek_scheduler.request(target, fast=True)
+        else:
+            self.seek_scheduler.finish(target)
+
+    def seek_relative(self, delta_ms):
+        """
+        Перемотування відносно поточної позиції; повторні виклики накопичуються в один перехід
+        Args:
+            delta_ms: Зсув у мс (від'ємний - назад)
+        """
+        base = self.seek_scheduler.target if self.seek_scheduler.target is not None else self._last_time
+        target = max(0, base + delta_ms)
+        length = self.get_length()
+        if length > 0:
+            target = min(target, length)
+        self.signals.seek_requested.emit(target)
+        self.seek_scheduler.request(target, fast=False)
+
     def get_position(self):
         """
         Отримання поточної позиції відтворення
@@ -108,6 +359,22 @@ class MediaController:
         except Exception as e:
             logging.error(f"Error setting volume: {str(e)}")
 
+    def set_mute(self, muted):
+        try:
+            self.player.audio_set_mute(muted)
+        except Exception as e:
+            logging.error(f"Error setting mute: {str(e)}")
+
+    def set_media_options(self, options):
+        """
+        Змінює параметри декодування (наприклад, ':avcodec-skiploopfilter=4') для наступних set_media
+        Медіа з пулу створені зі старими параметрами, тому пул очищується.
+        """
+        options = tuple(options)
+        if options != self.media_pool.options:
+            self.media_pool.clear()
+            self.media_pool.options = options
+
     def get_volume(self):
         """
         Отримання поточної гучності
@@ -150,6 +417,19 @@ class MediaController:
         except Exception as e:
             logging.error(f"Error toggling fullscreen: {str(e)}")
 
+    def get_state(self):
+        """
+        Стан програвача libVLC
+        Returns:
+            str: nothingspecial, opening, buffering, playing, paused, stopped, ended або error
+        """
+        try:
+            state = self.player.get_state()
+            return vlc.State._enum_names_.get(state, "nothingspecial").lower()
+        except Exception as e:
+            logging.error(f"Error getting state: {str(e)}")
+            return "error"
+
     def is_playing(self):
         """
         Перевірка чи відтворюється медіа
@@ -180,12 +460,141 @@ class MediaController:
         Returns:
             int: Тривалість в мс
         """
+        duration = self._media_info.get("duration", 0)
+        if duration > 0:
+            return duration
         try:
-            return self.player.get_length()
+            duration = self.player.get_length()
+            if duration > 0:
+                self._media_info["duration"] = duration
+            return duration
         except Exception as e:
             logging.error(f"Error getting length: {str(e)}")
             return 0
 
+    def get_media_info(self):
+        """
+        Отримання кешованих відомостей про поточне медіа
+        Returns:
+            dict: duration (мс), codec, audio_codec, resolution (ширина, висота), bitrate, tracks;
+                  порожній словник, поки медіа не розібране
+        """
+        return dict(self._media_info)
+
+    def get_stats(self):
+        """
+        Лічильники продуктивності поточного медіа з libVLC
+        Returns:
+            dict: Значення STAT_FIELDS (кадри, бітрейти, втрачені кадри і аудіобуфери) або {}
+        """
+        try:
+            media = self.player.get_media()
+            stats = vlc.MediaStats()
+            if media is None or not media.get_stats(stats):
+                return {}
+            return {field: getattr(stats, field, 0) for field in STAT_FIELDS}
+        except Exception as e:
+            logging.error(f"Error getting media stats: {str(e)}")
+            return {}
+
+    def capture_frames(self, width, height, slots=DEFAULT_SLOTS, shared=False, name=None, on_frame=None):
+        """
+        Декодування кадрів у кільце попередньо виділених буферів FrameRing замість вікна
+        (для аналізу кадрів у Python без виділення пам'яті і копіювання на кожен кадр)
+        Викликати до play(): вивід перемикається з наступного запуску відтворення
+        Args:
+            width: Ширина кадру
+            height: Висота кадру
+            slots: Кількість буферів у кільці
+            shared: Розмістити кільце в спільній пам'яті для іншого процесу (FrameReader)
+            name: Ім'я блоку спільної пам'яті (None - згенерувати)
+            on_frame: Функція (номер кадру, слот) у потоці декодера libVLC
+        Returns:
+            FrameRing: Кільце кадрів або None у разі помилки
+        """
+        try:
+            if self.frame_ring is not None:
+                raise RuntimeError("Frame capture is already enabled")
+            self.frame_ring = FrameRing(width, height, slots, shared=shared, name=name, on_frame=on_frame)
+            self.frame_ring.attach(self.player)
+            return self.frame_ring
+        except Exception as e:
+            logging.error(f"Error enabling frame capture: {str(e)}")
+            return None
+
+    def set_overlay_text(self, text):
+        """Показує текст поверх відео фільтром marquee libVLC (None - прибрати)."""
+        try:
+            if text is None:
+                self.player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 0)
+                return
+            self.player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 1)
+            self.player.video_set_marquee_int(vlc.VideoMarqueeOption.Size, 14)
+            self.player.video_set_marquee_int(vlc.VideoMarqueeOption.Position, 5)  # Зверху зліва
+            self.player.video_set_marquee_string(vlc.VideoMarqueeOption.Text, text)
+        except Exception as e:
+            logging.error(f"Error setting overlay text: {str(e)}")
+
+    def get_current_path(self):
+        """Шлях або URL поточного медіа."""
+        return self._current_path
+
+    def is_stream(self):
+        """Чи є поточне медіа мережевим потоком."""
+        return self._current_path is not None and is_stream_url(self._current_path)
+
+    def reconnect(self):
+        """
+        Перевідкриває поточний потік новим vlc.Media (після помилки чи обриву з'єднання)
+        Потік з відомою тривалістю продовжується з останньої позиції, живий - з поточного моменту.
+        Returns:
+            bool: True якщо відтворення перезапущено
+        """
+        media_path = self._current_path
+        if media_path is None:
+            return False
+        start_time = self._last_time if self._media_info.get("duration", 0) > 0 else 0
+        # Медіа після помилки не відтворюється повторно - створюється нове
+        self.media_pool.discard(media_path)
+        if not self.set_media(media_path, start_time=start_time):
+            return False
+        return self.play() == 0
+
+    def get_last_time(self):
+        """Останній відомий час відтворення в мс (з подій, без звернення до libVLC)."""
+        return self._last_time
+
+    def _apply_start_time(self):
+        """Один точний перехід до збереженої позиції після першого Playing."""
+        start_time, self._start_time = self._start_time, 0
+        length = self.get_length()
+        # Майже переглянутий файл починається спочатку; живий потік (без тривалості) - з поточного моменту
+        if start_time > 0 and ((length <= 0 and not self.is_stream()) or 0 < length and start_time < length - 5000):
+            self.set_time(start_time)
+
+    def _cache_time(self, time_ms):
+        """Кешує час з події TimeChanged, щоб відносне перемотування не опитувало libVLC."""
+        self._last_time = time_ms
+
+    def _cache_length(self, length):
+        """Кешує тривалість з події LengthChanged."""
+        if length > 0:
+            self._media_info["duration"] = length
+
+    def _read_media_info(self):
+        """Заповнює кеш відомостей про медіа після MediaParsedChanged (у потоці інтерфейсу)."""
+        media = self._current_media
+        try:
+            if media is None or media.get_parsed_status() != vlc.MediaParsedStatus.done:
+                return
+            info = dict(describe_media(media), path=self._current_path)
+            if info["duration"] <= 0:
+                info["duration"] = self._media_info.get("duration", 0)
+            self._media_info = info
+            self.signals.media_info_ready.emit(dict(info))
+        except Exception as e:
+            logging.error(f"Error reading media info: {str(e)}")
+
     def add_event_listener(self, event_type, callback):
         """
         Додавання обробника подій
@@ -210,11 +619,89 @@ class MediaController:
         except Exception as e:
             logging.error(f"Error removing event listener: {str(e)}")
 
+    def preload(self, media_path):
+        """
+        Розбирає медіа заздалегідь, щоб при переході на нього не було затримки
+        Args:
+            media_path: Шлях до медіа файлу або URL
+        """
+        if is_stream_url(media_path) or os.path.exists(media_path):
+            self.media_pool.preload(media_path)
+
+    def queue_next(self, media_path):
+        """
+        Додає файл у список libVLC, щоб він почався одразу після поточного без паузи
+        Args:
+            media_path: Шлях до медіа файлу
+        Returns:
+            bool: True якщо файл поставлено в чергу
+        """
+        try:
+            if self.media_list is None or len(self._queue_paths) >= MAX_QUEUE_LENGTH:
+                return False
+            if not is_stream_url(media_path) and not os.path.exists(media_path):
+                return False
+            # Подія про старт першого елемента може ще не дійти - він все одно поточний
+            next_position = max(self._queue_position, 0) + 1
+            if next_position < len(self._queue_paths):
+                return self._queue_paths[next_position] == media_path
+            media = self.media_pool.preload(media_path)
+            self.media_list.lock()
+            try:
+                self.media_list.add_media(media)
+            finally:
+                self.media_list.unlock()
+            self._queue_paths.append(media_path)
+            return True
+        except Exception as e:
+            logging.error(f"Error queueing media: {str(e)}")
+            return False
+
+    def has_queued(self):
+        """Чи стоїть у списку libVLC елемент після поточного."""
+        return len(self._queue_paths) > max(self._queue_position, 0) + 1
+
+    def clear_queued(self):
+        """Прибирає зі списку libVLC елементи, поставлені після поточного (змінився порядок черги)."""
+        try:
+            keep = max(self._queue_position, 0) + 1
+            if self.media_list is None or len(self._queue_paths) <= keep:
+                return
+            self.media_list.lock()
+            try:
+                for index in range(len(self._queue_paths) - 1, keep - 1, -1):
+                    self.media_list.remove_index(index)
+            finally:
+                self.media_list.unlock()
+            del self._queue_paths[keep:]
+        except Exception as e:
+            logging.error(f"Error clearing queued media: {str(e)}")
+
+    def _advance_queue(self):
+        """libVLC перейшов на наступний елемент списку: оновлюємо поточне медіа та кеш."""
+        self._queue_position += 1
+        if self._queue_position == 0 or self._queue_position >= len(self._queue_paths):
+            return
+        media_path = self._queue_paths[self._queue_position]
+        self._media_info = {}
+        self._current_media = self.media_pool.get(media_path)
+        self._current_path = media_path
+        if self.media_pool.is_parsed(self._current_media):
+            self._read_media_info()
+        self.signals.media_changed.emit(media_path)
+
     def cleanup(self):
         """Очищення ресурсів"""
         try:
-            self.player.stop()
+            self.list_player.stop()
+            self.list_player.release()
+            if self.media_list is not None:
+                self.media_list.release()
+            self.media_pool.clear()
             self.player.release()
-            self.instance.release()
+            # Кільце звільняється після програвача, щоб libVLC вже не писав у буфери
+            if self.frame_ring is not None:
+                self.frame_ring.close()
+            InstanceManager.shared().release()
         except Exception as e:
             logging.error(f"Error during cleanup: {str(e)}")
\ No newline at end of file
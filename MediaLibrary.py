@@ -0,0 +1,469 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from PersistenceWorker import PersistenceWorker
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL UNIQUE,
+    time_code TEXT,
+    position_ms INTEGER NOT NULL DEFAULT 0,
+    timestamp REAL NOT NULL,
+    play_count INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS playlists (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS playlist_items (
+    playlist_id INTEGER NOT NULL REFERENCES playlists (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    PRIMARY KEY (playlist_id, position)
+);
+CREATE TABLE IF NOT EXISTS media_roots (
+    path TEXT PRIMARY KEY,
+    scanned REAL
+);
+CREATE TABLE IF NOT EXISTS media_dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS media_dirs_parent ON media_dirs (parent);
+CREATE TABLE IF NOT EXISTS media_files (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    duration INTEGER,
+    codec TEXT
+);
+CREATE INDEX IF NOT EXISTS media_files_directory ON media_files (directory);
+CREATE INDEX IF NOT EXISTS media_files_name ON media_files (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS media_files_size ON media_files (size);
+CREATE INDEX IF NOT EXISTS media_files_mtime ON media_files (mtime);
+CREATE INDEX IF NOT EXISTS media_files_duration ON media_files (duration);
+"""
+
+PLAYLIST_ID = "(SELECT id FROM playlists WHERE name = ?)"
+HISTORY_COLUMNS = ("id", "filename", "time_code", "position_ms", "timestamp", "play_count")
+MEDIA_COLUMNS = ("path", "name", "size", "mtime", "duration", "codec")
+# Допустимі поля сортування для search_media
+MEDIA_ORDER = {"name": "name COLLATE NOCASE", "size": "size", "mtime": "mtime", "duration": "duration"}
+
+
+class MediaLibrary:
+    def __init__(self, filename="library.db", history_filename="history.json",
+                 favorites_filename="favorites.json", playlist_filename="playlist.json",
+                 save_delay=0.5):
+        """
+        Єдине SQLite-сховище історії, улюблених та списків відтворення.
+        Записи не виконуються одразу: вони накопичуються і фоновий PersistenceWorker
+        записує їх однією транзакцією, тож потік інтерфейсу не чекає на диск.
+        Args:
+            filename: Файл бази даних
+            history_filename: Старий history.json для одноразової міграції
+            favorites_filename: Старий favorites.json для одноразової міграції
+            playlist_filename: Старий playlist.json для одноразової міграції
+            save_delay: Затримка в секундах, за яку серія змін збирається в один запис
+        """
+        self.filename = filename
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        try:
+            connection = self.connection
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript(SCHEMA)
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               ("schema_version", str(SCHEMA_VERSION)))
+            connection.commit()
+            self.worker = PersistenceWorker(self._flush_pending, save_delay, name="MediaLibraryWriter")
+            self.migrate_from_json(history_filename, favorites_filename, playlist_filename)
+        except Exception as e:
+            logging.error(f"Error opening media library {filename}: {str(e)}")
+            raise
+
+    @property
+    def connection(self):
+        """З'єднання з базою для поточного потоку (SQLite-з'єднання не можна ділити між потоками)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.filename, check_same_thread=False)
+            connection.execute("PRAGMA foreign_keys = ON")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """
+        Групує кілька записів в одну транзакцію.
+        Вкладені виклики приєднуються до зовнішньої; при винятку вся група відкидається.
+        """
+        batch = getattr(self._local, "batch", None)
+        if batch is not None:
+            yield
+            return
+        self._local.batch = []
+        try:
+            yield
+            batch = self._local.batch
+        finally:
+            self._local.batch = None
+        self._enqueue(batch)
+
+    def _enqueue(self, operations):
+        with self._pending_lock:
+            self._pending.append(operations)
+        self.worker.mark_dirty()
+
+    def _write(self, sql, params=()):
+        """Ставить один запис у чергу (в поточну транзакцію, якщо вона є)."""
+        self._write_many(sql, [params])
+
+    def _write_many(self, sql, rows):
+        """Ставить пакет однотипних записів у чергу фонового збереження."""
+        operation = (sql, list(rows))
+        batch = getattr(self._local, "batch", None)
+        if batch is not None:
+            batch.append(operation)
+        else:
+            self._enqueue([operation])
+
+    def _flush_pending(self):
+        """Виконується у фоновому потоці: записує всі накопичені групи однією транзакцією."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        connection = self.connection
+        try:
+            with connection:
+                for operations in pending:
+                    for sql, rows in operations:
+                        connection.executemany(sql, rows)
+        except Exception as e:
+            logging.error(f"Error writing media library: {str(e)}")
+
+    def flush(self, timeout=None):
+        """Синхронно записує всі накопичені зміни (наприклад, перед закриттям програми)."""
+        return self.worker.flush(timeout)
+
+    def get_meta(self, key, default=None):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self._write("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # Історія
+
+    def history_page(self, after_id=0, limit=1000):
+        """
+        Повертає сторінку історії в порядку додавання
+        Args:
+            after_id: id останнього запису попередньої сторінки
+            limit: Розмір сторінки
+        Returns:
+            list: Словники з полями HISTORY_COLUMNS
+        """
+        rows = self.connection.execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM history WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit))
+        return [dict(zip(HISTORY_COLUMNS, row)) for row in rows]
+
+    def iter_history(self, page_size=1000):
+        """Ітерує всю історію посторінково, не завантажуючи її одним запитом."""
+        after_id = 0
+        while True:
+            page = self.history_page(after_id, page_size)
+            if not page:
+                return
+            yield from page
+            after_id = page[-1]["id"]
+
+    def history_filenames_page(self, after_id=0, limit=1000):
+        """
+        Сторінка лише ідентифікаторів і імен файлів історії (для індексу в пам'яті)
+        Returns:
+            list: Пари (id, filename) в порядку додавання
+        """
+        return self.connection.execute(
+            "SELECT id, filename FROM history WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)).fetchall()
+
+    def history_range(self, first_id, last_id):
+        """
+        Записи історії з id у межах [first_id, last_id] (одна сторінка списку історії)
+        Returns:
+            dict: id -> словник з полями HISTORY_COLUMNS
+        """
+        rows = self.connection.execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM history WHERE id BETWEEN ? AND ? ORDER BY id",
+            (first_id, last_id))
+        return {row[0]: dict(zip(HISTORY_COLUMNS, row)) for row in rows}
+
+    def record_history(self, entries):
+        """
+        Додає або оновлює записи історії (повторне відтворення збільшує play_count)
+        Args:
+            entries: Словники з полями filename, time_code, position_ms, timestamp
+        """
+        self._write_many(
+            "INSERT INTO history (filename, time_code, position_ms, timestamp, play_count) "
+            "VALUES (:filename, :time_code, :position_ms, :timestamp, 1) "
+            "ON CONFLICT (filename) DO UPDATE SET time_code = excluded.time_code, "
+            "position_ms = excluded.position_ms, timestamp = excluded.timestamp, "
+            "play_count = play_count + 1",
+            entries)
+
+    def record_position(self, filename, position_ms, time_code):
+        """Зберігає позицію відтворення файлу (без збільшення play_count)."""
+        self._write("UPDATE history SET position_ms = ?, time_code = ? WHERE filename = ?",
+                    (position_ms, time_code, filename))
+
+    # Улюблені
+
+    def load_favorites(self):
+        return [row[0] for row in self.connection.execute("SELECT filename FROM favorites ORDER BY id")]
+
+    def add_favorites(self, filenames):
+        self._write_many("INSERT OR IGNORE INTO favorites (filename) VALUES (?)",
+                         [(filename,) for filename in filenames])
+
+    def remove_favorites(self, filenames):
+        self._write_many("DELETE FROM favorites WHERE filename = ?",
+                         [(filename,) for filename in filenames])
+
+    # Списки відтворення
+
+    def playlist_names(self):
+        return [name for (name,) in self.connection.execute("SELECT name FROM playlists ORDER BY id")]
+
+    def load_playlist(self, name):
+        """Повертає файли одного списку відтворення за порядком."""
+        return [filename for (filename,) in self.connection.execute(
+            "SELECT i.filename FROM playlist_items i JOIN playlists p ON p.id = i.playlist_id "
+            "WHERE p.name = ? ORDER BY i.position", (name,))]
+
+    def save_playlist(self, name, filenames):
+        """Перезаписує вміст списку відтворення однією транзакцією."""
+        with self.transaction():
+            self.clear_playlist(name)
+            self.append_playlist_items(name, 0, filenames)
+
+    def clear_playlist(self, name):
+        """Створює порожній список відтворення або очищає наявний."""
+        with self.transaction():
+            self._write("INSERT OR IGNORE INTO playlists (name) VALUES (?)", (name,))
+            self._write(f"DELETE FROM playlist_items WHERE playlist_id = {PLAYLIST_ID}", (name,))
+
+    def append_playlist_items(self, name, position, filenames):
+        """
+        Дописує порцію файлів у кінець списку (потоковий імпорт без повного списку в пам'яті)
+        Args:
+            name: Назва списку (має існувати - див. clear_playlist)
+            position: Позиція першого файлу порції
+            filenames: Файли порції
+        """
+        self._write_many(
+            f"INSERT INTO playlist_items (playlist_id, position, filename) VALUES ({PLAYLIST_ID}, ?, ?)",
+            ((name, index, filename) for index, filename in enumerate(filenames, position)))
+
+    def rename_playlist(self, name, new_name):
+        """Перейменовує список; список з назвою new_name, якщо він був, замінюється."""
+        with self.transaction():
+            self._write("DELETE FROM playlists WHERE name = ?", (new_name,))
+            self._write("UPDATE playlists SET name = ? WHERE name = ?", (new_name, name))
+
+    def delete_playlist(self, name):
+        self._write("DELETE FROM playlists WHERE name = ?", (name,))
+
+    # Індекс медіатеки
+
+    def add_media_root(self, path):
+        self._write("INSERT OR REPLACE INTO media_roots (path, scanned) VALUES (?, ?)", (path, time.time()))
+
+    def media_roots(self):
+        return [row[0] for row in self.connection.execute("SELECT path FROM media_roots ORDER BY path")]
+
+    def indexed_directories(self):
+        """Усі проіндексовані теки (для спостереження через inotify)."""
+        return [path for (path,) in self.connection.execute("SELECT path FROM media_dirs")]
+
+    def cached_directory(self, path):
+        """
+        Повертає збережений стан теки для інкрементального сканування
+        Returns:
+            tuple: (mtime, [підтеки], [файли]) або None, якщо теку ще не індексовано
+        """
+        connection = self.connection
+        row = connection.execute("SELECT mtime FROM media_dirs WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return None
+        subdirectories = [subdir for (subdir,) in connection.execute(
+            "SELECT path FROM media_dirs WHERE parent = ? ORDER BY path", (path,))]
+        files = [file for (file,) in connection.execute(
+            "SELECT path FROM media_files WHERE directory = ? ORDER BY path", (path,))]
+        return row[0], subdirectories, files
+
+    def update_directory(self, path, parent, mtime, files, subdirectories):
+        """
+        Зберігає результат сканування однієї теки
+        Args:
+            path: Тека
+            parent: Батьківська тека (None для кореня)
+            mtime: Час зміни теки
+            files: Кортежі (шлях, ім'я, розмір, mtime) відеофайлів теки
+            subdirectories: Шляхи підтек
+        """
+        with self.transaction():
+            self._write("INSERT OR REPLACE INTO media_dirs (path, parent, mtime) VALUES (?, ?, ?)",
+                        (path, parent, mtime))
+            # Тривалість і кодек зберігаються, якщо файл не змінився
+            self._write_many(
+                "INSERT INTO media_files (path, directory, name, size, mtime) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET "
+                "duration = CASE WHEN size = excluded.size AND mtime = excluded.mtime THEN duration END, "
+                "codec = CASE WHEN size = excluded.size AND mtime = excluded.mtime THEN codec END, "
+                "size = excluded.size, mtime = excluded.mtime",
+                ((file_path, path, name, size, file_mtime) for file_path, name, size, file_mtime in files))
+            self._write("DELETE FROM media_files WHERE directory = ? AND path NOT IN (SELECT value FROM json_each(?))",
+                        (path, json.dumps([file[0] for file in files])))
+            removed = [removed_path for (removed_path,) in self.connection.execute(
+                "SELECT path FROM media_dirs WHERE parent = ? AND path NOT IN (SELECT value FROM json_each(?))",
+                (path, json.dumps(list(subdirectories))))]
+            for removed_path in removed:
+                self.remove_directory_tree(removed_path)
+
+    def remove_directory_tree(self, path):
+        """Видаляє з індексу теку разом з усім піддеревом."""
+        # Діапазон [path/, path0) охоплює всі шляхи піддерева і використовує індекс
+        start, end = path + os.sep, path + chr(ord(os.sep) + 1)
+        with self.transaction():
+            self._write("DELETE FROM media_files WHERE directory = ? OR (directory >= ? AND directory < ?)",
+                        (path, start, end))
+            self._write("DELETE FROM media_dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, start, end))
+
+    def update_media_info(self, path, duration, codec):
+        """Записує тривалість і кодек файлу (після розбору в програвачі або пробнику)."""
+        self._write("UPDATE media_files SET duration = ?, codec = ? WHERE path = ?", (duration, codec, path))
+
+    def iter_unprobed_media(self, page_size=1000):
+        """Ітерує посторінково файли індексу, для яких ще невідомі тривалість і кодек."""
+        after = ""
+        while True:
+            page = [path for (path,) in self.connection.execute(
+                "SELECT path FROM media_files WHERE duration IS NULL AND path > ? ORDER BY path LIMIT ?",
+                (after, page_size))]
+            if not page:
+                return
+            yield from page
+            after = page[-1]
+
+    def search_media(self, text="", order_by="name", descending=False, limit=200, offset=0):
+        """
+        Пошук у проіндексованих файлах за частиною імені
+        Args:
+            text: Частина імені файлу (порожній рядок - всі файли)
+            order_by: Поле сортування з MEDIA_ORDER
+            descending: Зворотний порядок
+            limit: Розмір сторінки
+            offset: Зсув сторінки
+        Returns:
+            list: Кортежі з полями MEDIA_COLUMNS
+        """
+        order = MEDIA_ORDER.get(order_by, MEDIA_ORDER["name"]) + (" DESC" if descending else "")
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self.connection.execute(
+            f"SELECT {', '.join(MEDIA_COLUMNS)} FROM media_files WHERE name LIKE ? ESCAPE '\\' "
+            f"ORDER BY {order} LIMIT ? OFFSET ?", (pattern, limit, offset)).fetchall()
+
+    # Міграція
+
+    def migrate_from_json(self, history_filename, favorites_filename, playlist_filename):
+        """Одноразово переносить дані зі старих JSON-файлів (і журналу історії) у базу."""
+        if self.get_meta("json_migrated"):
+            return
+        try:
+            history = load_legacy_history(history_filename)
+            favorites = load_legacy_json(favorites_filename, [])
+            playlists = load_legacy_json(playlist_filename, {})
+            now = time.time()
+            with self.transaction():
+                # Дублікати старої історії згортаються в один запис з лічильником відтворень
+                self.record_history({"filename": entry["filename"], "time_code": entry.get("time_code"),
+                                     "position_ms": 0, "timestamp": now} for entry in history)
+                self.add_favorites(favorites)
+                self.add_favorites(playlists.get("favorites", []))
+                for name, filenames in playlists.get("custom_playlists", {}).items():
+                    self.save_playlist(name, filenames)
+                self.set_meta("json_migrated", now)
+            # Міграція одноразова, а менеджери одразу читають базу - тож чекаємо на запис
+            self.flush()
+            if history or favorites or playlists:
+                logging.info(f"Migrated {len(history)} history entries and {len(favorites)} favorites to {self.filename}")
+        except Exception as e:
+            logging.error(f"Error migrating JSON data: {str(e)}")
+
+    def close(self):
+        """Записує залишок змін, зупиняє фоновий потік і закриває всі з'єднання."""
+        try:
+            self.worker.stop()
+            with self._connections_lock:
+                for connection in self._connections:
+                    connection.close()
+                self._connections.clear()
+        except Exception as e:
+            logging.error(f"Error closing media library: {str(e)}")
+
+
+def load_legacy_json(filename, default):
+    """Читає старий JSON-файл або повертає default."""
+    try:
+        if os.path.exists(filename):
+            with open(filename, "r", encoding='utf-8') as file:
+                return json.load(file)
+    except Exception as e:
+        logging.error(f"Error loading {filename}: {str(e)}")
+    return default
+
+
+def load_legacy_history(history_filename):
+    """Читає старий знімок history.json разом із хвостом журналу history.journal."""
+    history = load_legacy_json(history_filename, [])
+    journal_filename = os.path.splitext(history_filename)[0] + ".journal"
+    try:
+        if os.path.exists(journal_filename):
+            with open(journal_filename, "r", encoding='utf-8') as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record["seq"] == len(history):
+                        history.append(record["entry"])
+    except Exception as e:
+        logging.error(f"Error replaying history journal: {str(e)}")
+    return history
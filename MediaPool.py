@@ -0,0 +1,71 @@
+import logging
+from collections import OrderedDict
+import vlc
+from NetworkStream import is_stream_url, stream_options
+
+
+class MediaPool:
+    def __init__(self, instance, capacity=8, on_parsed=None, options=(), stream_profiles=None):
+        """
+        Обмежений LRU-пул об'єктів vlc.Media, щоб вже розібране медіа не створювалось повторно
+        Args:
+            instance: vlc.Instance, у якому створюються медіа
+            capacity: Максимальна кількість медіа в пулі
+            on_parsed: Функція, що викликається з потоку libVLC після розбору медіа
+            options: Параметри медіа (наприклад, ':avcodec-skiploopfilter=4'), що додаються до кожного нового медіа
+            stream_profiles: Параметри мережевих потоків за схемою URL (None - NetworkStream.STREAM_PROFILES)
+        """
+        self.instance = instance
+        self.capacity = capacity
+        self.on_parsed = on_parsed
+        self.options = tuple(options)
+        self.stream_profiles = stream_profiles
+        self._media = OrderedDict()
+
+    def get(self, path):
+        """
+        Повертає медіа для шляху з пулу або створює нове
+        Args:
+            path: Шлях до медіа файлу
+        Returns:
+            vlc.Media: Медіа (залишається у власності пулу)
+        """
+        media = self._media.get(path)
+        if media is not None:
+            self._media.move_to_end(path)
+            return media
+        media = self.instance.media_new(path, *self.options, *stream_options(path, self.stream_profiles))
+        if self.on_parsed is not None:
+            media.event_manager().event_attach(vlc.EventType.MediaParsedChanged,
+                                               lambda event: self.on_parsed(media))
+        self._media[path] = media
+        while len(self._media) > self.capacity:
+            # Програвач і список відтворення тримають власні посилання, тож release безпечний
+            _, evicted = self._media.popitem(last=False)
+            evicted.release()
+        return media
+
+    def preload(self, path):
+        """Створює медіа і запускає асинхронний розбір, якщо його ще не було (потоки розбирає сам програвач)."""
+        try:
+            media = self.get(path)
+            if media.get_parsed_status() == 0 and not is_stream_url(path):
+                media.parse_with_options(vlc.MediaParseFlag.local, -1)
+            return media
+        except Exception as e:
+            logging.error(f"Error preloading media {path}: {str(e)}")
+            return None
+
+    def discard(self, path):
+        """Прибирає медіа з пулу (наступний get створить нове)."""
+        media = self._media.pop(path, None)
+        if media is not None:
+            media.release()
+
+    def is_parsed(self, media):
+        return media.get_parsed_status() == vlc.MediaParsedStatus.done
+
+    def clear(self):
+        for media in self._media.values():
+            media.release()
+        self._media.clear()
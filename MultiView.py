@@ -0,0 +1,216 @@
+import math
+import time
+import logging
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtWidgets import (QWidget, QFrame, QGridLayout, QVBoxLayout, QHBoxLayout,
+                             QPushButton, QCheckBox, QSlider)
+from MediaController import MediaController, create_instance
+from NetworkStream import StreamMonitor
+
+# Нецентральні плитки декодуються дешевше: без деблокінг-фільтра, з "швидкими" трюками декодера
+# і без аудіо (зменшення роздільності дає сам вивід - плитка малює кадр у своєму розмірі)
+FOCUSED_TILE_OPTIONS = ()
+BACKGROUND_TILE_OPTIONS = (":avcodec-skiploopfilter=4", ":avcodec-fast", ":no-audio")
+
+# Розбіжність, після якої плитка підтягується до годинника, і як часто це перевіряти, мс
+MAX_DRIFT_MS = 500
+SYNC_CHECK_INTERVAL_MS = 1000
+# Після перемотування події часу якийсь час запізнюються - перевірка розбіжності пропускається
+SEEK_SETTLE_MS = 1500
+
+
+class VideoTile(QFrame):
+    """Поверхня виводу однієї плитки; клік робить її активною."""
+    clicked = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.set_focused(False)
+
+    def set_focused(self, focused):
+        self.setStyleSheet("background-color: black; border: 2px solid %s;" % ("#3daee9" if focused else "#202020"))
+
+    def mousePressEvent(self, event):
+        self.clicked.emit()
+        super().mousePressEvent(event)
+
+
+class SyncClock(QObject):
+    """
+    Спільний годинник плиток: команди виконуються на всіх програвачах,
+    а розбіжність перевіряється за подіями TimeChanged головної плитки (без таймерів опитування).
+    """
+    time_changed = pyqtSignal(int)
+    length_changed = pyqtSignal(int)
+
+    def __init__(self, controllers, parent=None):
+        super().__init__(parent)
+        self.controllers = controllers
+        self.master = None
+        self.enabled = True
+        self._last_check = 0
+        self._settle_until = 0.0
+
+    def set_master(self, controller):
+        """Головна плитка задає час; інші підтягуються до неї."""
+        if self.master is not None:
+            self.master.signals.time_changed.disconnect(self._on_master_time)
+            self.master.signals.length_changed.disconnect(self.length_changed)
+        self.master = controller
+        controller.signals.time_changed.connect(self._on_master_time)
+        controller.signals.length_changed.connect(self.length_changed)
+
+    def targets(self):
+        """Програвачі, яких стосуються команди: усі при синхронізації, інакше лише головний."""
+        if self.master is None:
+            return []
+        return self.controllers if self.enabled else [self.master]
+
+    def play(self):
+        for controller in self.targets():
+            controller.play()
+
+    def pause(self):
+        for controller in self.targets():
+            controller.pause()
+
+    def stop(self):
+        for controller in self.targets():
+            controller.stop()
+
+    def seek(self, time_ms):
+        self._settle_until = time.monotonic() + SEEK_SETTLE_MS / 1000
+        for controller in self.targets():
+            controller.set_time(max(0, time_ms))
+
+    def seek_relative(self, delta_ms):
+        if self.master is not None:
+            self.seek(self.master.get_last_time() + delta_ms)
+
+    def _on_master_time(self, time_ms):
+        self.time_changed.emit(time_ms)
+        if not self.enabled or abs(time_ms - self._last_check) < SYNC_CHECK_INTERVAL_MS:
+            return
+        self._last_check = time_ms
+        if time.monotonic() < self._settle_until:
+            return
+        for controller in self.controllers:
+            # Час інших плиток теж відомий з їхніх подій - libVLC тут не опитується
+            if controller is not self.master and controller.is_playing() \
+                    and abs(controller.get_last_time() - time_ms) > MAX_DRIFT_MS:
+                controller.set_time(time_ms, fast=True)
+
+
+class MultiViewWindow(QWidget):
+    def __init__(self, paths, focused_options=FOCUSED_TILE_OPTIONS,
+                 background_options=BACKGROUND_TILE_OPTIONS, parent=None):
+        """
+        Сітка з N програвачів на спільному екземплярі libVLC
+        Args:
+            paths: Файли або потоки для плиток (по одному на плитку)
+            focused_options: Параметри декодування активної плитки
+            background_options: Параметри декодування решти плиток
+        """
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle(f"Відеоплеєр Pro - {len(paths)} views")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(1280, 720)
+        self.paths = list(paths)
+        self.focused_options = tuple(focused_options)
+        self.background_options = tuple(background_options)
+        self.tiles = []
+        self.controllers = []
+        self.monitors = []
+        self.focused = 0
+
+        layout = QVBoxLayout(self)
+        grid = QGridLayout()
+        grid.setSpacing(2)
+        columns = math.ceil(math.sqrt(len(self.paths)))
+        for index, path in enumerate(self.paths):
+            tile = VideoTile(self)
+            tile.clicked.connect(lambda index=index: self.set_focus(index))
+            grid.addWidget(tile, index // columns, index % columns)
+            self.tiles.append(tile)
+        layout.addLayout(grid, 1)
+        layout.addLayout(self.setup_controls())
+
+        self.clock = SyncClock(self.controllers, self)
+        self.clock.time_changed.connect(self.update_time)
+        self.clock.length_changed.connect(lambda length: self.time_slider.setMaximum(max(length, 0)))
+
+    def setup_controls(self):
+        controls = QHBoxLayout()
+        for title, slot in (("Play", lambda: self.clock.play()), ("Pause", lambda: self.clock.pause()),
+                            ("Stop", lambda: self.clock.stop()),
+                            ("-10s", lambda: self.clock.seek_relative(-10000)),
+                            ("+10s", lambda: self.clock.seek_relative(10000))):
+            button = QPushButton(title)
+            button.clicked.connect(slot)
+            controls.addWidget(button)
+        self.time_slider = QSlider(Qt.Horizontal)
+        self.time_slider.sliderReleased.connect(lambda: self.clock.seek(self.time_slider.value()))
+        controls.addWidget(self.time_slider, 1)
+        self.sync_checkbox = QCheckBox("Sync")
+        self.sync_checkbox.setChecked(True)
+        self.sync_checkbox.toggled.connect(self.set_synchronized)
+        controls.addWidget(self.sync_checkbox)
+        return controls
+
+    def start(self):
+        """Створює програвачі плиток (вікно має бути показане - потрібні winId поверхонь) і запускає їх."""
+        try:
+            for index, (tile, path) in enumerate(zip(self.tiles, self.paths)):
+                controller = MediaController(tile, instance=create_instance(), media_options=self.tile_options(index))
+                # Миша і клавіатура йдуть у Qt (вибір плитки), а не у вікно виводу libVLC
+                controller.player.video_set_mouse_input(False)
+                controller.player.video_set_key_input(False)
+                controller.set_mute(index != self.focused)
+                controller.set_media(path)
+                self.controllers.append(controller)
+                # Плитки з потоками самі перепідключаються після обриву
+                self.monitors.append(StreamMonitor(controller, parent=self))
+            self.clock.set_master(self.controllers[self.focused])
+            self.tiles[self.focused].set_focused(True)
+            self.clock.play()
+        except Exception as e:
+            logging.error(f"Error starting multi-view: {str(e)}")
+
+    def tile_options(self, index):
+        return self.focused_options if index == self.focused else self.background_options
+
+    def set_focus(self, index):
+        """Робить плитку активною: повна якість декодування, звук і роль головного годинника."""
+        if index == self.focused or index >= len(self.controllers):
+            return
+        previous, self.focused = self.focused, index
+        for tile_index in (previous, index):
+            self.tiles[tile_index].set_focused(tile_index == index)
+            self.reload_tile(tile_index)
+        self.clock.set_master(self.controllers[index])
+
+    def reload_tile(self, index):
+        """Перевідкриває медіа плитки з її поточними параметрами з того ж місця."""
+        controller = self.controllers[index]
+        was_playing = controller.is_playing()
+        controller.set_media_options(self.tile_options(index))
+        controller.set_media(self.paths[index], start_time=controller.get_last_time())
+        controller.set_mute(index != self.focused)
+        if was_playing:
+            controller.play()
+
+    def set_synchronized(self, enabled):
+        self.clock.enabled = enabled
+
+    def update_time(self, time_ms):
+        if not self.time_slider.isSliderDown():
+            self.time_slider.setValue(time_ms)
+
+    def closeEvent(self, event):
+        for monitor in self.monitors:
+            monitor.on_stopped()
+        for controller in self.controllers:
+            controller.cleanup()
+        self.controllers.clear()
+        self.monitors.clear()
+        event.accept()
@@ -0,0 +1,267 @@
+import time
+import random
+import logging
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# Параметри медіа за схемою URL. Кеш у мс: менший - менша затримка живого потоку,
+# більший - стійкість до ривків мережі. :live-caching діє для пристроїв захоплення.
+STREAM_PROFILES = {
+    "http": (":network-caching=1500",),
+    "https": (":network-caching=1500",),
+    "mms": (":network-caching=1500",),
+    "rtmp": (":network-caching=1000",),
+    # RTSP через TCP (interleaved) проходить крізь NAT і не губить пакети при перевантаженні
+    "rtsp": (":network-caching=500", ":rtsp-tcp"),
+    "rtp": (":network-caching=300",),
+    "udp": (":network-caching=300",),
+    "srt": (":network-caching=300",),
+    "v4l2": (":live-caching=100",),
+    "dshow": (":live-caching=100",),
+    "screen": (":live-caching=100",),
+}
+
+# Без нових кадрів стільки мс під час відтворення - потік вважається завислим
+STALL_TIMEOUT_MS = 8000
+# Затримка перед першим перепідключенням і її межа (подвоюється з кожною спробою), мс
+INITIAL_BACKOFF_MS = 1000
+MAX_BACKOFF_MS = 30000
+# Відтворення без збоїв стільки мс скидає лічильник спроб
+STABLE_AFTER_MS = 10000
+
+
+def stream_scheme(location):
+    """Схема URL у нижньому регістрі або None для локального шляху (і file://)."""
+    scheme, separator, _ = location.partition("://")
+    if not separator or len(scheme) < 2 or scheme.lower() == "file":
+        return None
+    return scheme.lower()
+
+
+def is_stream_url(location):
+    return stream_scheme(location) is not None
+
+
+def stream_options(location, profiles=None):
+    """
+    Параметри медіа для URL за його схемою
+    Args:
+        location: Шлях або URL
+        profiles: Словник схема -> параметри (None - STREAM_PROFILES)
+    Returns:
+        tuple: Параметри для media_new (порожній для локальних файлів і невідомих схем)
+    """
+    scheme = stream_scheme(location)
+    if scheme is None:
+        return ()
+    return tuple((STREAM_PROFILES if profiles is None else profiles).get(scheme, ()))
+
+
+class StreamMonitor(QObject):
+    """
+    Стежить за мережевим потоком MediaController: перепідключається з експоненційною затримкою
+    після EncounteredError, обриву чи зависання і рахує показники буфера
+    """
+    reconnecting = pyqtSignal(int, int)  # Номер спроби, затримка в мс
+    recovered = pyqtSignal(int)  # Скільки спроб знадобилось
+    health_changed = pyqtSignal(dict)
+
+    def __init__(self, controller, stall_timeout=STALL_TIMEOUT_MS, initial_backoff=INITIAL_BACKOFF_MS,
+                 max_backoff=MAX_BACKOFF_MS, max_attempts=None, interval=1000, parent=None):
+        """
+        Args:
+            controller: MediaController
+            stall_timeout: Скільки мс без нових кадрів вважається зависанням
+            initial_backoff: Затримка перед першою спробою, мс
+            max_backoff: Найбільша затримка між спробами, мс
+            max_attempts: Після стількох невдалих спроб поспіль монітор здається (None - ніколи)
+            interval: Період оновлення показників, мс
+        """
+        super().__init__(parent)
+        self.controller = controller
+        self.stall_timeout = stall_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.active = False
+        self.attempt = 0
+        self.reconnects = 0
+        self.stalls = 0
+        self.stall_ms = 0
+        self.last_error = None
+        self._path = None
+        self._cache = 100.0
+        self._buffering_since = None
+        self._last_time = None
+        self._last_progress = time.monotonic()
+        self._connected_at = time.monotonic()
+        self._recovered_at = None
+        self._health = {}
+        self._reconnecting = False
+
+        self._reconnect_timer = QTimer(self)
+        self._reconnect_timer.setSingleShot(True)
+        self._reconnect_timer.timeout.connect(self.reconnect)
+        # Сторожовий таймер працює, лише поки потік має відтворюватись
+        self._watchdog = QTimer(self)
+        self._watchdog.setInterval(interval)
+        self._watchdog.timeout.connect(self.check)
+        signals = controller.signals
+        signals.playing.connect(self.on_playing)
+        signals.paused.connect(self.on_paused)
+        signals.stopped.connect(self.on_stopped)
+        signals.media_changed.connect(self.on_media_changed)
+        signals.media_set.connect(self.on_media_set)
+        signals.error.connect(lambda: self.on_failure("playback error"))
+        signals.end_reached.connect(self.on_end_reached)
+        signals.time_changed.connect(self.on_time_changed)
+        signals.buffering.connect(self.on_buffering)
+
+    def on_playing(self):
+        if not self.controller.is_stream():
+            self._watchdog.stop()
+            return
+        if not self.active:
+            self._last_progress = time.monotonic()
+        self.active = True
+        self._watchdog.start()
+
+    def on_paused(self):
+        self.active = False
+        self._watchdog.stop()
+
+    def on_stopped(self):
+        """Зупинка користувачем скасовує відновлення."""
+        self.active = False
+        self.attempt = 0
+        self._reconnect_timer.stop()
+        self._watchdog.stop()
+
+    def on_media_changed(self, media_path):
+        self.attempt = 0
+        self._reconnect_timer.stop()
+        self._connected_at = self._last_progress = time.monotonic()
+
+    def on_media_set(self, media_path):
+        """Нове медіа з load_file/set_media не успадковує затримку попереднього потоку."""
+        if not self._reconnecting:
+            self.on_media_changed(media_path)
+
+    def on_time_changed(self, time_ms):
+        if time_ms == self._last_time:
+            return
+        self._last_time = time_ms
+        now = time.monotonic()
+        self._last_progress = now
+        if self.attempt and self._recovered_at is None:
+            self._recovered_at = now
+            logging.info(f"Stream recovered after {self.attempt} attempt(s): {self.controller.get_current_path()}")
+            self.recovered.emit(self.attempt)
+
+    def on_buffering(self, cache):
+        self._cache = cache
+        if cache < 100 and self._buffering_since is None:
+            self._buffering_since = time.monotonic()
+        elif cache >= 100 and self._buffering_since is not None:
+            self.stalls += 1
+            self.stall_ms += int((time.monotonic() - self._buffering_since) * 1000)
+            self._buffering_since = None
+
+    def on_end_reached(self):
+        """Кінець живого потоку (або обрив VOD до кінця) - це розрив з'єднання, а не кінець медіа."""
+        if not self.active or not self.controller.is_stream() or self.controller.has_queued():
+            return
+        length = self.controller.get_length()
+        if length <= 0 or self.controller.get_last_time() < length - self.stall_timeout:
+            self.on_failure("connection closed")
+
+    def on_failure(self, reason):
+        """Планує перепідключення з експоненційною затримкою і випадковим розкидом."""
+        if not self.controller.is_stream() or self._reconnect_timer.isActive():
+            return
+        self.last_error = reason
+        self._path = self.controller.get_current_path()
+        self.attempt += 1
+        if self.max_attempts is not None and self.attempt > self.max_attempts:
+            logging.error(f"Giving up on stream after {self.max_attempts} attempts: {self.controller.get_current_path()}")
+            self.active = False
+            self._watchdog.stop()
+            return
+        delay = min(self.initial_backoff * 2 ** (self.attempt - 1), self.max_backoff)
+        # Розкид не дає плиткам однієї стіни перепідключатися до сервера одночасно
+        delay = int(delay * random.uniform(0.8, 1.2))
+        logging.warning(f"Stream {reason}; reconnect attempt {self.attempt} in {delay} ms: "
+                        f"{self.controller.get_current_path()}")
+        self.reconnecting.emit(self.attempt, delay)
+        self._reconnect_timer.start(delay)
+
+    def reconnect(self):
+        if self.controller.get_current_path() != self._path:
+            return  # Поки чекали, відкрили інше медіа
+        self.active = True
+        self.reconnects += 1
+        self._recovered_at = None
+        self._last_time = None
+        self._connected_at = self._last_progress = time.monotonic()
+        self._buffering_since = None
+        # Перепідключення саме викликає set_media - лічильник спроб при цьому не скидається
+        self._reconnecting = True
+        try:
+            reconnected = self.controller.reconnect()
+        finally:
+            self._reconnecting = False
+        if not reconnected:
+            self.on_failure("reconnect failed")
+            return
+        self._watchdog.start()
+
+    def reconnect_pending(self):
+        """Чи заплановано перепідключення (кінець черги libVLC тоді не означає перехід до наступного файлу)."""
+        return self._reconnect_timer.isActive()
+
+    def check(self):
+        """Періодична перевірка: зависання потоку, стабільність після відновлення, показники."""
+        now = time.monotonic()
+        if self.active and not self._reconnect_timer.isActive():
+            if (now - self._last_progress) * 1000 >= self.stall_timeout:
+                self.on_failure("stalled")
+            elif self._recovered_at is not None and (now - self._recovered_at) * 1000 >= STABLE_AFTER_MS:
+                self.attempt = 0
+                self._recovered_at = None
+        self._health = self.sample(now)
+        self.health_changed.emit(dict(self._health))
+
+    def sample(self, now):
+        stats = self.controller.get_stats()
+        if self._reconnect_timer.isActive():
+            state = "reconnecting"
+        elif self._buffering_since is not None:
+            state = "buffering"
+        elif self.active and (now - self._last_progress) * 1000 >= self.stall_timeout / 2:
+            state = "stalled"
+        else:
+            state = "playing" if self.active else "idle"
+        return {
+            "url": self.controller.get_current_path(),
+            "state": state,
+            "cache": self._cache,
+            # libVLC віддає бітрейт у байтах за мс
+            "input_kbps": round(stats.get("input_bitrate", 0) * 8000, 1),
+            "demux_kbps": round(stats.get("demux_bitrate", 0) * 8000, 1),
+            "demux_corrupted": stats.get("demux_corrupted", 0),
+            "demux_discontinuity": stats.get("demux_discontinuity", 0),
+            "lost_pictures": stats.get("lost_pictures", 0),
+            "stalls": self.stalls,
+            "stall_ms": self.stall_ms,
+            "reconnects": self.reconnects,
+            "attempt": self.attempt,
+            "uptime_s": round(now - self._connected_at, 1),
+            "last_error": self.last_error,
+        }
+
+    def health(self):
+        """
+        Останні показники потоку
+        Returns:
+            dict: state, cache (%), input_kbps, demux_kbps, лічильники пошкоджень, зависань і перепідключень
+        """
+        return dict(self._health)
@@ -0,0 +1,68 @@
+import logging
+import threading
+
+class PersistenceWorker:
+    def __init__(self, flush_callback, delay=0.5, name="PersistenceWorker"):
+        """
+        Фоновий потік відкладеного збереження (write-behind)
+        Args:
+            flush_callback: Функція, що записує всі накопичені зміни на диск
+            delay: Час у секундах, протягом якого серія змін збирається в один запис
+            name: Назва потоку
+        """
+        self.flush_callback = flush_callback
+        self.delay = delay
+        self._condition = threading.Condition()
+        self._dirty = False
+        self._urgent = False
+        self._busy = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        """Позначає, що є незбережені зміни; сам виклик не чекає на диск."""
+        with self._condition:
+            self._dirty = True
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Негайно записує накопичені зміни і чекає завершення запису
+        Args:
+            timeout: Максимальний час очікування в секундах (None - без обмеження)
+        Returns:
+            bool: True якщо всі зміни записані
+        """
+        with self._condition:
+            if not self._thread.is_alive():
+                return not self._dirty
+            self._urgent = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._dirty and not self._busy, timeout)
+
+    def stop(self, timeout=None):
+        """Записує залишок змін і зупиняє потік."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._dirty or self._stopped)
+                if not self._dirty:
+                    return
+                # Збираємо серію змін, доки не мине затримка або не попросять flush
+                self._condition.wait_for(lambda: self._urgent or self._stopped, self.delay)
+                self._dirty = self._urgent = False
+                self._busy = True
+            try:
+                self.flush_callback()
+            except Exception as e:
+                logging.error(f"Error in background save: {str(e)}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
@@ -0,0 +1,191 @@
+import csv
+import json
+import time
+import logging
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer
+
+# Поля вибірки; лічильники - прирости за інтервал, бітрейти - кбіт/с
+SAMPLE_FIELDS = ("timestamp", "media_time", "fps", "decoded_video", "displayed_pictures", "lost_pictures",
+                 "decoded_audio", "lost_abuffers", "input_kbps", "demux_kbps",
+                 "demux_corrupted", "demux_discontinuity", "cache")
+# Лічильники libVLC, що ростуть з початку відтворення медіа
+COUNTER_FIELDS = ("decoded_video", "displayed_pictures", "lost_pictures", "decoded_audio", "lost_abuffers",
+                  "demux_corrupted", "demux_discontinuity")
+
+# Перехід вважається виконаним, коли TimeChanged ближче до цілі, ніж це значення, мс
+SEEK_TOLERANCE_MS = 1000
+# Не довше цього чекаємо на завершення переходу, с
+SEEK_TIMEOUT = 10
+# Як часто втрачені кадри підсумовуються в журналі, с
+LOG_INTERVAL = 10
+
+
+class PlaybackTelemetry(QObject):
+    def __init__(self, controller, interval=1000, capacity=600, parent=None):
+        """
+        Збирає показники відтворення одного MediaController у кільцеві буфери
+        Args:
+            controller: MediaController, за яким ведеться спостереження
+            interval: Період вибірки get_stats() під час відтворення, мс
+            capacity: Скільки останніх вибірок і подій зберігається
+        """
+        super().__init__(parent)
+        self.controller = controller
+        self.samples = deque(maxlen=capacity)
+        self.events = deque(maxlen=capacity)
+        self.overlay_enabled = False
+        self._previous = {}
+        self._previous_at = None
+        self._cache = 100.0
+        self._buffering_since = None
+        self._seek_target = None
+        self._seek_requested_at = None
+        self._lost_since_log = 0
+        self._last_log = time.monotonic()
+
+        # Вибірка йде лише під час відтворення - на паузі таймер зупинений
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.sample)
+        signals = controller.signals
+        signals.playing.connect(self._timer.start)
+        signals.paused.connect(self.on_paused)
+        signals.end_reached.connect(self._timer.stop)
+        # media_changed - перехід черги libVLC, media_set - нове медіа з set_media
+        signals.media_changed.connect(self.reset_counters)
+        signals.media_set.connect(self.reset_counters)
+        signals.buffering.connect(self.on_buffering)
+        signals.seek_requested.connect(self.on_seek_requested)
+        signals.time_changed.connect(self.on_time_changed)
+
+    def on_paused(self):
+        """Час паузи не входить в інтервал першої вибірки після відновлення (інакше хибне падіння fps)."""
+        self._timer.stop()
+        self._previous_at = None
+
+    def reset_counters(self):
+        """Лічильники libVLC нового медіа починаються з нуля."""
+        self._previous = {}
+        self._previous_at = None
+
+    def sample(self):
+        """Знімає одну вибірку get_stats() і рахує прирости з попередньої."""
+        stats = self.controller.get_stats()
+        if not stats:
+            return
+        now = time.monotonic()
+        # Після зміни медіа лічильники зменшуються - тоді приріст дорівнює новому значенню
+        deltas = {field: stats[field] - self._previous.get(field, 0) if stats[field] >= self._previous.get(field, 0)
+                  else stats[field] for field in COUNTER_FIELDS}
+        elapsed = now - self._previous_at if self._previous_at is not None else None
+        sample = dict(deltas, timestamp=time.time(), media_time=self.controller.get_last_time(),
+                      fps=round(deltas["displayed_pictures"] / elapsed, 2) if elapsed else 0.0,
+                      # libVLC віддає бітрейт у байтах за мс
+                      input_kbps=round(stats["input_bitrate"] * 8000, 1),
+                      demux_kbps=round(stats["demux_bitrate"] * 8000, 1),
+                      cache=self._cache)
+        self._previous = stats
+        self._previous_at = now
+        self.samples.append(sample)
+        self._log_losses(sample, now)
+        if self.overlay_enabled:
+            self.controller.set_overlay_text(self.format_sample(sample))
+
+    def _log_losses(self, sample, now):
+        self._lost_since_log += sample["lost_pictures"] + sample["lost_abuffers"]
+        if now - self._last_log >= LOG_INTERVAL:
+            if self._lost_since_log:
+                logging.warning(f"Playback: {self._lost_since_log} frames/audio buffers lost in the last "
+                                f"{now - self._last_log:.0f} s at {sample['media_time']} ms "
+                                f"(fps {sample['fps']}, input {sample['input_kbps']} kbit/s)")
+            self._lost_since_log = 0
+            self._last_log = now
+
+    def on_buffering(self, cache):
+        """Фіксує епізод буферизації: від першої події з cache < 100 до заповнення буфера."""
+        self._cache = cache
+        if cache < 100 and self._buffering_since is None:
+            self._buffering_since = time.monotonic()
+        elif cache >= 100 and self._buffering_since is not None:
+            duration = int((time.monotonic() - self._buffering_since) * 1000)
+            self._buffering_since = None
+            self.add_event("buffering", duration)
+            if self.controller.get_last_time() > 0:
+                # Буферизація посеред відтворення - саме те, що користувачі бачать як підвисання
+                logging.warning(f"Playback: buffering stall of {duration} ms at {self.controller.get_last_time()} ms")
+
+    def on_seek_requested(self, target):
+        """Латентність рахується від першого запиту серії до TimeChanged біля остаточної цілі."""
+        if self._seek_requested_at is None:
+            self._seek_requested_at = time.monotonic()
+        self._seek_target = target
+
+    def on_time_changed(self, time_ms):
+        if self._seek_requested_at is None:
+            return
+        elapsed = time.monotonic() - self._seek_requested_at
+        if abs(time_ms - self._seek_target) <= SEEK_TOLERANCE_MS:
+            self.add_event("seek", int(elapsed * 1000))
+            self._seek_requested_at = None
+        elif elapsed > SEEK_TIMEOUT:
+            self._seek_requested_at = None
+
+    def add_event(self, kind, duration_ms):
+        self.events.append({"timestamp": time.time(), "kind": kind, "duration_ms": duration_ms,
+                            "media_time": self.controller.get_last_time()})
+
+    def summary(self):
+        """
+        Підсумок за вибірками в буфері
+        Returns:
+            dict: Середній fps, втрачені кадри, кількість і тривалість буферизацій, латентність переходів
+        """
+        samples = list(self.samples)
+        seeks = [event["duration_ms"] for event in self.events if event["kind"] == "seek"]
+        stalls = [event["duration_ms"] for event in self.events if event["kind"] == "buffering"]
+        return {
+            "samples": len(samples),
+            "average_fps": round(sum(s["fps"] for s in samples) / len(samples), 2) if samples else 0.0,
+            "lost_pictures": sum(s["lost_pictures"] for s in samples),
+            "lost_abuffers": sum(s["lost_abuffers"] for s in samples),
+            "buffering_events": len(stalls),
+            "buffering_ms": sum(stalls),
+            "seeks": len(seeks),
+            "average_seek_ms": round(sum(seeks) / len(seeks)) if seeks else 0,
+            "max_seek_ms": max(seeks, default=0),
+        }
+
+    def set_overlay(self, enabled):
+        """Вмикає або вимикає показ останньої вибірки поверх відео."""
+        self.overlay_enabled = enabled
+        if enabled and self.samples:
+            self.controller.set_overlay_text(self.format_sample(self.samples[-1]))
+        elif not enabled:
+            self.controller.set_overlay_text(None)
+
+    @staticmethod
+    def format_sample(sample):
+        return (f"fps {sample['fps']:.1f}  lost {sample['lost_pictures']}  "
+                f"in {sample['input_kbps']:.0f} kbit/s  cache {sample['cache']:.0f}%")
+
+    def export(self, path):
+        """
+        Зберігає буфери у файл: .json - вибірки, події і підсумок; інакше CSV з вибірками
+        Returns:
+            bool: Чи вдалося записати файл
+        """
+        try:
+            if path.lower().endswith(".json"):
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump({"summary": self.summary(), "samples": list(self.samples),
+                               "events": list(self.events)}, f, indent=2)
+            else:
+                with open(path, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+                    writer.writeheader()
+                    writer.writerows(self.samples)
+            return True
+        except Exception as e:
+            logging.error(f"Error exporting playback telemetry: {str(e)}")
+            return False
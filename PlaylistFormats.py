@@ -0,0 +1,240 @@
+import os
+import time
+import logging
+from collections import namedtuple
+from pathlib import Path
+from urllib.parse import urlparse, unquote
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+from PyQt5.QtCore import QThread, pyqtSignal
+
+PLAYLIST_EXTENSIONS = ('.m3u', '.m3u8', '.pls', '.xspf')
+XSPF_NAMESPACE = "http://xspf.org/ns/0/"
+
+# Запис списку відтворення: шлях або URL, назва і тривалість у секундах (-1 - невідома)
+PlaylistEntry = namedtuple("PlaylistEntry", ("location", "title", "duration"))
+
+
+def playlist_file_filter():
+    """Фільтр QFileDialog для підтримуваних списків відтворення."""
+    patterns = " ".join(f"*{extension}" for extension in PLAYLIST_EXTENSIONS)
+    return f"Playlists ({patterns});;M3U (*.m3u *.m3u8);;PLS (*.pls);;XSPF (*.xspf);;All Files (*)"
+
+
+def resolve_location(location, base_directory):
+    """
+    Перетворює запис списку на шлях або URL без звернення до диска
+    (чи існує файл, перевіряється лише перед відтворенням)
+    """
+    location = location.strip()
+    if location.startswith("file:"):
+        parsed = urlparse(location)
+        return os.path.normpath(unquote(parsed.path if not parsed.netloc else f"//{parsed.netloc}{parsed.path}"))
+    # Повний розбір URL лише для записів зі схемою (рядки 500k-списку переважно звичайні шляхи)
+    if "://" in location:
+        return location
+    if os.path.isabs(location):
+        return location
+    return os.path.normpath(os.path.join(base_directory, location))
+
+
+def location_uri(location):
+    """Локальний шлях у file:// URI для XSPF; URL залишаються як є."""
+    if len(urlparse(location).scheme) > 1:
+        return location
+    return Path(os.path.abspath(location)).as_uri()
+
+
+def _open_text(path):
+    # M3U8 - завжди UTF-8; в інших форматах пошкоджені символи не зупиняють імпорт
+    return open(path, encoding="utf-8-sig", errors="replace")
+
+
+def iter_m3u(path):
+    """Потоково читає M3U/M3U8 рядок за рядком, з назвами і тривалістю з #EXTINF."""
+    base_directory = os.path.dirname(os.path.abspath(path))
+    title, duration = None, -1
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#EXTINF:"):
+                info, _, title = line[8:].partition(",")
+                try:
+                    duration = int(float(info.split()[0])) if info.split() else -1
+                except ValueError:
+                    duration = -1
+                title = title.strip() or None
+            elif not line.startswith("#"):
+                yield PlaylistEntry(resolve_location(line, base_directory), title, duration)
+                title, duration = None, -1
+
+
+def iter_pls(path):
+    """Потоково читає PLS: запис віддається, щойно почався наступний номер FileN."""
+    base_directory = os.path.dirname(os.path.abspath(path))
+    current, fields = None, {}
+
+    def entry():
+        length = fields.get("length", "-1")
+        return PlaylistEntry(resolve_location(fields["file"], base_directory), fields.get("title"),
+                             int(length) if length.lstrip("-").isdigit() else -1)
+
+    with _open_text(path) as f:
+        for line in f:
+            key, separator, value = line.strip().partition("=")
+            if not separator:
+                continue
+            key = key.strip().lower()
+            for field in ("file", "title", "length"):
+                if key.startswith(field) and key[len(field):].isdigit():
+                    number = int(key[len(field):])
+                    if number != current:
+                        if "file" in fields:
+                            yield entry()
+                        current, fields = number, {}
+                    fields[field] = value.strip()
+                    break
+    if "file" in fields:
+        yield entry()
+
+
+def iter_xspf(path):
+    """
+    Потоково читає XSPF через iterparse: кожен <track> звільняється після обробки,
+    тож пам'ять не залежить від розміру списку
+    """
+    base_directory = os.path.dirname(os.path.abspath(path))
+    track_tags = (f"{{{XSPF_NAMESPACE}}}track", "track")
+    track_list_tags = (f"{{{XSPF_NAMESPACE}}}trackList", "trackList")
+    track_list = None
+    for event, element in ElementTree.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if element.tag in track_list_tags:
+                track_list = element
+            continue
+        if element.tag not in track_tags:
+            continue
+        location = element.findtext(f"{{{XSPF_NAMESPACE}}}location") or element.findtext("location")
+        if location:
+            title = element.findtext(f"{{{XSPF_NAMESPACE}}}title") or element.findtext("title")
+            duration = element.findtext(f"{{{XSPF_NAMESPACE}}}duration") or element.findtext("duration")
+            yield PlaylistEntry(resolve_location(location, base_directory), title,
+                                int(duration) // 1000 if duration and duration.isdigit() else -1)
+        # Оброблений трек видаляється з дерева, інакше iterparse накопичить увесь список
+        if track_list is not None:
+            track_list.clear()
+
+
+def iter_playlist(path):
+    """
+    Вибирає парсер за розширенням файлу
+    Returns:
+        generator: PlaylistEntry по одному, без побудови всього списку в пам'яті
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pls":
+        return iter_pls(path)
+    if extension == ".xspf":
+        return iter_xspf(path)
+    return iter_m3u(path)
+
+
+def write_playlist(path, locations):
+    """
+    Записує список потоково у формат за розширенням (.m3u/.m3u8, .pls, .xspf)
+    Args:
+        path: Файл списку
+        locations: Ітерований набір шляхів або URL (може бути генератором)
+    Returns:
+        int: Кількість записаних елементів
+    """
+    extension = os.path.splitext(path)[1].lower()
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        if extension == ".pls":
+            f.write("[playlist]\n")
+            for count, location in enumerate(locations, 1):
+                f.write(f"File{count}={location}\n")
+            # NumberOfEntries дозволено в кінці - кількість відома лише після проходу
+            f.write(f"NumberOfEntries={count}\nVersion=2\n")
+        elif extension == ".xspf":
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    f'<playlist version="1" xmlns="{XSPF_NAMESPACE}">\n  <trackList>\n')
+            for count, location in enumerate(locations, 1):
+                f.write(f"    <track><location>{escape(location_uri(location))}</location></track>\n")
+            f.write("  </trackList>\n</playlist>\n")
+        else:
+            f.write("#EXTM3U\n")
+            for count, location in enumerate(locations, 1):
+                f.write(f"{location}\n")
+    logging.info(f"Exported {count} entries to {path}")
+    return count
+
+
+class PlaylistImporter(QThread):
+    """
+    Читає файл списку у фоновому потоці і порціями передає записи в чергу відтворення,
+    тож відтворення починається до того, як дочитано весь список
+    """
+    files_found = pyqtSignal(list)
+    # Назва і кількість записів списку, повністю збереженого в медіатеці
+    imported = pyqtSignal(str, int)
+
+    def __init__(self, path, library=None, batch_size=500, batch_interval=0.1, parent=None):
+        """
+        Args:
+            path: Файл .m3u/.m3u8/.pls/.xspf
+            library: MediaLibrary, у яку порціями зберігається імпортований список
+            batch_size: Максимальна кількість записів в одній порції
+            batch_interval: Максимальний час у секундах між порціями
+        """
+        super().__init__(parent)
+        self.path = path
+        self.library = library
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.count = 0
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        # Список пишеться під тимчасовою назвою і замінює збережений лише після повного імпорту
+        staging = f"{self.name}\0importing"
+        batch = []
+        last_emit = time.monotonic()
+        try:
+            if self.library is not None:
+                self.library.clear_playlist(staging)
+            for entry in iter_playlist(self.path):
+                if self.isInterruptionRequested():
+                    break
+                batch.append(entry.location)
+                # Перший запис віддається одразу, щоб відтворення почалося без очікування
+                if self.count == 0 or len(batch) >= self.batch_size or \
+                        time.monotonic() - last_emit >= self.batch_interval:
+                    self._emit(batch, staging)
+                    batch = []
+                    last_emit = time.monotonic()
+            else:
+                if batch:
+                    self._emit(batch, staging)
+                if self.library is not None:
+                    self.library.rename_playlist(staging, self.name)
+                    self.library.flush()
+                self.imported.emit(self.name, self.count)
+                logging.info(f"Imported {self.count} entries from {self.path}")
+                return
+        except Exception as e:
+            logging.error(f"Error importing playlist {self.path}: {str(e)}")
+        if self.library is not None:
+            self.library.delete_playlist(staging)
+
+    def _emit(self, batch, staging):
+        if self.library is not None:
+            self.library.append_playlist_items(staging, self.count, batch)
+        self.count += len(batch)
+        self.files_found.emit(batch)
@@ -1,39 +1,61 @@
-import os
-import json
 import logging
+from MediaLibrary import MediaLibrary
 
 class PlaylistManager:
-    def __init__(self, filename="playlist.json"):
-        self.filename = filename
-        self.playlists = self.load_playlists()
+    def __init__(self, library=None, favorites=None):
+        """
+        Args:
+            library: Сховище MediaLibrary (спільне з HistoryManager)
+            favorites: Спільна впорядкована множина улюблених (наприклад, HistoryManager.favorites)
+        """
+        self.library = library or MediaLibrary()
+        if favorites is None:
+            favorites = dict.fromkeys(self.library.load_favorites())
+        # Улюблені зберігаються як впорядкована множина (dict) для O(1) перевірок і видалень.
+        # У custom_playlists значення None - список лише в медіатеці, читається через get_playlist
+        self.playlists = {"favorites": favorites, "custom_playlists": self.load_playlists()}
 
     def load_playlists(self):
         try:
-            if os.path.exists(self.filename):
-                with open(self.filename, "r", encoding='utf-8') as file:
-                    return json.load(file)
-            return {"favorites": [], "custom_playlists": {}}
+            return dict.fromkeys(self.library.playlist_names())
         except Exception as e:
             logging.error(f"Error loading playlists: {str(e)}")
-            return {"favorites": [], "custom_playlists": {}}
+            return {}
+
+    def get_playlist(self, name):
+        """Повертає файли списку відтворення; незмінені списки читаються з медіатеки без кешування."""
+        filenames = self.playlists["custom_playlists"].get(name)
+        if filenames is not None:
+            return filenames
+        try:
+            return self.library.load_playlist(name)
+        except Exception as e:
+            logging.error(f"Error loading playlist {name}: {str(e)}")
+            return []
 
     def save_playlists(self):
         try:
-            with open(self.filename, "w", encoding='utf-8') as file:
-                json.dump(self.playlists, file, ensure_ascii=False, indent=4)
+            with self.library.transaction():
+                for name, filenames in self.playlists["custom_playlists"].items():
+                    if filenames is not None:
+                        self.library.save_playlist(name, filenames)
         except Exception as e:
             logging.error(f"Error saving playlists: {str(e)}")
 
+    def add_imported_playlist(self, name):
+        """Реєструє список, який PlaylistImporter уже зберіг у медіатеці (викликається в потоці UI)."""
+        self.playlists["custom_playlists"][name] = None
+
     def add_to_favorites(self, video_path):
         if video_path not in self.playlists["favorites"]:
-            self.playlists["favorites"].append(video_path)
-            self.save_playlists()
+            self.playlists["favorites"][video_path] = None
+            self.library.add_favorites([video_path])
             return True
         return False
 
     def remove_from_favorites(self, video_path):
         if video_path in self.playlists["favorites"]:
-            self.playlists["favorites"].remove(video_path)
-            self.save_playlists()
+            del self.playlists["favorites"][video_path]
+            self.library.remove_favorites([video_path])
             return True
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,224 @@
+import random
+from array import array
+
+REPEAT_OFF = 0
+REPEAT_ALL = 1
+REPEAT_ONE = 2
+
+
+class StringTable:
+    """
+    Компактне сховище шляхів: усі рядки в одному bytearray (UTF-8) і масив зсувів.
+    Замість окремого об'єкта str (~50 байт заголовка + посилання в списку) на запис
+    припадає лише довжина самого шляху і 8 байт зсуву.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def add(self, text):
+        """
+        Додає рядок у таблицю
+        Returns:
+            int: Номер рядка
+        """
+        self._data += text.encode("utf-8", "surrogateescape")
+        self._offsets.append(len(self._data))
+        return len(self._offsets) - 2
+
+    def __getitem__(self, index):
+        return self._data[self._offsets[index]:self._offsets[index + 1]].decode("utf-8", "surrogateescape")
+
+    def clear(self):
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+
+
+class PlaylistQueue:
+    def __init__(self, seed=None):
+        """
+        Черга відтворення для дуже великих списків
+        Порядок - масив array('I') номерів рядків у StringTable (4 байти на позицію),
+        перемішування - перестановка Фішера-Єйтса, що будується лише на стільки кроків, скільки переглянуто.
+        Args:
+            seed: Початкове значення генератора для відтворюваного перемішування
+        """
+        self.strings = StringTable()
+        self.order = array('I')
+        self.position = -1
+        self.repeat = REPEAT_OFF
+        self.shuffle = False
+        self._random = random.Random(seed)
+        self._reset_shuffle()
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, position):
+        return self.strings[self.order[position]]
+
+    def __iter__(self):
+        for index in self.order:
+            yield self.strings[index]
+
+    def __bool__(self):
+        return len(self.order) > 0
+
+    def extend(self, paths):
+        """Додає шляхи в кінець черги (наприклад, чергову порцію сканування чи імпорту)."""
+        add = self.strings.add
+        self.order.extend(add(path) for path in paths)
+
+    def clear(self):
+        self.strings.clear()
+        self.order = array('I')
+        self.position = -1
+        self._reset_shuffle()
+
+    def current(self):
+        """Шлях поточного елемента або None."""
+        return self[self.position] if 0 <= self.position < len(self.order) else None
+
+    def set_current(self, position):
+        """Робить елемент поточним (вибір вручну); перемішування продовжується з нього."""
+        self.position = position
+        if self.shuffle:
+            self._reset_shuffle(start=position)
+        return self.current()
+
+    # Перемішування: лінива перестановка позицій черги
+
+    def _reset_shuffle(self, start=None):
+        # Віртуальний масив позицій: _swaps зберігає лише переставлені елементи, решта a[i] = i
+        self._swaps = {}
+        self._shuffled = array('I')
+        self._cursor = -1
+        if start is not None and start >= 0:
+            self._take(start)
+            self._cursor = 0
+
+    def _take(self, position=None):
+        """Виконує наступний крок Фішера-Єйтса (O(1)) і дописує його результат у перестановку."""
+        step = len(self._shuffled)
+        if step >= len(self.order):
+            return False
+        if position is None:
+            chosen = self._random.randrange(step, len(self.order))
+        else:
+            # Обрана вручну позиція відкриває нову перестановку (масив ще тотожний: слот = позиція)
+            chosen = position
+        swaps = self._swaps
+        value_step, value_chosen = swaps.get(step, step), swaps.get(chosen, chosen)
+        swaps[step], swaps[chosen] = value_chosen, value_step
+        self._shuffled.append(value_chosen)
+        del swaps[step]  # Позиція step вже не використовується - пам'ять не росте з переглядом
+        return True
+
+    def _shuffled_at(self, index):
+        while len(self._shuffled) <= index:
+            if not self._take():
+                return None
+        return self._shuffled[index]
+
+    # Навігація
+
+    def peek(self, count=1):
+        """
+        Наступні шляхи без зміни поточного (для попереднього завантаження)
+        Returns:
+            list: До count шляхів у порядку відтворення
+        """
+        result = []
+        if self.repeat == REPEAT_ONE or self.position < 0:
+            return result
+        for step in range(1, count + 1):
+            if self.shuffle:
+                position = self._shuffled_at(self._cursor + step)
+            else:
+                position = self.position + step
+                if position >= len(self.order):
+                    position = position % len(self.order) if self.repeat == REPEAT_ALL else None
+            if position is None:
+                break
+            result.append(self[position])
+        return result
+
+    def advance(self):
+        """
+        Переходить до наступного елемента з урахуванням перемішування і повтору
+        Returns:
+            str: Шлях або None, якщо черга закінчилась
+        """
+        if not self.order:
+            return None
+        if self.repeat == REPEAT_ONE and self.position >= 0:
+            return self.current()
+        if self.shuffle:
+            cursor = self._cursor + 1
+            position = self._shuffled_at(cursor)
+            if position is None:
+                if self.repeat != REPEAT_ALL:
+                    return None
+                self._reset_shuffle()  # Нове коло - нова перестановка
+                cursor = 0
+                position = self._shuffled_at(cursor)
+            self._cursor = cursor
+            self.position = position
+        else:
+            if self.position + 1 >= len(self.order):
+                if self.repeat != REPEAT_ALL:
+                    return None
+                self.position = -1
+            self.position += 1
+        return self.current()
+
+    def back(self):
+        """Повертається до попереднього елемента (при перемішуванні - до попереднього в перестановці)."""
+        if not self.order:
+            return None
+        if self.shuffle:
+            if self._cursor > 0:
+                self._cursor -= 1
+                self.position = self._shuffled[self._cursor]
+        elif self.position > 0:
+            self.position -= 1
+        elif self.repeat == REPEAT_ALL:
+            self.position = len(self.order) - 1
+        return self.current()
+
+    def set_shuffle(self, enabled):
+        self.shuffle = enabled
+        self._reset_shuffle(start=self.position if enabled else None)
+
+    def set_repeat(self, mode):
+        self.repeat = mode
+
+    # Зміна порядку
+
+    def move(self, source, destination):
+        """Переставляє елемент (memmove у масиві з 4-байтних номерів, без копіювання рядків)."""
+        index = self.order.pop(source)
+        self.order.insert(destination, index)
+        if self.position == source:
+            self.position = destination
+        elif source < self.position <= destination:
+            self.position -= 1
+        elif destination <= self.position < source:
+            self.position += 1
+        if self.shuffle:
+            self._reset_shuffle(start=self.position)
+
+    def remove(self, position):
+        """Видаляє елемент з черги; рядок залишається в таблиці до clear()."""
+        del self.order[position]
+        if position < self.position:
+            self.position -= 1
+        elif position == self.position:
+            # Поточний елемент видалено - наступним буде той, що став на його місце
+            self.position -= 1
+        if self.shuffle:
+            self._reset_shuffle(start=self.position)
@@ -0,0 +1,51 @@
+from PyQt5.QtCore import Qt, QPoint, QRect
+from PyQt5.QtWidgets import QSlider, QLabel, QStyle
+from PyQt5.QtGui import QPixmap
+
+
+class PreviewSlider(QSlider):
+    """Повзунок часу, що показує кадр зі спрайта мініатюр під курсором."""
+
+    def __init__(self, orientation=Qt.Horizontal, parent=None):
+        super().__init__(orientation, parent)
+        self.setMouseTracking(True)
+        self._sprite = None
+        self._meta = None
+        self._preview = QLabel(self, Qt.ToolTip)
+        self._preview.hide()
+
+    def set_sprite(self, image, meta):
+        """Задає спрайт поточного медіа (None - прибрати попередній перегляд)."""
+        self._sprite = QPixmap.fromImage(image) if image is not None else None
+        self._meta = meta
+        self._preview.hide()
+
+    def value_at(self, x):
+        return QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), x, self.width())
+
+    def show_preview(self, x):
+        if self._sprite is None:
+            return
+        meta = self._meta
+        fraction = (self.value_at(x) - self.minimum()) / max(1, self.maximum() - self.minimum())
+        index = min(meta["count"] - 1, int(fraction * meta["count"]))
+        width, height = meta["tile_width"], meta["tile_height"]
+        tile = QRect((index % meta["columns"]) * width, (index // meta["columns"]) * height, width, height)
+        self._preview.setPixmap(self._sprite.copy(tile))
+        self._preview.resize(width, height)
+        self._preview.move(self.mapToGlobal(QPoint(x - width // 2, -height - 4)))
+        self._preview.show()
+
+    def mouseMoveEvent(self, event):
+        self.show_preview(event.pos().x())
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        if not self.isSliderDown():
+            self._preview.hide()
+        super().leaveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        if not self.underMouse():
+            self._preview.hide()
@@ -0,0 +1,323 @@
+import os
+import json
+import socket
+import asyncio
+import inspect
+import logging
+import ipaddress
+import threading
+import concurrent.futures
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+# Адреса сервера керування: tcp://127.0.0.1:порт (0 - вільний порт) або unix:/шлях/до/сокета
+DEFAULT_ADDRESS = "tcp://127.0.0.1:8765"
+# Найбільший розмір одного запиту, байт
+MAX_REQUEST_SIZE = 1024 * 1024
+# Скільки сповіщень може чекати на повільного підписника; понад це нові сповіщення відкидаються
+MAX_PENDING_NOTIFICATIONS = 256
+# Скільки секунд запит може чекати на потік інтерфейсу
+CALL_TIMEOUT = 10
+
+# Коди помилок JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RemoteError(Exception):
+    """Помилка, що повертається клієнту як error відповіді JSON-RPC."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def parse_address(address):
+    """
+    Розбирає адресу сервера
+    Returns:
+        tuple: ("unix", шлях) або ("tcp", хост, порт)
+    Raises:
+        ValueError: Невідома схема або не локальна адреса (сервер не має автентифікації)
+    """
+    if address.startswith("unix:"):
+        return "unix", address[5:]
+    if address.startswith("tcp://"):
+        host, _, port = address[6:].rpartition(":")
+        host = host.strip("[]") or "127.0.0.1"
+        if host != "localhost" and not ipaddress.ip_address(host).is_loopback:
+            raise ValueError(f"Control server must listen on a loopback address, got {host}")
+        return "tcp", host, int(port)
+    raise ValueError(f"Unknown control address: {address}")
+
+
+class _Connection:
+    """Один клієнт: черга вихідних рядків і підписка на події (живе в потоці asyncio)."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.outgoing = asyncio.Queue()
+        self.events = None  # None - не підписаний; порожня множина - усі події
+        self.dropped = 0
+        self.task = asyncio.current_task()
+
+    def send(self, message):
+        self.outgoing.put_nowait(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def wants(self, event):
+        return self.events is not None and (not self.events or event in self.events)
+
+
+class ControlServer(QObject):
+    """
+    Сервер керування програвачем: JSON-RPC 2.0 по рядках JSON (TCP на localhost або Unix-сокет),
+    а також один запит POST з тілом JSON-RPC (HTTP/1.1) для curl і простих скриптів.
+    Мережа обслуговується циклом asyncio в окремому потоці; зареєстровані методи виконуються
+    в потоці Qt (через queued-сигнал), тож можуть звертатися до віджетів і MediaController.
+    Підписники отримують сповіщення notify() без опитування.
+    """
+    _invoke = pyqtSignal(object, object, object)
+
+    def __init__(self, address=DEFAULT_ADDRESS, parent=None):
+        super().__init__(parent)
+        self.address = address
+        self.methods = {}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._connections = set()
+        self._started = threading.Event()
+        self._start_error = None
+        self._invoke.connect(self._call, Qt.QueuedConnection)
+
+    def register(self, name, function):
+        """Додає метод; function викликається в потоці Qt з параметрами запиту (за іменами або позиційно)."""
+        self.methods[name] = function
+
+    # Потік Qt
+
+    def start(self):
+        """Запускає потік asyncio і чекає, доки сокет почне приймати з'єднання."""
+        parse_address(self.address)
+        self._thread = threading.Thread(target=self._run, name="ControlServer", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            raise self._start_error
+        logging.info(f"Control server listening on {self.address}")
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    def notify(self, event, **params):
+        """Надсилає подію підписникам (можна викликати з будь-якого потоку)."""
+        loop = self._loop
+        if loop is not None and self._connections:
+            loop.call_soon_threadsafe(self._broadcast, event, params)
+
+    def _call(self, function, params, future):
+        if not future.set_running_or_notify_cancel():
+            return  # Клієнт вже не чекає
+        try:
+            if isinstance(params, dict):
+                future.set_result(function(**params))
+            else:
+                future.set_result(function(*params))
+        except Exception as e:
+            future.set_exception(e)
+
+    # Потік asyncio
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._listen())
+        except Exception as e:
+            self._start_error = e
+            self._loop.close()
+            self._loop = None
+            self._started.set()
+            return
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _listen(self):
+        address = parse_address(self.address)
+        if address[0] == "unix":
+            path = address[1]
+            if os.path.exists(path):
+                os.unlink(path)  # Сокет, що лишився після аварійного завершення
+            self._server = await asyncio.start_unix_server(self._handle_client, path=path, limit=MAX_REQUEST_SIZE)
+            os.chmod(path, 0o600)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, address[1], address[2],
+                                                      limit=MAX_REQUEST_SIZE)
+            if address[2] == 0:
+                host, port = self._server.sockets[0].getsockname()[:2]
+                self.address = f"tcp://{host}:{port}"
+
+    async def _shutdown(self):
+        self._server.close()
+        connections = list(self._connections)
+        for connection in connections:
+            connection.writer.close()
+        # Обробники клієнтів завершуються самі, щойно читання отримає кінець потоку
+        if connections:
+            await asyncio.wait([connection.task for connection in connections], timeout=1)
+        await self._server.wait_closed()
+        address = parse_address(self.address)
+        if address[0] == "unix" and os.path.exists(address[1]):
+            os.unlink(address[1])
+        asyncio.get_running_loop().call_soon(asyncio.get_running_loop().stop)
+
+    def _broadcast(self, event, params):
+        message = {"jsonrpc": "2.0", "method": event, "params": params}
+        for connection in self._connections:
+            if not connection.wants(event):
+                continue
+            if connection.outgoing.qsize() >= MAX_PENDING_NOTIFICATIONS:
+                connection.dropped += 1
+                continue
+            connection.send(message)
+
+    async def _handle_client(self, reader, writer):
+        connection = _Connection(writer)
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Відповіді без затримки Nagle
+        sender = asyncio.ensure_future(self._send_loop(connection))
+        self._connections.add(connection)
+        try:
+            first = await reader.readline()
+            if first.startswith((b"POST ", b"GET ")):
+                await self._handle_http(first, reader, connection)
+                return
+            line = first
+            while line:
+                if line.strip():
+                    response = await self._handle_payload(line, connection)
+                    if response is not None:
+                        connection.send(response)
+                line = await reader.readline()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            connection.send(self._error(None, INVALID_REQUEST, "Request too large"))
+        finally:
+            self._connections.discard(connection)
+            connection.outgoing.put_nowait(None)
+            await sender
+            if connection.dropped:
+                logging.warning(f"Control client missed {connection.dropped} notifications (too slow)")
+
+    async def _send_loop(self, connection):
+        try:
+            while True:
+                data = await connection.outgoing.get()
+                if data is None:
+                    break
+                connection.writer.write(data)
+                await connection.writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            connection.writer.close()
+
+    async def _handle_http(self, request_line, reader, connection):
+        """Один запит HTTP: POST з JSON-RPC у тілі або GET /status."""
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        method, path = request_line.decode("latin-1").split()[:2]
+        if method == "GET" and path == "/status":
+            body = await self._handle_request({"jsonrpc": "2.0", "method": "status", "id": 0}, connection)
+        elif method == "POST":
+            length = int(headers.get("content-length", 0))
+            if length > MAX_REQUEST_SIZE:
+                raise ValueError("Request too large")
+            body = await self._handle_payload(await reader.readexactly(length), connection)
+        else:
+            connection.outgoing.put_nowait(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+        connection.outgoing.put_nowait(
+            f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + data)
+
+    async def _handle_payload(self, data, connection):
+        try:
+            payload = json.loads(data)
+        except ValueError as e:
+            return self._error(None, PARSE_ERROR, f"Parse error: {str(e)}")
+        if isinstance(payload, list):
+            # Пакет виконується по черзі - порядок команд одному програвачу важливий
+            responses = [await self._handle_request(request, connection) for request in payload]
+            return [response for response in responses if response is not None] or None
+        return await self._handle_request(payload, connection)
+
+    async def _handle_request(self, request, connection):
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return self._error(None, INVALID_REQUEST, "Invalid request")
+        request_id = request.get("id")
+        name, params = request["method"], request.get("params", {})
+        try:
+            if not isinstance(params, (dict, list)):
+                raise RemoteError(INVALID_PARAMS, "params must be an object or an array")
+            if name == "subscribe":
+                result = self._subscribe(connection, params)
+            elif name == "unsubscribe":
+                connection.events = None
+                result = True
+            else:
+                result = await self._dispatch(name, params)
+        except RemoteError as e:
+            return self._error(request_id, e.code, e.message) if "id" in request else None
+        except Exception as e:
+            logging.error(f"Error handling control request {name}: {str(e)}")
+            return self._error(request_id, INTERNAL_ERROR, str(e)) if "id" in request else None
+        # Запит без id - сповіщення JSON-RPC, відповідь не надсилається
+        return {"jsonrpc": "2.0", "result": result, "id": request_id} if "id" in request else None
+
+    async def _dispatch(self, name, params):
+        function = self.methods.get(name)
+        if function is None:
+            raise RemoteError(METHOD_NOT_FOUND, f"Method not found: {name}")
+        try:
+            if isinstance(params, dict):
+                inspect.signature(function).bind(**params)
+            else:
+                inspect.signature(function).bind(*params)
+        except TypeError as e:
+            raise RemoteError(INVALID_PARAMS, str(e))
+        future = concurrent.futures.Future()
+        self._invoke.emit(function, params, future)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), CALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise RemoteError(INTERNAL_ERROR, f"{name} timed out waiting for the player")
+        except (ValueError, KeyError, IndexError) as e:
+            raise RemoteError(INVALID_PARAMS, str(e))
+
+    def _subscribe(self, connection, params):
+        events = params.get("events", []) if isinstance(params, dict) else params
+        connection.events = set(events)
+        return sorted(connection.events) or "all"
+
+    @staticmethod
+    def _error(request_id, code, message):
+        return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": request_id}
@@ -1,5 +1,6 @@
 from PyQt5.QtCore import QSettings
 from pathlib import Path
+from InstanceManager import DEFAULT_OPTIONS
 
 class Settings:
     def __init__(self):
@@ -15,5 +16,28 @@ class Settings:
         if self.settings.value('geometry'):
             window.restoreGeometry(self.settings.value('geometry'))
             window.restoreState(self.settings.value('windowState'))
-        window.volume_slider.setValue(self.settings.value('volume', 50))
-        window.last_directory = self.settings.value('last_directory', str(Path.home()))
\ No newline at end of file
+        window.volume_slider.setValue(self.settings.value('volume', 50, type=int))
+        window.last_directory = self.settings.value('last_directory', str(Path.home()))
+
+    def load_vlc_options(self):
+        """
+        Читає параметри libVLC з групи [vlc] (кешування, потоки і апаратне декодування).
+        Відсутні ключі записуються зі значеннями за замовчуванням, щоб їх було видно у файлі налаштувань.
+        Returns:
+            dict: Параметри для InstanceManager.configure
+        """
+        options = {}
+        self.settings.beginGroup('vlc')
+        for key, default in DEFAULT_OPTIONS.items():
+            if not self.settings.contains(key):
+                self.settings.setValue(key, default)
+            options[key] = self.settings.value(key, default, type=type(default))
+        self.settings.endGroup()
+        return options
+
+    def save_vlc_options(self, options):
+        self.settings.beginGroup('vlc')
+        for key in DEFAULT_OPTIONS:
+            if key in options:
+                self.settings.setValue(key, options[key])
+        self.settings.endGroup()
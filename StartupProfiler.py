@@ -0,0 +1,65 @@
+import time
+
+# Момент запуску процесу (модуль імпортується першим у curs.py, до важких залежностей)
+PROCESS_START = time.perf_counter()
+
+import logging
+from PyQt5.QtCore import QThread
+
+
+class StartupProfiler:
+    def __init__(self, start=PROCESS_START):
+        """
+        Фіксує етапи запуску програми і пише звіт у журнал
+        Args:
+            start: Відлік часу (time.perf_counter) - за замовчуванням момент запуску процесу
+        """
+        self.start = start
+        self.marks = []
+        self.reported = set()
+
+    def mark(self, stage):
+        """
+        Запам'ятовує момент завершення етапу (повторні позначки ігноруються)
+        Returns:
+            float: Час від запуску в мс
+        """
+        for name, elapsed in self.marks:
+            if name == stage:
+                return elapsed
+        elapsed = (time.perf_counter() - self.start) * 1000
+        self.marks.append((stage, elapsed))
+        return elapsed
+
+    def elapsed(self, stage):
+        """Повертає час етапу в мс або None, якщо етап ще не завершено."""
+        return next((elapsed for name, elapsed in self.marks if name == stage), None)
+
+    def report(self, title="Startup timing"):
+        """Пише в журнал усі етапи з часом від запуску і тривалістю кожного (один раз для кожного title)."""
+        if title in self.reported:
+            return
+        self.reported.add(title)
+        previous = 0.0
+        parts = []
+        for name, elapsed in self.marks:
+            parts.append(f"{name} {elapsed:.0f} ms (+{elapsed - previous:.0f})")
+            previous = elapsed
+        logging.info(f"{title}: " + ", ".join(parts))
+
+
+class BackgroundTask(QThread):
+    """Виконує повільну ініціалізацію (наприклад, завантаження плагінів libVLC) поза потоком інтерфейсу."""
+
+    def __init__(self, function, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.function()
+        except Exception as e:
+            self.error = e
+            logging.error(f"Error in background initialization: {str(e)}")
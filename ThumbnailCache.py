@@ -0,0 +1,218 @@
+import os
+import json
+import queue
+import ctypes
+import hashlib
+import logging
+import threading
+from pathlib import Path
+import vlc
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+from InstanceManager import InstanceManager
+
+# Розміри одного кадру мініатюри та сітки спрайта
+TILE_WIDTH = 160
+TILE_HEIGHT = 90
+SPRITE_COLUMNS = 10
+MAX_FRAMES = 100
+MIN_INTERVAL_MS = 2000
+
+
+class ThumbnailCache:
+    def __init__(self, directory=None, max_bytes=200 * 1024 * 1024):
+        """
+        Дисковий кеш спрайтів мініатюр з витісненням найдавніше використаних
+        Args:
+            directory: Тека кешу (за замовчуванням ~/.cache/VideoPlayer/thumbnails)
+            max_bytes: Максимальний сумарний розмір кешу
+        """
+        self.directory = Path(directory or Path.home() / ".cache" / "VideoPlayer" / "thumbnails")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logging.error(f"Error creating thumbnail cache {self.directory}: {str(e)}")
+
+    def key(self, media_path):
+        """Ключ кешу: шлях + mtime + розмір, тож змінений файл отримує новий спрайт."""
+        stat = os.stat(media_path)
+        return hashlib.sha1(f"{media_path}\0{stat.st_mtime_ns}\0{stat.st_size}".encode("utf-8")).hexdigest()
+
+    def get(self, media_path):
+        """
+        Повертає збережений спрайт
+        Returns:
+            tuple: (QImage, dict з параметрами сітки) або None
+        """
+        try:
+            key = self.key(media_path)
+            image_path, meta_path = self.directory / f"{key}.jpg", self.directory / f"{key}.json"
+            if not image_path.exists() or not meta_path.exists():
+                return None
+            image = QImage(str(image_path))
+            if image.isNull():
+                return None
+            with open(meta_path, "r", encoding='utf-8') as file:
+                meta = json.load(file)
+            os.utime(image_path)  # Позначка останнього використання для LRU
+            return image, meta
+        except Exception as e:
+            logging.error(f"Error reading thumbnail cache: {str(e)}")
+            return None
+
+    def store(self, media_path, image, meta):
+        """Зберігає спрайт (атомарно через тимчасові файли) і витісняє старі записи."""
+        try:
+            key = self.key(media_path)
+            image_path, meta_path = self.directory / f"{key}.jpg", self.directory / f"{key}.json"
+            tmp_image = self.directory / f"{key}.tmp.jpg"
+            if not image.save(str(tmp_image), "JPG", 80):
+                raise OSError(f"cannot write {tmp_image}")
+            with open(f"{meta_path}.tmp", "w", encoding='utf-8') as file:
+                json.dump(meta, file)
+            os.replace(f"{meta_path}.tmp", meta_path)
+            os.replace(tmp_image, image_path)
+            self.evict()
+        except Exception as e:
+            logging.error(f"Error writing thumbnail cache: {str(e)}")
+
+    def evict(self):
+        """Видаляє найдавніше використані спрайти, поки кеш більший за max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".jpg") and not entry.name.endswith(".tmp.jpg"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            entries.sort()
+            # Найсвіжіший запис (щойно збережений) не витісняється
+            for _, size, image_path in entries[:-1]:
+                if total <= self.max_bytes:
+                    break
+                for path in (image_path, image_path[:-len(".jpg")] + ".json"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+
+
+class ThumbnailExtractor(QThread):
+    """
+    Фоновий генератор спрайтів мініатюр через спільний libVLC без виводу на екран:
+    кадри декодуються у пам'ять через video callbacks у зменшеному розмірі.
+    """
+    sprite_ready = pyqtSignal(str, QImage, dict)
+
+    FRAME_TIMEOUT = 2.0
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self._requests = queue.Queue()
+        self._frame_ready = threading.Event()
+        self._buffer = ctypes.create_string_buffer(TILE_WIDTH * TILE_HEIGHT * 4)
+        # Посилання на ctypes-колбеки мають жити весь час роботи програвача
+        self._lock_cb = vlc.CallbackDecorators.VideoLockCb(self._lock_frame)
+        self._unlock_cb = vlc.CallbackDecorators.VideoUnlockCb(lambda opaque, picture, planes: None)
+        self._display_cb = vlc.CallbackDecorators.VideoDisplayCb(lambda opaque, picture: self._frame_ready.set())
+
+    def request(self, media_path):
+        """Ставить файл у чергу; новіший запит скасовує попередній."""
+        self._requests.put(media_path)
+        if not self.isRunning():
+            self.start()
+
+    def cancel(self):
+        self.requestInterruption()
+        self._requests.put(None)
+
+    def _lock_frame(self, opaque, planes):
+        planes[0] = ctypes.addressof(self._buffer)
+        return None
+
+    def _superseded(self):
+        return self.isInterruptionRequested() or not self._requests.empty()
+
+    def run(self):
+        try:
+            instance = InstanceManager.shared().acquire()
+        except Exception as e:
+            logging.error(f"Error initializing thumbnail extractor: {str(e)}")
+            return
+        try:
+            while not self.isInterruptionRequested():
+                media_path = self._requests.get()
+                # Обробляється лише останній запит
+                while not self._requests.empty():
+                    media_path = self._requests.get()
+                if media_path is None:
+                    continue
+                cached = self.cache.get(media_path)
+                if cached is None:
+                    cached = self.extract(instance, media_path)
+                    if cached is not None:
+                        self.cache.store(media_path, *cached)
+                if cached is not None:
+                    self.sprite_ready.emit(media_path, *cached)
+        finally:
+            InstanceManager.shared().release()
+
+    def extract(self, instance, media_path):
+        """Декодує кадри через рівні інтервали і складає їх у спрайт."""
+        player = None
+        media = None
+        try:
+            media = instance.media_new(media_path)
+            media.add_option(":no-audio")
+            parsed = threading.Event()
+            media.event_manager().event_attach(vlc.EventType.MediaParsedChanged, lambda event: parsed.set())
+            media.parse_with_options(vlc.MediaParseFlag.local, 5000)
+            parsed.wait(6)
+            duration = media.get_duration()
+            if duration <= 0:
+                return None
+            count = max(1, min(MAX_FRAMES, duration // MIN_INTERVAL_MS))
+            interval = duration // count
+            rows = (count + SPRITE_COLUMNS - 1) // SPRITE_COLUMNS
+            sprite = QImage(TILE_WIDTH * min(count, SPRITE_COLUMNS), TILE_HEIGHT * rows, QImage.Format_RGB32)
+            sprite.fill(0)
+
+            player = instance.media_player_new()
+            player.video_set_callbacks(self._lock_cb, self._unlock_cb, self._display_cb, None)
+            player.video_set_format("RV32", TILE_WIDTH, TILE_HEIGHT, TILE_WIDTH * 4)
+            player.set_media(media)
+            self._frame_ready.clear()
+            player.play()
+            if not self._frame_ready.wait(self.FRAME_TIMEOUT * 2):
+                return None
+            painter = QPainter(sprite)
+            try:
+                for index in range(count):
+                    if self._superseded():
+                        return None
+                    self._frame_ready.clear()
+                    player.set_time(index * interval + interval // 2)
+                    if not self._frame_ready.wait(self.FRAME_TIMEOUT):
+                        continue
+                    frame = QImage(self._buffer.raw, TILE_WIDTH, TILE_HEIGHT, QImage.Format_RGB32)
+                    painter.drawImage((index % SPRITE_COLUMNS) * TILE_WIDTH,
+                                      (index // SPRITE_COLUMNS) * TILE_HEIGHT, frame)
+            finally:
+                painter.end()
+            meta = {"interval_ms": interval, "count": count, "columns": SPRITE_COLUMNS,
+                    "tile_width": TILE_WIDTH, "tile_height": TILE_HEIGHT}
+            return sprite, meta
+        except Exception as e:
+            logging.error(f"Error extracting thumbnails for {media_path}: {str(e)}")
+            return None
+        finally:
+            if player is not None:
+                player.stop()
+                player.release()
+            if media is not None:
+                media.release()
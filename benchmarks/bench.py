@@ -0,0 +1,364 @@
+"""
+Бенчмарки менеджерів історії/улюблених, бокової панелі і гарячих шляхів MediaController.
+
+    python benchmarks/bench.py                       # імітація vlc, 1k/10k/100k записів
+    python benchmarks/bench.py --sizes 1000 10000    # швидший прогін
+    python benchmarks/bench.py --save-baseline       # записати результати в benchmarks/baseline.json
+    python benchmarks/bench.py --compare             # порівняти з baseline (код 1 при регресії)
+    python benchmarks/bench.py --real-vlc            # справжній libVLC на кліпах, згенерованих ffmpeg
+
+Усі дані (база, налаштування, журнал) створюються в тимчасовій теці - профіль користувача не змінюється.
+"""
+import gc
+import os
+import sys
+import itertools
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+# Кількість операцій для бенчмарків, що не залежать від розміру історії
+CONTROLLER_OPS = 2000
+# Бокова панель перевіряється на меншій кількості записів - кожен рядок оновлює модель Qt
+UI_MAX_ENTRIES = 10000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="VideoPlayer benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="history/favorites sizes to benchmark")
+    parser.add_argument("--real-vlc", action="store_true",
+                        help="use the installed libVLC and clips generated with ffmpeg instead of the fake vlc module")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store results in {BASELINE_FILE}")
+    parser.add_argument("--compare", action="store_true", help="compare results with the stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown (fraction) reported as a regression, default 0.2")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="repeat every benchmark and keep the best round (less noise), default 3")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for access patterns")
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+WORK_DIR = tempfile.mkdtemp(prefix="videoplayer-bench-")
+if not ARGS.real_vlc:
+    sys.path.insert(0, os.path.join(BENCH_DIR, "fake_vlc"))
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(1 if not ARGS.real_vlc else 0, REPO_DIR)
+# curs.py пише журнал у поточну теку, MediaLibrary створює library.db там само
+os.chdir(WORK_DIR)
+
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import QSettings
+
+QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, WORK_DIR)
+QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, WORK_DIR)
+app = QtWidgets.QApplication(sys.argv[:1])
+
+import vlc
+from MediaLibrary import MediaLibrary
+from HistoryManager import HistoryManager
+from PlaylistManager import PlaylistManager
+from ListModels import HistoryListModel
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies_ns, items=None):
+    """
+    Args:
+        latencies_ns: Тривалість кожної операції в нс
+        items: Кількість оброблених записів (для масових операцій - завантаження, збереження)
+    Returns:
+        dict: Пропускна здатність (операцій або записів за секунду) і перцентилі латентності в мкс
+    """
+    values = sorted(latencies_ns)
+    total = sum(values) or 1
+    result = {"ops": len(values),
+              "ops_per_sec": round(len(values) * 1e9 / total, 1),
+              "p50_us": round(percentile(values, 0.50) / 1000, 2),
+              "p95_us": round(percentile(values, 0.95) / 1000, 2),
+              "p99_us": round(percentile(values, 0.99) / 1000, 2),
+              "max_us": round(values[-1] / 1000, 2) if values else 0.0}
+    if items is not None:
+        result["items_per_sec"] = round(items * len(values) * 1e9 / total, 1)
+    return result
+
+
+def measure(operations):
+    """Виконує кожну функцію зі списку, вимірюючи їх по одній (як timeit - з вимкненим збирачем сміття)."""
+    latencies = []
+    clock = time.perf_counter_ns
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for operation in operations:
+            start = clock()
+            operation()
+            latencies.append(clock() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return latencies
+
+
+def measure_repeated(function, repeat):
+    return measure([function] * repeat)
+
+
+_library_ids = itertools.count()
+
+
+def new_library(name):
+    directory = os.path.join(WORK_DIR, f"{name}-{next(_library_ids)}")
+    os.makedirs(directory, exist_ok=True)
+    return MediaLibrary(os.path.join(directory, "library.db"),
+                        history_filename=os.path.join(directory, "history.json"),
+                        favorites_filename=os.path.join(directory, "favorites.json"),
+                        playlist_filename=os.path.join(directory, "playlists.json"),
+                        save_delay=3600)  # Записи фіксуються лише явним flush() - його і вимірюємо
+
+
+def file_names(count, prefix="/media/video"):
+    return [f"{prefix}/{index // 1000:03d}/clip_{index:06d}.mp4" for index in range(count)]
+
+
+def bench_history(size, results, rng):
+    library = new_library(f"history-{size}")
+    manager = HistoryManager(library)
+    names = file_names(size)
+    results[f"history.add_to_history[{size}]"] = summarize(
+        measure([lambda name=name: manager.add_to_history(name, "00:00:00") for name in names]))
+    # Збереження - фіксація всієї черги записів в одній транзакції
+    results[f"history.save[{size}]"] = summarize(measure_repeated(library.flush, 1), items=size)
+    sample = [rng.choice(names) for _ in range(min(size, 10000))]
+    results[f"history.update_position[{size}]"] = summarize(
+        measure([lambda name=name, ms=ms: manager.update_position(name, ms, "00:00:01")
+                 for ms, name in enumerate(sample, 1)]))
+    library.flush()
+    results[f"history.contains[{size}]"] = summarize(
+        measure([lambda name=name: manager.contains(name) for name in sample]))
+    results[f"history.load[{size}]"] = summarize(measure_repeated(lambda: HistoryManager(library), 3), items=size)
+
+    def fill_model():
+        # Бокова панель, прокручена до кінця: усі порції fetchMore
+        model = HistoryListModel(manager)
+        while model.canFetchMore():
+            model.fetchMore()
+    results[f"history.model_fill[{size}]"] = summarize(measure_repeated(fill_model, 3), items=size)
+    library.close()
+
+
+def bench_favorites(size, results, rng):
+    library = new_library(f"favorites-{size}")
+    manager = PlaylistManager(library)
+    names = file_names(size, "/media/favorites")
+    results[f"favorites.add[{size}]"] = summarize(
+        measure([lambda name=name: manager.add_to_favorites(name) for name in names]))
+    library.flush()
+    sample = rng.sample(names, min(size // 2, 10000))
+    results[f"favorites.remove[{size}]"] = summarize(
+        measure([lambda name=name: manager.remove_from_favorites(name) for name in sample]))
+    results[f"favorites.save[{size}]"] = summarize(measure_repeated(library.flush, 1), items=len(sample))
+    results[f"favorites.load[{size}]"] = summarize(
+        measure_repeated(lambda: PlaylistManager(library), 3), items=size - len(sample))
+    library.close()
+
+
+def create_window():
+    from curs import VideoPlayer
+    window = VideoPlayer()
+    window.show()
+    window.finish_startup()
+    window.vlc_loader.wait()
+    app.processEvents()
+    return window
+
+
+def bench_side_panel(size, results, window):
+    """Шлях оновлення списків бокової панелі: запис в історію і оновлення моделі Qt."""
+    count = min(size, UI_MAX_ENTRIES)
+    names = file_names(count, f"/media/ui-{size}-{next(_library_ids)}")
+    results[f"ui.add_to_history[{count}]"] = summarize(
+        measure([lambda name=name: window.add_to_history(name, "00:00:00") for name in names]))
+    window.library.flush()
+
+
+def create_clips(count):
+    """Генерує короткі тестові кліпи через ffmpeg; без ffmpeg повертає []."""
+    if shutil.which("ffmpeg") is None:
+        return []
+    clips = []
+    for index in range(count):
+        path = os.path.join(WORK_DIR, f"clip_{index}.mp4")
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-y", "-f", "lavfi",
+                        "-i", f"testsrc=duration=20:size=640x360:rate=25", "-f", "lavfi",
+                        "-i", "sine=frequency=440:duration=20", "-c:v", "libx264", "-g", "25",
+                        "-c:a", "aac", "-shortest", path], check=True)
+        clips.append(path)
+    return clips
+
+
+def media_files(count):
+    """Файли для set_media: справжні кліпи або порожні файли (імітації vlc вміст не потрібен)."""
+    if ARGS.real_vlc:
+        return create_clips(count)
+    files = []
+    for index in range(count):
+        path = os.path.join(WORK_DIR, f"media_{index}.mp4")
+        open(path, "wb").close()
+        files.append(path)
+    return files
+
+
+def bench_controller_fake(results, window):
+    controller = window.media_controller
+    files = media_files(16)
+    results["controller.set_media"] = summarize(
+        measure([lambda path=files[index % len(files)]: controller.set_media(path) for index in range(CONTROLLER_OPS)]))
+    controller.play()
+    controller.signals.length_changed.emit(600000)
+    app.processEvents()
+    results["controller.seek_relative"] = summarize(
+        measure([lambda: controller.seek_relative(10000)] * CONTROLLER_OPS))
+
+    def exact_seek(position):
+        controller.seek_to_position(position, dragging=False)
+    results["controller.seek_to_position"] = summarize(
+        measure([lambda position=index / CONTROLLER_OPS: exact_seek(position) for index in range(CONTROLLER_OPS)]))
+    # Подія TimeChanged від libVLC до оновлення повзунка і мітки часу (замість опитування таймером)
+    events = controller.player.event_manager()
+    results["controller.time_changed_event"] = summarize(
+        measure([lambda ms=ms: events.fire(vlc.EventType.MediaPlayerTimeChanged, new_time=ms)
+                 for ms in range(0, CONTROLLER_OPS * 40, 40)]))
+    results["controller.get_last_time"] = summarize(measure([controller.get_last_time] * CONTROLLER_OPS))
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.001)
+    return True
+
+
+def bench_controller_real(results, window):
+    clips = media_files(3)
+    if not clips:
+        print("ffmpeg not found - real libVLC benchmarks skipped")
+        return
+    controller = window.media_controller
+    times = []
+    controller.signals.time_changed.connect(times.append)
+
+    def first_frame(path):
+        times.clear()
+        controller.set_media(path)
+        controller.play()
+        wait_for(lambda: times and times[-1] > 0)
+    results["vlc.open_to_first_time_changed"] = summarize(
+        measure([lambda path=clips[index % len(clips)]: first_frame(path) for index in range(6)]))
+
+    def seek(target):
+        controller.set_time(target)
+        times.clear()
+        wait_for(lambda: times and abs(times[-1] - target) < 1000)
+    rng = random.Random(ARGS.seed)
+    results["vlc.seek_to_time_changed"] = summarize(
+        measure([lambda target=rng.randrange(1000, 18000): seek(target) for _ in range(20)]))
+    results["vlc.get_time"] = summarize(measure([controller.get_time] * CONTROLLER_OPS))
+    controller.stop()
+
+
+def print_results(results, baseline):
+    header = f"{'benchmark':42} {'ops/s':>12} {'items/s':>12} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}"
+    if baseline:
+        header += f" {'vs base':>9}"
+    print(header)
+    print("-" * len(header))
+    regressions = []
+    for name, result in results.items():
+        items = f"{result['items_per_sec']:12.1f}" if "items_per_sec" in result else f"{'-':>12}"
+        line = (f"{name:42} {result['ops_per_sec']:12.1f} {items} "
+                f"{result['p50_us']:10.2f} {result['p95_us']:10.2f} {result['p99_us']:10.2f}")
+        reference = baseline.get(name) if baseline else None
+        if reference:
+            # Масові операції порівнюються за пропускною здатністю, решта - за медіаною (стійкіша до викидів)
+            if "items_per_sec" in result:
+                change = result["items_per_sec"] / reference["items_per_sec"] - 1 if reference.get("items_per_sec") else 0.0
+            else:
+                change = reference["p50_us"] / result["p50_us"] - 1 if result["p50_us"] else 0.0
+            line += f" {change:+8.1%}"
+            if change < -ARGS.threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def keep_best(results, round_results):
+    """Залишає для кожного бенчмарку раунд з найбільшою пропускною здатністю."""
+    for name, result in round_results.items():
+        key = "items_per_sec" if "items_per_sec" in result else "ops_per_sec"
+        if name not in results or result[key] > results[name][key]:
+            results[name] = result
+
+
+def main():
+    rng = random.Random(ARGS.seed)
+    results = {}
+    try:
+        window = create_window()
+        for _ in range(max(1, ARGS.rounds)):
+            round_results = {}
+            for size in ARGS.sizes:
+                bench_history(size, round_results, rng)
+                bench_favorites(size, round_results, rng)
+                bench_side_panel(size, round_results, window)
+            if ARGS.real_vlc:
+                bench_controller_real(round_results, window)
+            else:
+                bench_controller_fake(round_results, window)
+            keep_best(results, round_results)
+        window.close()
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    baseline = {}
+    if ARGS.compare:
+        try:
+            with open(BASELINE_FILE, encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"No usable baseline in {BASELINE_FILE}: {e}")
+    regressions = print_results(results, baseline)
+
+    if ARGS.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(),
+                       "real_vlc": ARGS.real_vlc, "results": results}, f, indent=2)
+        print(f"Baseline saved to {BASELINE_FILE}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {ARGS.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
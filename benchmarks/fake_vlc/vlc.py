@@ -0,0 +1,208 @@
+"""
+Імітація python-vlc для бенчмарків: ті самі імена, що використовує програвач, без libVLC.
+Виклики миттєві, тож вимірюється лише власний код програвача (Python, Qt, SQLite).
+"""
+import types
+
+
+class _Enum(int):
+    def __new__(cls, value):
+        return int.__new__(cls, value)
+
+
+class EventType(_Enum):
+    pass
+
+
+for _value, _name in enumerate((
+        "MediaPlayerTimeChanged", "MediaPlayerLengthChanged", "MediaPlayerPlaying", "MediaPlayerPaused",
+        "MediaPlayerEndReached", "MediaPlayerStopped", "MediaPlayerBuffering", "MediaPlayerEncounteredError",
+        "MediaPlayerPositionChanged", "MediaPlayerVout", "MediaParsedChanged",
+        "MediaListPlayerNextItemSet", "MediaListPlayerPlayed")):
+    setattr(EventType, _name, EventType(_value))
+
+
+class MediaParseFlag:
+    local = 0
+    network = 1
+
+
+class MediaParsedStatus(_Enum):
+    pass
+
+
+MediaParsedStatus.done = MediaParsedStatus(4)
+
+
+class TrackType(_Enum):
+    _enum_names_ = {0: "audio", 1: "video"}
+
+
+TrackType.audio = TrackType(0)
+TrackType.video = TrackType(1)
+
+
+class State(_Enum):
+    _enum_names_ = {0: "NothingSpecial", 1: "Opening", 2: "Buffering", 3: "Playing", 4: "Paused",
+                    5: "Stopped", 6: "Ended", 7: "Error"}
+
+
+class VideoMarqueeOption:
+    Enable, Text, Color, Opacity, Position, Refresh, Size, Timeout, X, Y = range(10)
+
+
+class MediaStats:
+    def __init__(self):
+        for field in ("read_bytes", "input_bitrate", "demux_read_bytes", "demux_bitrate", "demux_corrupted",
+                      "demux_discontinuity", "decoded_video", "decoded_audio", "displayed_pictures",
+                      "lost_pictures", "played_abuffers", "lost_abuffers"):
+            setattr(self, field, 0)
+
+
+class CallbackDecorators:
+    VideoLockCb = VideoUnlockCb = VideoDisplayCb = VideoFormatCb = VideoCleanupCb = staticmethod(lambda f: f)
+
+
+class EventManager:
+    def __init__(self):
+        self.callbacks = {}
+
+    def event_attach(self, event_type, callback, *args):
+        self.callbacks.setdefault(event_type, []).append(callback)
+
+    def event_detach(self, event_type):
+        self.callbacks.pop(event_type, None)
+
+    def fire(self, event_type, **fields):
+        """Викликає обробники так, як це робить потік подій libVLC."""
+        event = types.SimpleNamespace(type=event_type, u=types.SimpleNamespace(**fields))
+        for callback in self.callbacks.get(event_type, ()):
+            callback(event)
+
+
+class Media:
+    def __init__(self, mrl, *options):
+        self.mrl = mrl
+        self.options = list(options)
+        self._events = EventManager()
+        self._status = 0
+
+    def event_manager(self):
+        return self._events
+
+    def add_option(self, option):
+        self.options.append(option)
+
+    def parse_with_options(self, flags, timeout):
+        self._status = 4
+        self._events.fire(EventType.MediaParsedChanged, new_status=4)
+        return 0
+
+    def get_parsed_status(self):
+        return self._status
+
+    def get_duration(self):
+        return 600000
+
+    def get_mrl(self):
+        return self.mrl
+
+    def tracks_get(self):
+        return iter(())
+
+    def get_stats(self, stats):
+        return True
+
+    def release(self):
+        pass
+
+
+class MediaList(list):
+    def add_media(self, media):
+        self.append(media)
+
+    def count(self):
+        return len(self)
+
+    def remove_index(self, index):
+        del self[index]
+        return 0
+
+    def lock(self):
+        pass
+
+    def unlock(self):
+        pass
+
+    def release(self):
+        pass
+
+
+class _Stub:
+    """Будь-який не описаний метод libVLC нічого не робить і повертає 0."""
+
+    def __getattr__(self, name):
+        return lambda *args: 0
+
+
+class MediaPlayer(_Stub):
+    def __init__(self):
+        self._events = EventManager()
+        self._media = None
+        self._time = 0
+
+    def event_manager(self):
+        return self._events
+
+    def set_media(self, media):
+        self._media = media
+
+    def get_media(self):
+        return self._media
+
+    def set_time(self, time_ms):
+        self._time = time_ms
+
+    def get_time(self):
+        return self._time
+
+    def get_length(self):
+        return 600000
+
+    def is_playing(self):
+        return 1
+
+
+class MediaListPlayer(_Stub):
+    def __init__(self):
+        self._events = EventManager()
+
+    def event_manager(self):
+        return self._events
+
+
+class Instance:
+    def __init__(self, *args):
+        self.args = args
+
+    def media_player_new(self):
+        return MediaPlayer()
+
+    def media_list_player_new(self):
+        return MediaListPlayer()
+
+    def media_list_new(self):
+        return MediaList()
+
+    def media_new(self, mrl, *options):
+        return Media(mrl, *options)
+
+    def media_new_location(self, mrl, *options):
+        return Media(mrl, *options)
+
+    def release(self):
+        pass
+
+
+def libvlc_media_get_codec_description(track_type, codec):
+    return b"H264"
@@ -0,0 +1,121 @@
+"""
+Споживач кадрів з кільця FrameRing в іншому процесі - перевірка пропускної здатності і затримки.
+
+    python headless.py play clip.mp4 --capture 1920x1080 --shm vp_frames &
+    python benchmarks/frame_consumer.py vp_frames --seconds 30          # кадри справжнього відтворення
+    python benchmarks/frame_consumer.py --synthetic 1920x1080 --fps 60  # без libVLC: запис імітує декодер
+
+Робота над кадром (--work): adler32 (прохід по всіх байтах без копіювання), mean (numpy) або none.
+Звіт: отримані і пропущені кадри, перезаписані під час обробки (torn), затримка від публікації до читача.
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import ctypes
+import argparse
+import threading
+import subprocess
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from FrameRing import FrameRing, FrameReader, numpy
+
+
+def consume(name, seconds, work):
+    reader = FrameReader(name)
+    received = missed = torn = 0
+    latencies = []
+    busy = 0.0
+    last = reader.sequence
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            latest = reader.read(last, timeout=0.5)
+            if latest is None:
+                continue
+            sequence, slot = latest
+            latencies.append((time.monotonic_ns() - reader.timestamp(slot)) / 1e6)
+            started = time.perf_counter()
+            if work == "adler32":
+                zlib.adler32(reader.frame(slot))
+            elif work == "mean":
+                reader.array(slot)[:, :, :3].mean()
+            busy += time.perf_counter() - started
+            if not reader.is_valid(sequence, slot):
+                torn += 1
+            missed += sequence - last - 1 if last else 0
+            received += 1
+            last = sequence
+    finally:
+        reader.close()
+    latencies.sort()
+    return {
+        "frame": f"{reader.width}x{reader.height}",
+        "received": received,
+        "fps": round(received / seconds, 1),
+        "missed": missed,
+        "torn": torn,
+        "work_ms": round(busy * 1000 / received, 3) if received else 0,
+        "latency_ms_p50": round(latencies[len(latencies) // 2], 3) if latencies else 0,
+        "latency_ms_p99": round(latencies[int(len(latencies) * 0.99)], 3) if latencies else 0,
+    }
+
+
+def synthetic_writer(ring, fps, stop, depth=3):
+    """
+    Імітує vmem libVLC: lock -> заповнення кадру в C -> display з частотою fps;
+    як і декодер, тримає depth кадрів заблокованими до показу
+    """
+    planes = (ctypes.c_void_p * 1)()
+    interval = 1.0 / fps
+    next_frame = time.perf_counter()
+    value = 0
+    pictures = deque()
+    while not stop.is_set():
+        pictures.append(ring._lock(None, planes))
+        ctypes.memset(planes[0], value, ring.frame_size)
+        if len(pictures) >= depth:
+            ring._display(None, pictures.popleft())
+        value = (value + 1) % 256
+        next_frame += interval
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read frames from a FrameRing in shared memory.")
+    parser.add_argument("name", nargs="?", help="Shared memory name (headless.py play --capture ... --shm NAME)")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--work", choices=("adler32", "mean", "none"), default="adler32")
+    parser.add_argument("--synthetic", metavar="WxH", help="Write synthetic frames instead of attaching to a player")
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--slots", type=int, default=8)
+    args = parser.parse_args(argv)
+    if args.work == "mean" and numpy is None:
+        parser.error("--work mean requires numpy")
+
+    if args.synthetic is None:
+        if args.name is None:
+            parser.error("a shared memory name or --synthetic is required")
+        print(json.dumps(consume(args.name, args.seconds, args.work)))
+        return
+    width, height = (int(value) for value in args.synthetic.lower().split("x"))
+    ring = FrameRing(width, height, args.slots, shared=True)
+    stop = threading.Event()
+    writer = threading.Thread(target=synthetic_writer, args=(ring, args.fps, stop), daemon=True)
+    writer.start()
+    try:
+        # Окремий інтерпретатор, як у справжнього споживача (власний resource_tracker)
+        subprocess.run([sys.executable, os.path.abspath(__file__), ring.name, "--seconds", str(args.seconds),
+                        "--work", args.work], check=True)
+    finally:
+        stop.set()
+        writer.join()
+        ring.close()
+
+
+if __name__ == "__main__":
+    main()
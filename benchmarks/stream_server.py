@@ -0,0 +1,125 @@
+"""
+Локальний HTTP-сервер потоку з імітацією збоїв мережі - для перевірки перепідключення StreamMonitor.
+
+    python benchmarks/stream_server.py clip.ts --live                  # нескінченний живий потік
+    python benchmarks/stream_server.py clip.ts --live --drop-after 20  # обрив з'єднання кожні 20 с
+    python benchmarks/stream_server.py clip.ts --live --stall-after 10 --stall-for 15   # зависання
+    python benchmarks/stream_server.py clip.mp4 --fail-first 3         # перші 3 запити - 503
+
+Програвач відкриває http://127.0.0.1:8080/stream (File > Open Network Stream).
+Для живого режиму зручний MPEG-TS: файл повторюється по колу без заголовків.
+RTSP-замінник дає сам VLC: cvlc clip.ts --loop --sout '#rtp{sdp=rtsp://:8554/stream}'
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CHUNK_SIZE = 16 * 1024
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"{time.strftime('%H:%M:%S')} {self.address_string()} {format % args}\n")
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            request_number = server.requests
+        if request_number <= server.args.fail_first:
+            self.send_error(503, "Injected failure")
+            return
+        if self.path.split("?")[0] != "/stream":
+            self.send_error(404)
+            return
+        size = os.path.getsize(server.args.file)
+        start = 0
+        if server.args.live:
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp2t")
+            self.send_header("Connection", "close")
+            self.end_headers()
+        else:
+            match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+            start = int(match.group(1)) if match else 0
+            if start >= size:
+                self.send_error(416)
+                return
+            self.send_response(206 if match else 200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(size - start))
+            if match:
+                self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            self.end_headers()
+        self.stream(start)
+
+    def stream(self, offset):
+        """Віддає файл зі швидкістю --rate, з обривом і зависанням за розкладом."""
+        args = self.server.args
+        started = time.monotonic()
+        sent = 0
+        stalled = False
+        with open(args.file, "rb") as f:
+            f.seek(offset)
+            while True:
+                elapsed = time.monotonic() - started
+                if args.drop_after and elapsed >= args.drop_after:
+                    self.log_message("dropping connection after %.0f s", elapsed)
+                    return
+                if args.stall_after and not stalled and elapsed >= args.stall_after:
+                    stalled = True
+                    self.log_message("stalling for %.0f s", args.stall_for)
+                    time.sleep(args.stall_for)
+                    started += args.stall_for
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    if not args.live:
+                        return
+                    f.seek(0)
+                    continue
+                try:
+                    self.wfile.write(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                sent += len(chunk)
+                # Обмеження швидкості: не випереджати розрахунковий бітрейт
+                ahead = sent * 8 / (args.rate * 1000) - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP stream stand-in with injected network faults.")
+    parser.add_argument("file", help="Media file to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rate", type=float, default=4000, help="Send rate, kbit/s")
+    parser.add_argument("--live", action="store_true", help="Loop the file forever without Content-Length")
+    parser.add_argument("--drop-after", type=float, default=0, help="Close each connection after N seconds")
+    parser.add_argument("--stall-after", type=float, default=0, help="Stop sending after N seconds ...")
+    parser.add_argument("--stall-for", type=float, default=15, help="... for this many seconds")
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with 503")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), StreamHandler)
+    server.args = args
+    server.requests = 0
+    server.lock = threading.Lock()
+    print(f"Serving {args.file} at http://{args.host}:{args.port}/stream", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,41 @@
+from StartupProfiler import StartupProfiler, BackgroundTask
 import sys
 import os
+import time
+import argparse
 from PyQt5 import QtWidgets, QtGui
 from PyQt5.QtWidgets import (QMessageBox, QLabel, 
                            QSlider, QAction, QFileDialog,
-                           QVBoxLayout, QHBoxLayout, QDockWidget, QHBoxLayout, QListWidget, QPushButton, QWidget)
+                           QVBoxLayout, QHBoxLayout, QDockWidget, QHBoxLayout, QListView, QPushButton, QWidget,
+                           QLineEdit, QComboBox, QInputDialog)
 from PyQt5.QtCore import Qt, QTimer
 from pathlib import Path
 import logging
-from MediaController import MediaController
 from Settings import Settings
+from InstanceManager import InstanceManager
+from MediaLibrary import MediaLibrary
 from HistoryManager import HistoryManager
 from PlaylistManager import PlaylistManager
+from ListModels import HistoryListModel, FavoritesListModel, LibraryListModel
+from FolderScanner import FolderScanner, LibraryWatcher, video_file_filter
+from PlaylistFormats import PlaylistImporter, playlist_file_filter, write_playlist
+from PlaylistQueue import PlaylistQueue, REPEAT_OFF, REPEAT_ALL, REPEAT_ONE
+from PreviewSlider import PreviewSlider
+from PlaybackTelemetry import PlaybackTelemetry
+from NetworkStream import StreamMonitor, is_stream_url
+from probe import LibraryProber
+
+# Як часто під час відтворення зберігається позиція для продовження перегляду, с
+POSITION_CHECKPOINT_INTERVAL = 15
+# Найбільша кількість плиток у режимі кількох переглядів
+MAX_MULTI_VIEW = 16
+
+
+
+def load_vlc_instance():
+    """Імпортує python-vlc і створює екземпляр libVLC (виконується у фоновому потоці під час запуску)."""
+    from MediaController import create_instance
+    return create_instance()
 
 # Configure logging
 logging.basicConfig(
@@ -20,16 +45,28 @@ logging.basicConfig(
 )
 
 class VideoPlayer(QtWidgets.QMainWindow):
-    def __init__(self):
+    def __init__(self, control_address=None):
+        """
+        Args:
+            control_address: Адреса сервера віддаленого керування (tcp://127.0.0.1:порт або unix:/шлях); None - вимкнено
+        """
         super(VideoPlayer, self).__init__()
         self.setWindowTitle("Відеоплеєр Pro")
         self.setGeometry(100, 100, 1200, 700)
         
+        # Запуск поетапний: спершу вікно, потім медіатека і (у фоні) libVLC
+        self.startup = StartupProfiler()
+        self.startup_finished = False
+
         # Initialize managers and settings
         self.settings_manager = Settings()
-        self.history_manager = HistoryManager()
-        self.playlist_manager = PlaylistManager()
+        # Кешування і декодування libVLC налаштовуються у файлі налаштувань (група [vlc])
+        InstanceManager.shared().configure(self.settings_manager.load_vlc_options())
+        self.library = None
+        self.history_manager = None
+        self.playlist_manager = None
         self.last_directory = str(Path.home())
+        self.playlist = PlaylistQueue()
 
         # Створення бокової панелі
         self.create_side_panel()
@@ -40,14 +77,94 @@ class VideoPlayer(QtWidgets.QMainWindow):
         # Load saved settings
         self.settings_manager.load_window_state(self)
 
-        # Завантажуємо історію та улюблені файли в інтерфейс
-        self.update_lists()  # Оновлюємо інтерфейс для історії та улюблених
-        
-        # Initialize media controller and state
-        self.media_controller = MediaController(self.video_frame)
-        self.playlist = []
-        self.current_index = -1
-        
+        # Media controller створюється, коли libVLC завантажиться у фоні (або при першому зверненні)
+        self._media_controller = None
+        self.telemetry = None
+        self.stream_monitor = None
+        self.vlc_loader = None
+        self.playlist_loader = None
+        self.library_scanner = None
+        self.library_watcher = None
+        self.library_prober = None
+        self.thumbnail_extractor = None
+        self.multi_view = None
+        self.control_address = control_address
+        self.control_server = None
+        self.startup.mark("window created")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.startup_finished:
+            self.startup_finished = True
+            self.startup.mark("window shown")
+            # Решта ініціалізації - після того, як вікно з'явилось на екрані
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Друга стадія запуску: libVLC вантажиться у фоні, поки читається медіатека."""
+        self.start_vlc_loader()
+        self.load_library()
+        if self.control_address:
+            self.setup_remote_control(self.control_address)
+
+    def load_library(self):
+        """Відкриває медіатеку і підключає моделі бокової панелі (рядки читаються посторінково)."""
+        if self.library is not None:
+            return
+        self.library = MediaLibrary()
+        self.history_manager = HistoryManager(self.library)
+        self.playlist_manager = PlaylistManager(self.library, favorites=self.history_manager.favorites)
+        self.favorites_model = FavoritesListModel(self.history_manager.favorites, self)
+        self.favorites_list.setModel(self.favorites_model)
+        self.history_model = HistoryListModel(self.history_manager, self)
+        self.history_list.setModel(self.history_model)
+        self.library_model = LibraryListModel(self.library, self)
+        self.library_list.setModel(self.library_model)
+        self.connect_library()
+        self.startup.mark("library loaded")
+
+    def start_vlc_loader(self):
+        """Запускає фонове завантаження libVLC (імпорт модуля і плагінів)."""
+        if self.vlc_loader is None:
+            self.vlc_loader = BackgroundTask(load_vlc_instance, self)
+            self.vlc_loader.finished.connect(self.on_vlc_loaded)
+            self.vlc_loader.start()
+
+    def on_vlc_loaded(self):
+        try:
+            self.media_controller  # Створює програвач, поки користувач ще нічого не відкрив
+        except Exception as e:
+            logging.error(f"Error initializing media controller: {str(e)}")
+
+    @property
+    def media_controller(self):
+        """
+        MediaController на екземплярі libVLC з фонового завантажувача.
+        Якщо завантаження ще триває (файл відкрили одразу після запуску), чекає на нього.
+        """
+        if self._media_controller is None:
+            self.start_vlc_loader()
+            self.vlc_loader.wait()
+            from MediaController import MediaController
+            self._media_controller = MediaController(self.video_frame, instance=self.vlc_loader.result)
+            self.connect_media_signals()
+            self.telemetry = PlaybackTelemetry(self._media_controller, parent=self)
+            self.telemetry.set_overlay(self.stats_overlay_action.isChecked())
+            self.stream_monitor = StreamMonitor(self._media_controller, parent=self)
+            self.stream_monitor.reconnecting.connect(self.on_stream_reconnecting)
+            self.stream_monitor.recovered.connect(self.on_stream_recovered)
+            if self.control_server is not None:
+                self.connect_remote_notifications()
+            self.startup.mark("vlc ready")
+            self.startup.report("Startup timing (ready)")
+        return self._media_controller
+
+    def on_first_frame(self):
+        """Перший кадр першого відкритого файлу - остання позначка звіту про запуск."""
+        self._media_controller.signals.time_changed.disconnect(self.on_first_frame)
+        self.startup.mark("first frame")
+        self.startup.report()
+
     def create_side_panel(self):
         """Створення бічної панелі для відображення історії та улюблених файлів."""
         if not hasattr(self, 'dock_widget'):  # Перевірка чи вже є dock_widget
@@ -59,7 +176,8 @@ class VideoPlayer(QtWidgets.QMainWindow):
             side_panel_layout = QVBoxLayout()
 
             # Список для улюблених
-            self.favorites_list = QListWidget()
+            # Моделі підключаються після завантаження медіатеки (load_library)
+            self.favorites_list = self.create_list_view()
             side_panel_layout.addWidget(self.favorites_list)
 
             # Кнопка для додавання в улюблене
@@ -72,62 +190,74 @@ class VideoPlayer(QtWidgets.QMainWindow):
             remove_favorite_button.clicked.connect(self.remove_from_favorites)
             side_panel_layout.addWidget(remove_favorite_button)
 
-            # Список для історії
-            self.history_list = QListWidget()
+            # Список для історії (рядки підвантажуються під час прокрутки)
+            self.history_list = self.create_list_view()
             side_panel_layout.addWidget(self.history_list)
 
+            # Пошук у проіндексованій медіатеці
+            self.library_search = QLineEdit()
+            self.library_search.setPlaceholderText("Search library...")
+            self.library_sort = QComboBox()
+            for title, field in (("Name", "name"), ("Size", "size"), ("Modified", "mtime"), ("Duration", "duration")):
+                self.library_sort.addItem(title, field)
+            self.library_list = self.create_list_view()
+            self.library_list.activated.connect(
+                lambda index: self.load_file(self.library_model.data(index, Qt.UserRole)))
+            # Запит виконується, коли користувач перестав друкувати
+            self.library_search_timer = QTimer(self)
+            self.library_search_timer.setSingleShot(True)
+            self.library_search_timer.setInterval(250)
+            self.library_search_timer.timeout.connect(self.search_library)
+            self.library_search.textChanged.connect(self.library_search_timer.start)
+            self.library_sort.currentIndexChanged.connect(self.search_library)
+            search_layout = QHBoxLayout()
+            search_layout.addWidget(self.library_search)
+            search_layout.addWidget(self.library_sort)
+            side_panel_layout.addLayout(search_layout)
+            side_panel_layout.addWidget(self.library_list)
+
             side_panel_widget.setLayout(side_panel_layout)
             self.dock_widget.setWidget(side_panel_widget)
             self.addDockWidget(Qt.LeftDockWidgetArea, self.dock_widget)
 
+    def create_list_view(self, model=None):
+        """Створює QListView, що малює лише видимі рядки моделі."""
+        view = QListView()
+        view.setUniformItemSizes(True)  # Висота рядка не обчислюється для кожного елемента
+        view.setLayoutMode(QListView.Batched)
+        if model is not None:
+            view.setModel(model)
+        return view
+
     def add_to_history(self, filename, time_code):
         """Додає файл до історії вручну (як приклад)."""
         # Перевірка, чи є вже файл в історії
-        if not any(item['filename'] == filename for item in self.history_manager.history):
-            self.history_manager.add_to_history(filename, time_code)
-            self.update_lists()
+        if not self.history_manager.contains(filename):
+            self.history_model.row_updated(self.history_manager.add_to_history(filename, time_code))
 
     def add_to_favorites(self):
         """Додає файл в улюблені вручну (як приклад)."""
         current_file = self.current_file  # або отримати назву файлу з іншого місця
-        if current_file:  # Перевірка, чи файл є
+        if current_file and not self.history_manager.is_favorite(current_file):
             self.history_manager.add_to_favorites(current_file)
-            self.update_lists()
+            self.favorites_model.append(current_file)
 
     def remove_from_favorites(self):
         """Видаляє файл з улюблених вручну (як приклад)."""
-        # Отримуємо вибраний елемент зі списку
-        selected_item = self.favorites_list.currentItem()
-        if selected_item:
-            filename = selected_item.text()  # Отримуємо назву файлу з тексту елемента списку
+        # Отримуємо вибраний рядок списку
+        index = self.favorites_list.currentIndex()
+        if index.isValid():
+            filename = self.favorites_model.filename(index.row())
             self.history_manager.remove_from_favorites(filename)  # Видаляємо з улюблених
-            self.update_lists()  # Оновлюємо список на інтерфейсі
-
-    def update_lists(self):
-        """Оновлює списки на боковій панелі для історії та улюблених."""
-        # Оновлюємо список історії
-        self.history_list.clear()
-        for item in self.history_manager.history:
-            self.history_list.addItem(f"{item['filename']} - {item['time_code']}")
-
-        # Оновлюємо список улюблених
-        self.favorites_list.clear()
-        for item in self.history_manager.favorites:
-            self.favorites_list.addItem(item)  # Переконатися, що це рядок
+            self.favorites_model.remove_row(index.row())  # Прибираємо лише цей рядок
 
     def play_file(self, filename, time_code):
         """При відтворенні файлу додаємо його в історію."""
         # Перевірка, чи вже є файл у історії
-        if not any(item['filename'] == filename for item in self.history_manager.history):
-            self.history_manager.add_to_history(filename, time_code)
-            self.update_lists()
+        if not self.history_manager.contains(filename):
+            self.history_model.row_updated(self.history_manager.add_to_history(filename, time_code))
         print(f"Playing {filename} at {time_code}")
 
-    def setup_timer(self):
-        # Update the video time and slider every 500ms
-        self.update_timer.timeout.connect(self.update_time)
-        self.update_timer.start(500)
-
     def connect_signals(self):
         # Connect buttons and sliders to their respective functions
         self.play_button.clicked.connect(self.toggle_play_pause)
@@ -136,17 +266,61 @@ class VideoPlayer(QtWidgets.QMainWindow):
         self.time_slider.valueChanged.connect(self.seek_video)
         self.volume_slider.valueChanged.connect(self.adjust_volume)
 
-    def update_time(self):
-        """Update the time slider and label based on the current video position."""
-        if self.media_controller.is_playing():
-            current_time = self.media_controller.get_time() / 1000  # Convert ms to seconds
-            total_time = self.media_controller.get_length() / 1000  # Convert ms to seconds
-
-            self.time_slider.setValue(int((current_time / total_time) * 1000))
-            minutes, seconds = divmod(int(current_time), 60)
-            total_minutes, total_seconds = divmod(int(total_time), 60)
-
-            self.time_label.setText(f"{minutes:02}:{seconds:02} / {total_minutes:02}:{total_seconds:02}")
+    def connect_media_signals(self):
+        """Підписує інтерфейс на події програвача (без таймерів опитування)."""
+        self.total_time = 0
+        self.total_time_text = self.format_time(0)
+        signals = self.media_controller.signals
+        signals.time_changed.connect(self.update_time)
+        if self.startup.elapsed("first frame") is None:
+            signals.time_changed.connect(self.on_first_frame)
+        signals.length_changed.connect(self.update_length)
+        signals.media_info_ready.connect(lambda info: self.update_length(info["duration"]))
+        signals.end_reached.connect(self.on_end_reached)
+        signals.paused.connect(self.checkpoint_position)
+        self.last_checkpoint = time.monotonic()
+        signals.seek_requested.connect(self.show_seek_target)
+        signals.media_changed.connect(self.on_media_changed)
+        signals.queue_finished.connect(self.on_queue_finished)
+        signals.media_info_ready.connect(
+            lambda info: self.library.update_media_info(info["path"], info["duration"], info["codec"]))
+
+    def update_length(self, length):
+        """Запам'ятовує тривалість і її текст - вони не змінюються під час відтворення."""
+        if length <= 0 or length == self.total_time:
+            return
+        self.total_time = length
+        self.total_time_text = self.format_time(length)
+
+    def update_time(self, current_time):
+        """Update the time slider and label from a TimeChanged event (ms)."""
+        if self.total_time > 0 and not self.time_slider.isSliderDown():
+            self.time_slider.setValue(int(1000 * current_time / self.total_time))
+        self.time_label.setText(f"{self.format_time(current_time)} / {self.total_time_text}")
+        if time.monotonic() - self.last_checkpoint >= POSITION_CHECKPOINT_INTERVAL:
+            self.checkpoint_position(current_time)
+
+    def checkpoint_position(self, position=None):
+        """
+        Зберігає позицію поточного файлу в історії (запис у базу йде у фоні)
+        Args:
+            position: Позиція в мс (за замовчуванням - останній час з подій програвача)
+        """
+        self.last_checkpoint = time.monotonic()
+        file_path = getattr(self, 'current_file', None)
+        if not file_path:
+            return
+        if position is None:
+            position = self.media_controller.get_last_time()
+        row = self.history_manager.update_position(file_path, position, self.format_time(position))
+        if row is not None:
+            self.history_model.row_updated(row)
+
+    def on_end_reached(self):
+        """Reset the slider when playback reaches the end."""
+        self.checkpoint_position(0)  # Переглянутий файл наступного разу почнеться спочатку
+        self.time_slider.setValue(0)
+        self.time_label.setText(f"{self.format_time(0)} / {self.total_time_text}")
 
     def toggle_play_pause(self):
         """Toggle between play and pause states."""
@@ -161,14 +335,26 @@ class VideoPlayer(QtWidgets.QMainWindow):
 
     def stop_video(self):
         """Stop the video and reset the position."""
+        self.checkpoint_position()
         self.media_controller.stop()
         self.time_slider.setValue(0)
         self.time_label.setText("00:00 / 00:00")
 
     def seek_video(self):
-        """Seek the video to the selected position."""
-        position = self.time_slider.value() / 1000  # Convert to seconds
-        self.media_controller.set_position(position)
+        """Seek the video to the slider position while dragging (coalesced, fast seeks)."""
+        position = self.time_slider.value() / 1000  # Convert to 0..1
+        self.media_controller.seek_to_position(position, dragging=True)
+
+    def finish_seek(self):
+        """Make one precise seek when the slider is released."""
+        position = self.time_slider.value() / 1000
+        self.media_controller.seek_to_position(position, dragging=False)
+
+    def show_seek_target(self, target):
+        """Show the pending seek target before libVLC reports the new time."""
+        if self.total_time > 0 and not self.time_slider.isSliderDown():
+            self.time_slider.setValue(int(1000 * target / self.total_time))
+        self.time_label.setText(f"{self.format_time(target)} / {self.total_time_text}")
 
     def adjust_volume(self):
         """Adjust the volume based on the volume slider."""
@@ -185,28 +371,296 @@ class VideoPlayer(QtWidgets.QMainWindow):
 
     def open_file(self):
         """Open a file dialog to select a video file."""
-        file_path, _ = QFileDialog.getOpenFileName(self, "Open Video File", self.last_directory, "Videos (*.mp4 *.avi *.mkv *.mov)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Video File", self.last_directory, video_file_filter())
         if file_path:
             self.last_directory = os.path.dirname(file_path)
             self.load_video(file_path)
 
+    def open_network_stream(self):
+        """Відкриває мережевий потік (http, https, rtsp, rtp, udp, rtmp, srt ...) за URL."""
+        url, accepted = QInputDialog.getText(self, "Open Network Stream", "URL (http://, rtsp://, udp://@:1234 ...):")
+        url = url.strip()
+        if not accepted or not url:
+            return
+        if not is_stream_url(url):
+            QMessageBox.warning(self, "Error", f"Not a network URL: {url}")
+            return
+        self.load_file(url)
+
+    def on_stream_reconnecting(self, attempt, delay):
+        self.media_controller.set_overlay_text(f"Connection lost - reconnecting in {delay / 1000:.0f} s (attempt {attempt})")
+
+    def on_stream_recovered(self, attempts):
+        # Повідомлення про перепідключення змінюється показниками (якщо увімкнені) або прибирається
+        self.telemetry.set_overlay(self.telemetry.overlay_enabled)
+
     def open_folder(self):
         """Open a folder dialog to select a folder."""
         folder_path = QFileDialog.getExistingDirectory(self, "Open Folder", self.last_directory)
         if folder_path:
             self.last_directory = folder_path
-            print(f"Selected folder: {folder_path}")
+            self.scan_folder(folder_path)
+
+    def export_playback_stats(self):
+        """Зберігає зібрані показники відтворення у CSV або JSON."""
+        if self.telemetry is None or not self.telemetry.samples:
+            QMessageBox.information(self, "Playback Stats", "No playback statistics collected yet.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Playback Stats", os.path.join(self.last_directory, "playback_stats.csv"),
+            "CSV (*.csv);;JSON (*.json)")
+        if file_path and not self.telemetry.export(file_path):
+            QMessageBox.critical(self, "Error", "Could not export playback statistics")
+
+    def open_multi_view(self):
+        """Відкриває до MAX_MULTI_VIEW файлів у сітці синхронізованих програвачів."""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Open Multi-view", self.last_directory, video_file_filter())
+        if not file_paths:
+            return
+        if len(file_paths) > MAX_MULTI_VIEW:
+            QMessageBox.warning(self, "Multi-view", f"Only the first {MAX_MULTI_VIEW} files will be shown.")
+            file_paths = file_paths[:MAX_MULTI_VIEW]
+        self.last_directory = os.path.dirname(file_paths[0])
+        from MultiView import MultiViewWindow
+        self.close_multi_view()  # Програвачі попередньої сітки звільняють спільний libVLC
+        window = MultiViewWindow(file_paths, parent=self)
+        # Сітка видаляється при закритті (WA_DeleteOnClose) - після цього її не можна закривати вдруге
+        window.destroyed.connect(lambda: self.forget_multi_view(window))
+        self.multi_view = window
+        window.show()
+        window.start()
+
+    def close_multi_view(self):
+        """Закриває сітку, якщо вона відкрита (її closeEvent звільняє програвачі плиток)."""
+        if self.multi_view is not None:
+            window, self.multi_view = self.multi_view, None
+            window.close()
+
+    def forget_multi_view(self, window):
+        if self.multi_view is window:
+            self.multi_view = None
+
+    def scan_folder(self, folder_path):
+        """Починає фонове сканування теки; список відтворення наповнюється порціями."""
+        self.cancel_playlist_loader()
+        self.playlist.clear()
+        self.playlist_loader = FolderScanner(folder_path, library=self.library, parent=self)
+        self.playlist_loader.files_found.connect(self.on_files_found)
+        self.playlist_loader.finished.connect(self.on_library_scan_finished)
+        self.playlist_loader.start()
+
+    def cancel_playlist_loader(self):
+        """Зупиняє попереднє сканування теки або імпорт списку, якщо вони ще тривають."""
+        if self.playlist_loader is not None:
+            self.playlist_loader.files_found.disconnect(self.on_files_found)
+            if isinstance(self.playlist_loader, FolderScanner):
+                self.playlist_loader.finished.disconnect(self.on_library_scan_finished)
+            else:
+                self.playlist_loader.imported.disconnect(self.on_playlist_imported)
+            self.playlist_loader.cancel()
+            self.playlist_loader.wait()
+            self.playlist_loader = None
+
+    def import_playlist(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Playlist", self.last_directory,
+                                                   playlist_file_filter())
+        if file_path:
+            self.last_directory = os.path.dirname(file_path)
+            self.load_playlist_file(file_path)
+
+    def load_playlist_file(self, file_path):
+        """Читає список відтворення у фоні; відтворення починається з першої порції записів."""
+        self.cancel_playlist_loader()
+        self.playlist.clear()
+        self.playlist_loader = PlaylistImporter(file_path, self.library, parent=self)
+        self.playlist_loader.files_found.connect(self.on_files_found)
+        self.playlist_loader.imported.connect(self.on_playlist_imported)
+        self.playlist_loader.start()
+
+    def on_playlist_imported(self, name, count):
+        if self.playlist_manager is not None:
+            self.playlist_manager.add_imported_playlist(name)
+
+    def export_playlist(self):
+        """Зберігає поточний список відтворення у файл M3U/M3U8, PLS або XSPF."""
+        if not self.playlist:
+            QMessageBox.information(self, "Export Playlist", "The playlist is empty.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Playlist",
+                                                   os.path.join(self.last_directory, "playlist.m3u8"),
+                                                   playlist_file_filter())
+        if not file_path:
+            return
+        try:
+            write_playlist(file_path, self.playlist)
+        except Exception as e:
+            logging.error(f"Error exporting playlist: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Could not export playlist: {str(e)}")
+
+    def search_library(self):
+        """Оновлює результати пошуку в медіатеці."""
+        if self.library is None:
+            return
+        self.library_model.set_query(self.library_search.text(), self.library_sort.currentData())
+
+    def connect_library(self):
+        """Підключає індекс медіатеки: метадані відтворених файлів і фонове оновлення тек."""
+        self.library_rescan_timer = QTimer(self)
+        self.library_rescan_timer.setSingleShot(True)
+        self.library_rescan_timer.setInterval(2000)
+        self.library_rescan_timer.timeout.connect(self.rescan_library)
+        # Після запуску індекс звіряється з диском у фоні (змінені теки перечитуються)
+        self.library_rescan_timer.start()
+
+    def rescan_library(self):
+        """Інкрементально пересканує всі корені медіатеки у фоні."""
+        roots = self.library.media_roots()
+        if not roots or (self.library_scanner is not None and self.library_scanner.isRunning()):
+            return
+        self.library_scanner = FolderScanner(roots, library=self.library, parent=self)
+        self.library_scanner.finished.connect(self.on_library_scan_finished)
+        self.library_scanner.start()
+
+    def on_library_scan_finished(self):
+        """Оновлює панель пошуку і (на Linux з inotify) стежить за теками медіатеки."""
+        self.library_model.refresh()
+        if not LibraryWatcher.available():
+            return
+        self.stop_library_watcher()
+        self.library_watcher = LibraryWatcher(self.library.indexed_directories(), parent=self)
+        self.library_watcher.directory_changed.connect(lambda directory: self.library_rescan_timer.start())
+        self.library_watcher.start()
+
+    def probe_library(self):
+        """Визначає тривалість і кодек файлів медіатеки, яких ще не відтворювали (у пулі процесів)."""
+        if self.library is None or (self.library_prober is not None and self.library_prober.isRunning()):
+            return
+        self.library_prober = LibraryProber(self.library, parent=self)
+        self.library_prober.finished.connect(self.library_model.refresh)
+        self.library_prober.start()
+
+    def stop_library_watcher(self):
+        if self.library_watcher is not None:
+            self.library_watcher.cancel()
+            self.library_watcher.wait()
+            self.library_watcher = None
+
+    def on_files_found(self, files):
+        """Додає знайдені файли до списку відтворення і запускає перший з них."""
+        if self.sender() is not self.playlist_loader:
+            return  # Запізніла порція від скасованого сканування
+        self.add_to_playlist(files)
+
+    def add_to_playlist(self, files):
+        """Додає файли в кінець списку відтворення; якщо нічого не відтворюється - запускає перший."""
+        self.playlist.extend(files)
+        if self.playlist.position == -1:
+            self.load_file(self.playlist.advance())  # Перший елемент (випадковий при перемішуванні)
+        else:
+            self.preload_next()
+
+    def preload_next(self):
+        """Ставить у чергу libVLC наступний файл списку і розбирає ще один наперед."""
+        if self.playlist.current() is None or self.playlist.current() != self.current_file:
+            return
+        following = self.playlist.peek(2)
+        if following:
+            self.media_controller.queue_next(following[0])
+        for path in following[1:]:
+            self.media_controller.preload(path)
+
+    def on_media_changed(self, file_path):
+        """libVLC безшовно перейшов на наступний файл черги."""
+        if self.playlist.peek(1) == [file_path]:
+            self.playlist.advance()
+        self.setWindowTitle(f"Відеоплеєр Pro - {os.path.basename(file_path)}")
+        self.current_file = file_path
+        self.add_to_recent_files(file_path)
+        self.request_thumbnails(file_path)
+        self.preload_next()
+
+    def setup_thumbnails(self):
+        """Створює фоновий генератор мініатюр (один на весь час роботи вікна)."""
+        from ThumbnailCache import ThumbnailExtractor  # Потрібен лише після відкриття першого файлу
+        self.thumbnail_extractor = ThumbnailExtractor(parent=self)
+        self.thumbnail_extractor.sprite_ready.connect(self.on_sprite_ready)
+
+    def request_thumbnails(self, file_path):
+        """Запитує спрайт мініатюр для повзунка; генерація і читання кешу йдуть у фоні."""
+        self.time_slider.set_sprite(None, None)
+        if is_stream_url(file_path):
+            return  # Мініатюри потоку довелося б качати з мережі
+        if self.thumbnail_extractor is None:
+            self.setup_thumbnails()
+        self.thumbnail_extractor.request(file_path)
+
+    def on_sprite_ready(self, file_path, image, meta):
+        if file_path == self.current_file:
+            self.time_slider.set_sprite(image, meta)
+
+    def on_queue_finished(self):
+        # Обрив потоку теж завершує чергу libVLC - наступний файл не повинен перебити перепідключення
+        if self.stream_monitor is not None and self.stream_monitor.reconnect_pending():
+            return
+        self.play_next()
+
+    def play_next(self):
+        """Запускає наступний файл списку (з урахуванням перемішування і повтору), якщо черга libVLC закінчилась."""
+        file_path = self.playlist.advance()
+        if file_path is not None:
+            self.load_file(file_path)
+
+    def play_previous(self):
+        file_path = self.playlist.back()
+        if file_path is not None:
+            self.load_file(file_path)
+
+    def set_repeat_mode(self, mode):
+        self.playlist.set_repeat(mode)
+        self.requeue_next()
+
+    def set_shuffle(self, enabled):
+        self.playlist.set_shuffle(enabled)
+        self.requeue_next()
+
+    def play_at(self, index):
+        """Відтворює елемент списку за номером."""
+        if not 0 <= index < len(self.playlist):
+            raise IndexError(f"Playlist index out of range: {index}")
+        self.load_file(self.playlist.set_current(index))
+
+    def remove_from_playlist(self, index):
+        self.playlist.remove(index)
+        self.requeue_next()
+
+    def move_in_playlist(self, source, destination):
+        self.playlist.move(source, destination)
+        self.requeue_next()
+
+    def clear_playlist(self):
+        self.cancel_playlist_loader()
+        self.playlist.clear()
+        if self._media_controller is not None:
+            self._media_controller.clear_queued()
+
+    def requeue_next(self):
+        """Наступний елемент змінився - прибираємо вже поставлений у чергу libVLC і ставимо новий."""
+        if self._media_controller is not None:
+            self._media_controller.clear_queued()
+            self.preload_next()
 
     def add_to_recent_files(self, file_path):
         """Додає файл до списку нещодавно відкритих файлів."""
-        if file_path not in self.history_manager.history:
+        if not self.history_manager.contains(file_path):
             time_code = self.media_controller.get_time()  # Отримуємо поточний час відео в мілісекундах
             time_code = self.format_time(time_code)  # Перетворюємо мілісекунди в формат hh:mm:ss
-            self.history_manager.add_to_history(file_path, time_code)  # Зберігає файл з базовими значеннями
+            row = self.history_manager.add_to_history(file_path, time_code)  # Зберігає файл з базовими значеннями
+            self.history_model.row_updated(row)
 
     def save_recent_files(self):
         """Зберігає список нещодавно відкритих файлів."""
-        self.history_manager.save_history()  # Використовує менеджер історії для збереження даних
+        if self.library is not None:
+            self.library.close()  # Фіксує останні записи в базі та закриває її
 
     def load_video(self, file_path):
         """Load a video and play it."""
@@ -214,12 +668,12 @@ class VideoPlayer(QtWidgets.QMainWindow):
             self.media_controller.play()
             time_code = self.media_controller.get_time()  # Отримуємо поточний час відео в мілісекундах
             time_code = self.format_time(time_code)  # Перетворюємо мілісекунди в формат hh:mm:ss
-            self.history_manager.add_to_history(file_path, time_code)
-            self.update_lists()  # Оновлюємо інтерфейс з новим відео
+            row = self.history_manager.add_to_history(file_path, time_code)
+            self.history_model.row_updated(row)  # Оновлюємо лише змінений рядок
 
     def load_recent_files(self):
         """Load recently opened files from history."""
-        for entry in self.history_manager.history:
+        for entry in self.history_manager.iter_entries():
             print(f"Recently opened: {entry['path']}")
 
     def closeEvent(self, event):
@@ -267,10 +721,11 @@ class VideoPlayer(QtWidgets.QMainWindow):
         self.pause_button.clicked.connect(self.pause_video)
         self.stop_button.clicked.connect(self.stop_video)
         
-        # Time slider
-        self.time_slider = QSlider(Qt.Horizontal)
+        # Time slider (with thumbnail preview on hover)
+        self.time_slider = PreviewSlider(Qt.Horizontal)
         self.time_slider.setRange(0, 1000)
         self.time_slider.sliderMoved.connect(self.seek_video)
+        self.time_slider.sliderReleased.connect(self.finish_seek)
         
         # Volume control
         self.volume_slider = QSlider(Qt.Horizontal)
@@ -279,12 +734,8 @@ class VideoPlayer(QtWidgets.QMainWindow):
         self.volume_slider.setFixedWidth(100)
         self.volume_slider.sliderMoved.connect(self.adjust_volume)
         
-        # Time label
+        # Time label (updated from MediaController events)
         self.time_label = QLabel("00:00 / 00:00")
-        # Timer for updating time
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_time)
-        self.timer.start(1000)  # Update every second
         
         # Add controls to layout
         self.controls_layout.addWidget(self.play_button)
@@ -308,12 +759,67 @@ class VideoPlayer(QtWidgets.QMainWindow):
         open_folder_action.setShortcut('Ctrl+D')
         open_folder_action.triggered.connect(self.open_folder)
         
+        open_multi_view_action = QAction('Open Multi-view...', self)
+        open_multi_view_action.setShortcut('Ctrl+M')
+        open_multi_view_action.triggered.connect(self.open_multi_view)
+
         file_menu.addAction(open_action)
         file_menu.addAction(open_folder_action)
+        file_menu.addAction(open_multi_view_action)
+
+        open_stream_action = QAction('Open Network Stream...', self)
+        open_stream_action.setShortcut('Ctrl+N')
+        open_stream_action.triggered.connect(self.open_network_stream)
+        file_menu.addAction(open_stream_action)
+
+        import_playlist_action = QAction('Import Playlist...', self)
+        import_playlist_action.setShortcut('Ctrl+L')
+        import_playlist_action.triggered.connect(self.import_playlist)
+        file_menu.addAction(import_playlist_action)
+
+        export_playlist_action = QAction('Export Playlist...', self)
+        export_playlist_action.setShortcut('Ctrl+Shift+S')
+        export_playlist_action.triggered.connect(self.export_playlist)
+        file_menu.addAction(export_playlist_action)
+
+        probe_library_action = QAction('Probe Library Media Info', self)
+        probe_library_action.triggered.connect(self.probe_library)
+        file_menu.addAction(probe_library_action)
+
+        export_stats_action = QAction('Export Playback Stats...', self)
+        export_stats_action.triggered.connect(self.export_playback_stats)
+        file_menu.addAction(export_stats_action)
         
         # Playback menu
         playback_menu = menubar.addMenu('Playback')
         
+        previous_action = QAction('Previous', self)
+        previous_action.setShortcut('P')
+        previous_action.triggered.connect(self.play_previous)
+        playback_menu.addAction(previous_action)
+
+        next_action = QAction('Next', self)
+        next_action.setShortcut('N')
+        next_action.triggered.connect(self.play_next)
+        playback_menu.addAction(next_action)
+
+        self.shuffle_action = QAction('Shuffle', self)
+        self.shuffle_action.setCheckable(True)
+        self.shuffle_action.toggled.connect(self.set_shuffle)
+        playback_menu.addAction(self.shuffle_action)
+
+        repeat_menu = playback_menu.addMenu('Repeat')
+        repeat_group = QtWidgets.QActionGroup(self)
+        self.repeat_actions = {}
+        for title, mode in (('Off', REPEAT_OFF), ('All', REPEAT_ALL), ('One', REPEAT_ONE)):
+            action = QAction(title, self)
+            action.setCheckable(True)
+            action.setChecked(mode == REPEAT_OFF)
+            action.triggered.connect(lambda checked, m=mode: self.set_repeat_mode(m))
+            repeat_group.addAction(action)
+            repeat_menu.addAction(action)
+            self.repeat_actions[mode] = action
+
         speed_menu = playback_menu.addMenu('Speed')
         speeds = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0]
         for speed in speeds:
@@ -330,6 +836,13 @@ class VideoPlayer(QtWidgets.QMainWindow):
         
         view_menu.addAction(fullscreen_action)
 
+        self.stats_overlay_action = QAction('Playback Stats Overlay', self)
+        self.stats_overlay_action.setShortcut('Ctrl+I')
+        self.stats_overlay_action.setCheckable(True)
+        self.stats_overlay_action.toggled.connect(
+            lambda checked: self.telemetry is not None and self.telemetry.set_overlay(checked))
+        view_menu.addAction(self.stats_overlay_action)
+
     def setup_shortcuts(self):
         """Setup keyboard shortcuts for various actions."""
         # Shortcut for adding to favorites (Ctrl+Shift+F)
@@ -356,11 +869,6 @@ class VideoPlayer(QtWidgets.QMainWindow):
                 else:
                     self.dock_widget.show()
 
-    def setup_timer(self):
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.update_ui)
-        self.update_timer.start(1000)
-
     def connect_signals(self):
         self.play_button.clicked.connect(lambda: self.control_video("play"))
         self.pause_button.clicked.connect(lambda: self.control_video("pause"))
@@ -373,24 +881,50 @@ class VideoPlayer(QtWidgets.QMainWindow):
             self,
             "Open Video",
             self.last_directory,
-            "Video Files (*.mp4 *.avi *.mkv *.mov);;All Files (*.*)"
+            video_file_filter()
         )
         
         if file_path:
             self.last_directory = os.path.dirname(file_path)
             self.load_file(file_path)
 
-    def load_file(self, file_path):
+    def load_file(self, file_path, start_time=None):
+        """
+        Args:
+            file_path: Файл або URL потоку
+            start_time: Позиція в мс (None - продовжити з позиції в історії)
+        """
         try:
-            self.media_controller.set_media(file_path)
+            self.checkpoint_position()  # Позиція попереднього файлу
+            if start_time is None:
+                entry = self.history_manager.get_entry(file_path)
+                start_time = entry["position_ms"] if entry else 0
+            if not self.media_controller.set_media(file_path, start_time=start_time):
+                self.skip_unavailable(file_path)
+                return
             self.setWindowTitle(f"Відеоплеєр Pro - {os.path.basename(file_path)}")
             self.current_file = file_path
+            if self.control_server is not None:
+                self.control_server.notify("media_changed", path=file_path)
             self.control_video("play")
             self.add_to_recent_files(file_path)
+            self.request_thumbnails(file_path)
+            self.preload_next()
         except Exception as e:
             logging.error(f"Error loading file: {str(e)}")
             QMessageBox.critical(self, "Error", f"Could not load video file: {str(e)}")
 
+    def skip_unavailable(self, file_path):
+        """
+        Записи списків перевіряються лише перед відтворенням: недоступний файл списку
+        пропускається, а відкритий вручну - показується як помилка
+        """
+        if self.playlist.current() == file_path:
+            logging.warning(f"Skipping unavailable playlist entry: {file_path}")
+            QTimer.singleShot(0, self.play_next)  # Через цикл подій - без рекурсії на довгих серіях пропусків
+        else:
+            QMessageBox.warning(self, "Error", f"Could not open {file_path}")
+
     def control_video(self, action):
         try:
             if action == "play":
@@ -410,23 +944,125 @@ class VideoPlayer(QtWidgets.QMainWindow):
         except Exception as e:
             logging.error(f"Error controlling video: {str(e)}")
 
-    def update_ui(self):
-        if hasattr(self, 'media_controller'):
-            try:
-                # Update time
-                current_time = self.media_controller.player.get_time()
-                total_time = self.media_controller.player.get_length()
-                
-                if total_time > 0:
-                    # Update slider
-                    self.time_slider.setValue(int(1000 * current_time / total_time))
-                    
-                    # Update time label
-                    current_str = self.format_time(current_time)
-                    total_str = self.format_time(total_time)
-                    self.time_label.setText(f"{current_str} / {total_str}")
-            except Exception as e:
-                logging.error(f"Error updating UI: {str(e)}")
+    # Віддалене керування
+
+    def setup_remote_control(self, address):
+        """Запускає сервер керування (JSON-RPC на localhost або Unix-сокеті) і реєструє команди програвача."""
+        from RemoteControl import ControlServer
+        try:
+            self.control_server = ControlServer(address, parent=self)
+            for name, function in (
+                    ("play", lambda: self.media_controller.play() == 0),
+                    ("pause", lambda: self.media_controller.set_paused(True)),
+                    ("resume", lambda: self.media_controller.set_paused(False)),
+                    ("toggle", self.toggle_play_pause),
+                    ("stop", self.stop_video),
+                    ("seek", self.remote_seek),
+                    ("set_volume", lambda volume: self.volume_slider.setValue(max(0, min(100, int(volume))))),
+                    ("set_mute", lambda muted: self.media_controller.set_mute(bool(muted))),
+                    ("set_rate", lambda rate: self.media_controller.set_playback_rate(float(rate))),
+                    ("load", self.remote_load),
+                    ("status", self.remote_status),
+                    ("playlist.get", self.remote_playlist),
+                    ("playlist.add", self.add_to_playlist),
+                    ("playlist.load", self.remote_load_playlist),
+                    ("playlist.clear", self.clear_playlist),
+                    ("playlist.next", self.play_next),
+                    ("playlist.previous", self.play_previous),
+                    ("playlist.goto", self.play_at),
+                    ("playlist.remove", self.remove_from_playlist),
+                    ("playlist.move", self.move_in_playlist),
+                    ("playlist.set_shuffle", lambda enabled: self.shuffle_action.setChecked(bool(enabled))),
+                    ("playlist.set_repeat", self.remote_set_repeat)):
+                self.control_server.register(name, function)
+            self.volume_slider.valueChanged.connect(lambda volume: self.control_server.notify("volume", volume=volume))
+            self.last_time_notification = 0
+            self.control_server.start()
+        except Exception as e:
+            logging.error(f"Error starting control server on {address}: {str(e)}")
+            self.control_server = None
+
+    def connect_remote_notifications(self):
+        """Пересилає події програвача підписникам сервера керування."""
+        signals = self._media_controller.signals
+        notify = self.control_server.notify
+        signals.playing.connect(lambda: notify("playing", path=self.current_file))
+        signals.paused.connect(lambda: notify("paused", time_ms=self._media_controller.get_last_time()))
+        signals.stopped.connect(lambda: notify("stopped"))
+        signals.end_reached.connect(lambda: notify("end_reached", path=self.current_file))
+        signals.error.connect(lambda: notify("error", path=self.current_file))
+        signals.media_changed.connect(lambda path: notify("media_changed", path=path))
+        signals.length_changed.connect(lambda length: notify("length_changed", length_ms=length))
+        signals.time_changed.connect(self.notify_time)
+        self.stream_monitor.reconnecting.connect(
+            lambda attempt, delay: notify("reconnecting", attempt=attempt, delay_ms=delay))
+        self.stream_monitor.recovered.connect(lambda attempts: notify("recovered", attempts=attempts))
+
+    def notify_time(self, time_ms):
+        # TimeChanged приходить кілька разів на секунду - підписникам достатньо одного разу
+        if time.monotonic() - self.last_time_notification >= 1:
+            self.last_time_notification = time.monotonic()
+            self.control_server.notify("time", time_ms=time_ms, length_ms=self.total_time)
+
+    def remote_load(self, path, start_ms=None):
+        if not is_stream_url(path) and not os.path.exists(path):
+            raise ValueError(f"Not found: {path}")
+        # До Playing set_time ігнорується - позиція передається в set_media і застосовується після старту
+        self.load_file(path, start_time=None if start_ms is None else int(start_ms))
+        return True
+
+    def remote_load_playlist(self, path):
+        """Замінює список відтворення вмістом теки або файлу списку (читання йде у фоні)."""
+        if os.path.isdir(path):
+            self.scan_folder(path)
+        elif os.path.isfile(path):
+            self.load_playlist_file(path)
+        else:
+            raise ValueError(f"Not found: {path}")
+        return True
+
+    def remote_seek(self, time_ms=None, position=None, relative_ms=None):
+        """Перехід на час у мс, на частку 0..1 тривалості або відносно поточного часу."""
+        if time_ms is not None:
+            self.media_controller.set_time(int(time_ms))
+        elif position is not None:
+            self.media_controller.seek_to_position(float(position), dragging=False)
+        elif relative_ms is not None:
+            self.media_controller.seek_relative(int(relative_ms))
+        else:
+            raise ValueError("One of time_ms, position or relative_ms is required")
+        return True
+
+    def remote_set_repeat(self, mode):
+        modes = {"off": REPEAT_OFF, "all": REPEAT_ALL, "one": REPEAT_ONE}
+        if mode not in modes:
+            raise ValueError(f"Repeat mode must be one of {', '.join(modes)}")
+        self.repeat_actions[modes[mode]].setChecked(True)
+        self.set_repeat_mode(modes[mode])
+
+    def remote_status(self):
+        """Стан програвача для status і GET /status."""
+        controller = self._media_controller
+        repeat = {REPEAT_OFF: "off", REPEAT_ALL: "all", REPEAT_ONE: "one"}[self.playlist.repeat]
+        status = {
+            "state": controller.get_state() if controller is not None else "idle",
+            "path": getattr(self, 'current_file', None),
+            "time_ms": controller.get_last_time() if controller is not None else 0,
+            "length_ms": self.total_time if controller is not None else 0,
+            "volume": self.volume_slider.value(),
+            "rate": controller.get_playback_rate() if controller is not None else 1.0,
+            "playlist": {"position": self.playlist.position, "length": len(self.playlist),
+                         "shuffle": self.playlist.shuffle, "repeat": repeat},
+        }
+        if controller is not None and controller.is_stream():
+            status["stream"] = self.stream_monitor.health()
+        return status
+
+    def remote_playlist(self, offset=0, limit=100):
+        """Сторінка списку відтворення."""
+        end = min(len(self.playlist), offset + limit)
+        return {"position": self.playlist.position, "length": len(self.playlist),
+                "items": [self.playlist[index] for index in range(offset, end)]}
 
     def format_time(self, ms):
         s = ms // 1000
@@ -436,6 +1072,30 @@ class VideoPlayer(QtWidgets.QMainWindow):
 
     def closeEvent(self, event):
         try:
+            if self.control_server is not None:
+                self.control_server.stop()
+            self.checkpoint_position()
+            # Дочірні вікна не отримують closeEvent при закритті головного
+            self.close_multi_view()
+            self.cancel_playlist_loader()
+            self.stop_library_watcher()
+            if self.thumbnail_extractor is not None:
+                self.thumbnail_extractor.cancel()
+                self.thumbnail_extractor.wait()
+            if self.vlc_loader is not None:
+                self.vlc_loader.wait()
+            if self.telemetry is not None and self.telemetry.samples:
+                logging.info(f"Playback telemetry: {self.telemetry.summary()}")
+            if self.stream_monitor is not None:
+                self.stream_monitor.on_stopped()
+            if self._media_controller is not None:
+                self._media_controller.cleanup()
+            if self.library_scanner is not None:
+                self.library_scanner.cancel()
+                self.library_scanner.wait()
+            if self.library_prober is not None:
+                self.library_prober.cancel()
+                self.library_prober.wait()
             self.settings_manager.save_window_state(self)
             self.save_recent_files()
             event.accept()
@@ -453,12 +1113,10 @@ class VideoPlayer(QtWidgets.QMainWindow):
 
 
     def seek_forward(self):
-        current_time = self.media_controller.player.get_time()
-        self.media_controller.player.set_time(current_time + 10000)  # +10 seconds
+        self.media_controller.seek_relative(10000)  # +10 seconds, repeated presses add up
 
     def seek_backward(self):
-        current_time = self.media_controller.player.get_time()
-        self.media_controller.player.set_time(max(0, current_time - 10000))  # -10 seconds
+        self.media_controller.seek_relative(-10000)  # -10 seconds
 
     def volume_up(self):
         current_volume = self.volume_slider.value()
@@ -511,8 +1169,13 @@ if __name__ == "__main__":
             }
         """)
         
+        # --control tcp://127.0.0.1:8765 або --control unix:/tmp/player.sock вмикає віддалене керування
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--control", help="Remote control address (tcp://127.0.0.1:PORT or unix:/PATH)")
+        args, _ = parser.parse_known_args(sys.argv[1:])
+
         # Create the main window
-        main_window = VideoPlayer()
+        main_window = VideoPlayer(control_address=args.control)
         main_window.show()
         
         sys.exit(app.exec_())
@@ -0,0 +1,383 @@
+import os
+import sys
+import json
+import ctypes
+import signal
+import argparse
+import logging
+import threading
+from PyQt5.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage
+from InstanceManager import InstanceManager
+from PlaylistQueue import PlaylistQueue, REPEAT_OFF, REPEAT_ALL
+from PlaybackTelemetry import PlaybackTelemetry
+from NetworkStream import StreamMonitor
+from probe import iter_media_files
+
+# Скільки секунд чекати на кадр після переходу під час вилучення кадрів
+FRAME_TIMEOUT = 5
+# Як часто в журнал пишеться остання вибірка телеметрії, с
+REPORT_INTERVAL = 10
+
+
+class HeadlessPlayer(QObject):
+    """
+    Програвач без вікна і звуку для серверів і CI: MediaController без video_frame на
+    екземплярі libVLC з --vout=dummy/--aout=dummy, черга PlaylistQueue і телеметрія
+    """
+    finished = pyqtSignal()
+
+    def __init__(self, paths, repeat=False, rate=1.0, media_options=(), capacity=3600, parent=None):
+        """
+        Args:
+            paths: Файли або URL для відтворення по черзі
+            repeat: Повторювати список по колу
+            rate: Швидкість відтворення (більша - швидший прогін тривалих тестів)
+            media_options: Додаткові параметри медіа (наприклад, ':no-video' для перевірки лише демультиплексора)
+            capacity: Скільки вибірок телеметрії (по одній на секунду) зберігається
+        """
+        super().__init__(parent)
+        from MediaController import MediaController  # vlc імпортується після вибору headless-режиму
+        self.playlist = PlaylistQueue()
+        self.playlist.extend(paths)
+        self.playlist.set_repeat(REPEAT_ALL if repeat else REPEAT_OFF)
+        self.rate = rate
+        self.played = 0
+        self.errors = 0
+        self.failed = []
+        self.controller = MediaController(None, media_options=media_options)
+        self.telemetry = PlaybackTelemetry(self.controller, capacity=capacity, parent=self)
+        self.stream_monitor = StreamMonitor(self.controller, parent=self)
+        signals = self.controller.signals
+        signals.playing.connect(self.apply_rate)
+        signals.media_changed.connect(self.on_media_changed)
+        signals.queue_finished.connect(self.on_queue_finished)
+        signals.error.connect(self.on_error)
+
+    def start(self):
+        self.play_next()
+
+    def on_queue_finished(self):
+        # Обрив потоку теж завершує чергу libVLC - перепідключення не переривається наступним елементом
+        if not self.stream_monitor.reconnect_pending():
+            self.play_next()
+
+    def play_next(self):
+        path = self.playlist.advance()
+        if path is None:
+            self.finished.emit()
+            return
+        self.load(path)
+
+    def load(self, path):
+        """Відтворює файл або потік; недоступний пропускається."""
+        if not self.controller.set_media(path):
+            self.record_failure(path, "not found")
+            # Поточне медіа контролера лишилось попереднім - перевіряється позиція в черзі
+            QTimer.singleShot(0, lambda: self.playlist.current() == path and self.play_next())
+            return
+        self.controller.play()
+        self.played += 1
+        self.preload_next()
+
+    def replace(self, paths):
+        """Замінює чергу і починає відтворення з першого елемента."""
+        self.playlist.clear()
+        self.playlist.extend(paths)
+        self.play_next()
+
+    def add(self, paths):
+        self.playlist.extend(paths)
+        self.preload_next()
+
+    def preload_next(self):
+        following = self.playlist.peek(2)
+        if following:
+            self.controller.queue_next(following[0])
+        for path in following[1:]:
+            self.controller.preload(path)
+
+    def apply_rate(self):
+        if self.rate != 1.0:
+            self.controller.set_playback_rate(self.rate)
+
+    def on_media_changed(self, path):
+        if self.playlist.peek(1) == [path]:
+            self.playlist.advance()
+        self.played += 1
+        self.preload_next()
+
+    def on_error(self):
+        """
+        Помилка файлу - перехід до наступного; потоки перепідключає StreamMonitor.
+        Перехід іде через цикл подій - без рекурсії на довгих серіях недоступних файлів
+        """
+        if not self.controller.is_stream():
+            path = self.controller.get_current_path()
+            self.record_failure(path, "playback error")
+            QTimer.singleShot(0, lambda: self.controller.get_current_path() == path and self.play_next())
+
+    def record_failure(self, path, reason):
+        self.errors += 1
+        self.failed.append({"path": path, "reason": reason})
+        logging.error(f"Headless playback {reason}: {path}")
+
+    def status(self):
+        controller = self.controller
+        status = {"state": controller.get_state(), "path": controller.get_current_path(),
+                  "time_ms": controller.get_last_time(), "length_ms": controller.get_length(),
+                  "position": self.playlist.position, "length": len(self.playlist),
+                  "played": self.played, "errors": self.errors,
+                  "sample": self.telemetry.samples[-1] if self.telemetry.samples else None}
+        if controller.is_stream():
+            status["stream"] = self.stream_monitor.health()
+        return status
+
+    def summary(self):
+        summary = dict(self.telemetry.summary(), played=self.played, errors=self.errors, failed=self.failed)
+        if self.stream_monitor.reconnects:
+            summary["reconnects"] = self.stream_monitor.reconnects
+        if self.controller.frame_ring is not None:
+            summary["frames"] = self.controller.frame_ring.sequence
+        return summary
+
+    def cleanup(self):
+        self.stream_monitor.on_stopped()
+        self.controller.cleanup()
+
+
+def register_control_methods(server, player):
+    """Команди сервера керування для headless-програвача (підмножина команд VideoPlayer)."""
+    controller = player.controller
+
+    def seek(time_ms=None, position=None, relative_ms=None):
+        if time_ms is not None:
+            controller.set_time(int(time_ms))
+        elif position is not None:
+            controller.seek_to_position(float(position), dragging=False)
+        elif relative_ms is not None:
+            controller.seek_relative(int(relative_ms))
+        else:
+            raise ValueError("One of time_ms, position or relative_ms is required")
+        return True
+
+    for name, function in (
+            ("play", lambda: controller.play() == 0),
+            ("pause", lambda: controller.set_paused(True)),
+            ("resume", lambda: controller.set_paused(False)),
+            ("stop", controller.stop),
+            ("seek", seek),
+            ("set_volume", lambda volume: controller.set_volume(int(volume))),
+            ("set_mute", lambda muted: controller.set_mute(bool(muted))),
+            ("set_rate", lambda rate: controller.set_playback_rate(float(rate))),
+            ("load", lambda path: player.replace([path])),
+            ("status", player.status),
+            ("summary", player.summary),
+            ("playlist.add", player.add),
+            ("playlist.next", player.play_next),
+            ("quit", lambda: QTimer.singleShot(0, QCoreApplication.quit))):
+        server.register(name, function)
+    signals = controller.signals
+    signals.playing.connect(lambda: server.notify("playing", path=controller.get_current_path()))
+    signals.paused.connect(lambda: server.notify("paused", time_ms=controller.get_last_time()))
+    signals.end_reached.connect(lambda: server.notify("end_reached", path=controller.get_current_path()))
+    signals.error.connect(lambda: server.notify("error", path=controller.get_current_path()))
+    signals.media_changed.connect(lambda path: server.notify("media_changed", path=path))
+    player.finished.connect(lambda: server.notify("finished", **player.summary()))
+
+
+class FrameGrabber:
+    """
+    Вилучає кадри у файли без дисплея: окремий програвач декодує у пам'ять через video callbacks
+    (RV32 потрібного розміру), кадр зберігається через QImage
+    """
+
+    def __init__(self, instance, width=640, height=None, stop=None):
+        """
+        Args:
+            instance: vlc.Instance
+            width: Ширина кадру
+            height: Висота кадру (None - за пропорціями відео)
+            stop: threading.Event, після якого grab повертає вже збережені кадри (Ctrl+C, SIGTERM)
+        """
+        import vlc
+        self.instance = instance
+        self.width = width
+        self.height = height
+        self.stop = stop or threading.Event()
+        self._buffer = None
+        self._frame_ready = threading.Event()
+        # Посилання на ctypes-колбеки мають жити, поки живе програвач
+        self._lock_cb = vlc.CallbackDecorators.VideoLockCb(self._lock_frame)
+        self._unlock_cb = vlc.CallbackDecorators.VideoUnlockCb(lambda opaque, picture, planes: None)
+        self._display_cb = vlc.CallbackDecorators.VideoDisplayCb(lambda opaque, picture: self._frame_ready.set())
+
+    def _lock_frame(self, opaque, planes):
+        planes[0] = ctypes.addressof(self._buffer)
+        return None
+
+    def grab(self, path, out_dir, interval_ms=None, count=10, image_format="png"):
+        """
+        Зберігає кадри через рівні інтервали
+        Args:
+            path: Медіафайл
+            out_dir: Тека для кадрів
+            interval_ms: Інтервал між кадрами (None - count кадрів рівномірно за тривалістю)
+            count: Кількість кадрів, якщо інтервал не задано
+            image_format: png або jpg
+        Returns:
+            list: Словники time_ms і file для збережених кадрів
+        """
+        import vlc
+        from MediaController import describe_media
+        media = self.instance.media_new(path)
+        media.add_option(":no-audio")
+        parsed = threading.Event()
+        media.event_manager().event_attach(vlc.EventType.MediaParsedChanged, lambda event: parsed.set())
+        media.parse_with_options(vlc.MediaParseFlag.local, 5000)
+        parsed.wait(6)
+        info = describe_media(media)
+        duration = info["duration"]
+        if duration <= 0:
+            raise ValueError(f"Unknown duration: {path}")
+        width, height = self.width, self.height
+        if height is None:
+            source_width, source_height = info["resolution"] or (16, 9)
+            height = max(2, int(width * source_height / max(source_width, 1)) // 2 * 2)
+        if interval_ms is None:
+            interval_ms = max(1, duration // (count + 1))
+        times = list(range(interval_ms, duration, interval_ms))
+        self._buffer = ctypes.create_string_buffer(width * height * 4)
+
+        os.makedirs(out_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        frames = []
+        player = self.instance.media_player_new()
+        try:
+            player.video_set_callbacks(self._lock_cb, self._unlock_cb, self._display_cb, None)
+            player.video_set_format("RV32", width, height, width * 4)
+            player.set_media(media)
+            self._frame_ready.clear()
+            player.play()
+            if not self._frame_ready.wait(FRAME_TIMEOUT):
+                raise RuntimeError(f"No video frames decoded: {path}")
+            player.set_pause(1)
+            for index, time_ms in enumerate(times):
+                if self.stop.is_set():
+                    break
+                self._frame_ready.clear()
+                player.set_time(time_ms)
+                if not self._frame_ready.wait(FRAME_TIMEOUT):
+                    logging.warning(f"No frame at {time_ms} ms: {path}")
+                    continue
+                file_path = os.path.join(out_dir, f"{stem}_{index:05d}_{time_ms}.{image_format}")
+                QImage(self._buffer.raw, width, height, width * 4, QImage.Format_RGB32).save(file_path)
+                frames.append({"time_ms": time_ms, "file": file_path})
+        finally:
+            player.stop()
+            player.release()
+            media.release()
+        return frames
+
+
+def run_play(args, app):
+    player = HeadlessPlayer(list(iter_media_files(args.sources)), repeat=args.repeat, rate=args.rate,
+                            media_options=args.option, capacity=args.capacity)
+    if args.capture:
+        width, height = (int(value) for value in args.capture.lower().split("x"))
+        # Кадри публікуються в спільній пам'яті для окремого процесу аналізу (FrameRing.FrameReader)
+        ring = player.controller.capture_frames(width, height, args.capture_slots, shared=True, name=args.shm)
+        if ring is None:
+            return 2
+        logging.info(f"Publishing {width}x{height} frames in shared memory {ring.name}")
+    server = None
+    if args.control:
+        from RemoteControl import ControlServer
+        server = ControlServer(args.control)
+        register_control_methods(server, player)
+        server.start()
+    if args.duration:
+        QTimer.singleShot(int(args.duration * 1000), app.quit)
+    if not args.control:
+        player.finished.connect(app.quit)
+    report = QTimer()
+    report.timeout.connect(lambda: player.telemetry.samples and logging.info(
+        f"{player.controller.get_current_path()}: {player.telemetry.format_sample(player.telemetry.samples[-1])}"))
+    report.start(REPORT_INTERVAL * 1000)
+    player.start()
+    app.exec_()
+    if server is not None:
+        server.stop()
+    summary = player.summary()
+    player.cleanup()
+    if args.telemetry:
+        player.telemetry.export(args.telemetry)
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0 if summary["errors"] == 0 else 1
+
+
+def run_frames(args, stop):
+    """Вилучення кадрів іде без циклу подій Qt - сигнали завершення перевіряються через stop між файлами і кадрами."""
+    instance = InstanceManager.shared().acquire()
+    grabber = FrameGrabber(instance, args.width, args.height, stop)
+    failures = 0
+    try:
+        for path in iter_media_files(args.sources):
+            if stop.is_set():
+                logging.info("Frame extraction interrupted")
+                return 130
+            try:
+                frames = grabber.grab(path, args.out, args.every and int(args.every * 1000), args.count, args.format)
+                print(json.dumps({"path": path, "frames": frames}, ensure_ascii=False), flush=True)
+            except Exception as e:
+                failures += 1
+                logging.error(f"Error extracting frames from {path}: {str(e)}")
+                print(json.dumps({"path": path, "error": str(e)}, ensure_ascii=False), flush=True)
+    finally:
+        InstanceManager.shared().release()
+    return 0 if failures == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless playback and frame extraction (no display, no audio device).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    play = commands.add_parser("play", help="Play files or streams without a window (soak tests, benchmarks)")
+    play.add_argument("sources", nargs="+", help="Files, directories or URLs")
+    play.add_argument("--duration", type=float, default=0, help="Stop after this many seconds")
+    play.add_argument("--repeat", action="store_true", help="Loop over the sources")
+    play.add_argument("--rate", type=float, default=1.0, help="Playback rate")
+    play.add_argument("--option", action="append", default=[], help="Extra media option, e.g. :no-video")
+    play.add_argument("--capacity", type=int, default=3600, help="Telemetry samples kept (one per second)")
+    play.add_argument("--telemetry", help="Export telemetry to this .json or .csv file")
+    play.add_argument("--control", help="Remote control address (tcp://127.0.0.1:PORT or unix:/PATH)")
+    play.add_argument("--capture", metavar="WxH", help="Decode frames of this size into shared memory")
+    play.add_argument("--capture-slots", type=int, default=8, help="Frames in the shared ring buffer")
+    play.add_argument("--shm", help="Shared memory name for --capture (default: generated)")
+    frames = commands.add_parser("frames", help="Extract frames to image files")
+    frames.add_argument("sources", nargs="+", help="Files or directories")
+    frames.add_argument("--out", required=True, help="Output directory")
+    frames.add_argument("--every", type=float, help="Seconds between frames")
+    frames.add_argument("--count", type=int, default=10, help="Frames per file when --every is not given")
+    frames.add_argument("--width", type=int, default=640)
+    frames.add_argument("--height", type=int, help="Default: keep the aspect ratio")
+    frames.add_argument("--format", default="png", choices=("png", "jpg"))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+    app = QCoreApplication(sys.argv[:1])
+    InstanceManager.shared().set_headless(True)
+    # Ctrl+C і SIGTERM завершують цикл подій з підсумком (play) або вилучення кадрів (frames);
+    # таймер дає Python обробити сигнал, поки працює цикл подій
+    stop = threading.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda *_: (stop.set(), app.quit()))
+    wakeup = QTimer()
+    wakeup.timeout.connect(lambda: None)
+    wakeup.start(200)
+    if args.command == "frames":
+        return run_frames(args, stop)
+    return run_play(args, app)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
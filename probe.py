@@ -0,0 +1,342 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from PyQt5.QtCore import QThread, pyqtSignal
+from InstanceManager import InstanceManager
+from FolderScanner import VIDEO_EXTENSIONS
+
+# Скільки секунд libVLC може розбирати один файл
+DEFAULT_TIMEOUT = 10
+# Скільки файлів отримує процес за одне завдання (менше - рівніше навантаження, більше - менше пересилань)
+DEFAULT_CHUNK_SIZE = 8
+# Додатковий час понад тайм-аут libVLC, після якого розбір зупиняється примусово, с
+TIMEOUT_GRACE = 2
+# Як часто в журнал пишеться поступ, с
+PROGRESS_INTERVAL = 30
+
+# Екземпляр libVLC робочого процесу (один на процес, створюється при першому завданні)
+_instance = None
+
+
+def iter_media_files(sources, extensions=VIDEO_EXTENSIONS):
+    """
+    Перелічує файли для аналізу без побудови повного списку
+    Args:
+        sources: Файли (віддаються як є) і теки (обходяться рекурсивно через os.scandir)
+        extensions: Розширення файлів у теках (в нижньому регістрі)
+    Returns:
+        generator: Шляхи файлів
+    """
+    extensions = tuple(extensions)
+    for source in sources:
+        if not os.path.isdir(source):
+            yield source
+            continue
+        directories = [source]
+        while directories:
+            directory = directories.pop()
+            files, subdirectories = [], []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirectories.append(entry.path)
+                            elif entry.name.lower().endswith(extensions):
+                                files.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                logging.error(f"Error scanning {directory}: {str(e)}")
+                continue
+            yield from sorted(files)
+            directories.extend(sorted(subdirectories, reverse=True))
+
+
+def probe_file(instance, path, timeout=DEFAULT_TIMEOUT):
+    """
+    Розбирає один файл засобами libVLC без відтворення
+    Args:
+        instance: vlc.Instance
+        path: Шлях до файлу
+        timeout: Найбільший час розбору, с
+    Returns:
+        dict: path, status (ok, failed, timeout, skipped, error), size, mtime, elapsed_ms
+              і для ok - поля MediaController.describe_media
+    """
+    import vlc
+    from MediaController import describe_media
+    started = time.monotonic()
+    record = {"path": path, "status": "error"}
+    media = None
+    try:
+        stat = os.stat(path)
+        record["size"], record["mtime"] = stat.st_size, stat.st_mtime
+        media = instance.media_new(path)
+        parsed = threading.Event()
+        media.event_manager().event_attach(vlc.EventType.MediaParsedChanged, lambda event: parsed.set())
+        # Лише локальний розбір контейнера: без мережі, обкладинок і декодування
+        if media.parse_with_options(vlc.MediaParseFlag.local, int(timeout * 1000)) != 0:
+            record["status"] = "failed"
+        elif not parsed.wait(timeout + TIMEOUT_GRACE):
+            media.parse_stop()
+            record["status"] = "timeout"
+        else:
+            status = media.get_parsed_status()
+            if status == vlc.MediaParsedStatus.done:
+                record.update(describe_media(media))
+                record["status"] = "ok"
+            else:
+                record["status"] = vlc.MediaParsedStatus._enum_names_.get(status, "failed")
+    except Exception as e:
+        record["error"] = str(e)
+    finally:
+        if media is not None:
+            media.release()
+    record["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+    return record
+
+
+def _init_worker(options):
+    InstanceManager.shared().configure(options)
+
+
+def probe_chunk(paths, timeout):
+    """Виконується в робочому процесі: розбирає порцію файлів на спільному екземплярі libVLC процесу."""
+    global _instance
+    if _instance is None:
+        _instance = InstanceManager.shared().acquire()
+    return [probe_file(_instance, path, timeout) for path in paths]
+
+
+def _chunks(paths, size):
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def probe_paths(paths, workers=None, timeout=DEFAULT_TIMEOUT, chunk_size=DEFAULT_CHUNK_SIZE, options=None,
+                cancelled=None):
+    """
+    Розбирає файли в пулі процесів і віддає результати в порядку завершення
+    Список читається ліниво (у роботі не більше двох порцій на процес), тож пам'ять не залежить
+    від кількості файлів. Якщо робочий процес аварійно завершився (libVLC на пошкодженому файлі),
+    пул перезапускається, а втрачені файли розбираються повторно; файл, що зупинив процес
+    і при розборі наодинці, отримує статус crashed.
+    Args:
+        paths: Ітерований набір шляхів (може бути генератором)
+        workers: Кількість процесів (None - усі ядра)
+        timeout: Тайм-аут розбору одного файлу, с
+        chunk_size: Файлів в одному завданні
+        options: Параметри libVLC (ключі InstanceManager.DEFAULT_OPTIONS)
+        cancelled: Функція без аргументів; True зупиняє видачу нових завдань
+    Returns:
+        generator: Словники probe_file
+    """
+    workers = workers or os.cpu_count() or 1
+    cancelled = cancelled or (lambda: False)
+    # Завдання - (шляхи, isolated); isolated-завдання виконується, коли в роботі більше нічого немає
+    chunks = ((chunk, False) for chunk in _chunks(paths, chunk_size))
+    retry, suspects = [], []
+    # spawn: робочі процеси не успадковують потоки libVLC і Qt батьківського процесу
+    context = multiprocessing.get_context("spawn")
+    while True:
+        pool = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(dict(options or {}),))
+        pending = {}
+        broken = False
+        try:
+            while not broken:
+                while len(pending) < workers * 2 and not cancelled():
+                    if any(isolated for _, isolated in pending.values()):
+                        break
+                    if suspects:
+                        if pending:
+                            break
+                        task = suspects.pop()
+                    else:
+                        task = retry.pop() if retry else next(chunks, None)
+                    if task is None:
+                        break
+                    pending[pool.submit(probe_chunk, task[0], timeout)] = task
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = pending.pop(future)
+                    try:
+                        results = future.result()
+                    except BrokenProcessPool:
+                        pending[future] = task
+                        broken = True
+                        continue
+                    yield from results
+        finally:
+            pool.shutdown(wait=not broken, cancel_futures=True)
+        logging.error(f"Probe worker crashed; retrying {sum(len(chunk) for chunk, _ in pending.values())} files")
+        # Втрачені порції розбираються по одному файлу; файл, що був у роботі під час наступного
+        # збою, перевіряється наодинці - лише так збій можна точно приписати саме йому
+        for chunk, isolated in pending.values():
+            if isolated:
+                yield {"path": chunk[0], "status": "crashed", "elapsed_ms": 0}
+            elif len(chunk) == 1:
+                suspects.append((chunk, True))
+            else:
+                retry.extend(([path], False) for path in chunk)
+
+
+def store_result(library, record):
+    """
+    Записує результат у MediaLibrary. Файли, які libVLC не змогла розібрати, отримують тривалість 0,
+    щоб не розбиратися знову; тайм-аути і помилки доступу лишаються для наступного запуску.
+    """
+    if record["status"] == "ok":
+        library.update_media_info(record["path"], record["duration"], record["codec"])
+    elif record["status"] in ("failed", "skipped", "crashed"):
+        library.update_media_info(record["path"], 0, None)
+
+
+class LibraryProber(QThread):
+    """Розбирає у фоні всі файли медіатеки з невідомою тривалістю і записує результати в індекс."""
+    progress = pyqtSignal(int)
+
+    def __init__(self, library, workers=None, timeout=DEFAULT_TIMEOUT, parent=None):
+        """
+        Args:
+            library: MediaLibrary
+            workers: Кількість процесів (None - усі ядра, крім одного, щоб інтерфейс не гальмував)
+            timeout: Тайм-аут розбору одного файлу, с
+        """
+        super().__init__(parent)
+        self.library = library
+        self.workers = workers or max(1, (os.cpu_count() or 1) - 1)
+        self.timeout = timeout
+        self.count = 0
+
+    def cancel(self):
+        """Нові завдання не видаються; розбір завершиться після порцій, що вже в роботі."""
+        self.requestInterruption()
+
+    def run(self):
+        try:
+            for record in probe_paths(self.library.iter_unprobed_media(), self.workers, self.timeout,
+                                      options=InstanceManager.shared().options,
+                                      cancelled=self.isInterruptionRequested):
+                store_result(self.library, record)
+                self.count += 1
+                if self.count % 100 == 0:
+                    self.progress.emit(self.count)
+            self.library.flush()
+            logging.info(f"Probed {self.count} library files")
+        except Exception as e:
+            logging.error(f"Error probing library: {str(e)}")
+
+
+def read_probed_paths(filename):
+    """Шляхи, що вже є у файлі результатів (для --resume)."""
+    paths = set()
+    try:
+        with open(filename, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    paths.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    continue  # Незавершений останній рядок після перерваного запуску
+    except FileNotFoundError:
+        pass
+    return paths
+
+
+def iter_list_file(filename):
+    """Шляхи зі списку (по одному в рядку; '-' - стандартний ввід)."""
+    f = sys.stdin if filename == "-" else open(filename, encoding="utf-8")
+    try:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extract duration, streams, codecs and resolution of media files with libVLC "
+                    "in a process pool and write them as JSON Lines.")
+    parser.add_argument("sources", nargs="*", help="Media files and directories (scanned recursively)")
+    parser.add_argument("-o", "--output", help="JSON Lines output file (default: stdout)")
+    parser.add_argument("--list", dest="list_file", help="File with one path per line ('-' for stdin)")
+    parser.add_argument("--library", help="MediaLibrary database: store results in it; "
+                                          "without sources, probe its files with unknown duration")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Per-file parse timeout, s")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Files per worker task")
+    parser.add_argument("--extensions", default=",".join(VIDEO_EXTENSIONS),
+                        help="Comma-separated extensions for directory scans")
+    parser.add_argument("--resume", action="store_true", help="Skip paths already present in --output")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+    if not args.sources and not args.list_file and not args.library:
+        parser.error("no sources, --list or --library given")
+    if args.resume and not args.output:
+        parser.error("--resume requires --output")
+
+    library = None
+    if args.library:
+        from MediaLibrary import MediaLibrary
+        library = MediaLibrary(args.library)
+    extensions = tuple(extension.strip().lower() for extension in args.extensions.split(",") if extension.strip())
+    if args.sources or args.list_file:
+        paths = iter_media_files(args.sources, extensions)
+        if args.list_file:
+            paths = (path for source in (iter_list_file(args.list_file), paths) for path in source)
+    else:
+        paths = library.iter_unprobed_media()
+    if args.resume:
+        done = read_probed_paths(args.output)
+        logging.info(f"Resuming: {len(done)} files already probed")
+        paths = (path for path in paths if path not in done)
+
+    output = open(args.output, "a" if args.resume else "w", encoding="utf-8") if args.output else sys.stdout
+    counts = {}
+    started = last_report = time.monotonic()
+    try:
+        for record in probe_paths(paths, args.workers, args.timeout, args.chunk_size):
+            # Рядок записується одразу: перерваний нічний запуск продовжується з --resume
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            if library is not None:
+                store_result(library, record)
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                total = sum(counts.values())
+                logging.info(f"Probed {total} files ({total / (last_report - started):.1f}/s): {counts}")
+    except KeyboardInterrupt:
+        logging.info("Interrupted")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if library is not None:
+            library.close()
+    total = sum(counts.values())
+    logging.info(f"Probed {total} files in {time.monotonic() - started:.1f} s: {counts}")
+    return 0 if total == counts.get("ok", 0) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())